@@ -0,0 +1,146 @@
+import os
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+from src.config.config import Config
+from src.pipeline.prediction_pipeline import PredictionPipeline
+from src.pipeline.prediction_coalescer import PredictionCoalescer
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics
+
+logger = get_logger(__name__)
+config = Config()
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class EmailRequest(BaseModel):
+    body: str
+
+
+class BatchRequest(BaseModel):
+    emails: List[str]
+
+
+class PredictionResponse(BaseModel):
+    prediction: str
+    confidence: Optional[float] = None
+    raw_prediction: int
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each uvicorn worker process loads the model once and scores in its own thread pool
+    app.state.pipeline = PredictionPipeline(load_models=True, config=config)
+    app.state.executor = ThreadPoolExecutor(max_workers=config.api_scoring_threads)
+    app.state.coalescer = PredictionCoalescer(app.state.pipeline) if config.api_coalesce else None
+    logger.info(f"Scoring service started with {config.api_scoring_threads} scoring threads")
+    yield
+    if app.state.coalescer is not None:
+        app.state.coalescer.close()
+    app.state.executor.shutdown(wait=True)
+
+
+app = FastAPI(title="Spam Email Classifier", lifespan=lifespan)
+
+
+async def run_scoring(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.executor, func, *args)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (set metrics_enabled in the config)")
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/predict", response_model=PredictionResponse)
+async def predict(request: EmailRequest):
+    if app.state.coalescer is not None:
+        return await asyncio.wrap_future(app.state.coalescer.submit(request.body))
+    return await run_scoring(app.state.pipeline.predict_single_email, request.body)
+
+
+@app.post("/predict/batch", response_model=List[PredictionResponse])
+async def predict_batch(request: BatchRequest):
+    if len(request.emails) > config.api_max_batch_size:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {config.api_max_batch_size} emails")
+    return await run_scoring(app.state.pipeline.predict_emails, request.emails)
+
+
+@app.post("/predict/mbox")
+async def predict_mbox(file: UploadFile = File(...)):
+    # Spool the upload to disk in chunks so large exports never sit in memory
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mbox")
+    try:
+        with tmp_file:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                await run_scoring(tmp_file.write, chunk)
+    except Exception:
+        os.unlink(tmp_file.name)
+        raise
+
+    def remove_upload():
+        # Runs from the generator and again as the response's background task, whichever gets there first
+        try:
+            os.unlink(tmp_file.name)
+        except FileNotFoundError:
+            pass
+
+    pipeline = app.state.pipeline
+
+    def csv_rows():
+        # Starlette iterates sync generators in its thread pool, keeping the event loop free
+        try:
+            if "ClusterSize" in columns:
+                # ClusterSize is only known once every email was seen, so the CSV is written first and streamed from disk
+                csv_path = f"{tmp_file.name}.csv"
+                try:
+                    pipeline.predict_mbox_to_csv(tmp_file.name, csv_path)
+                    with open(csv_path, encoding="utf-8") as f:
+                        while chunk := f.read(UPLOAD_CHUNK_BYTES):
+                            yield chunk
+                finally:
+                    if os.path.exists(csv_path):
+                        os.unlink(csv_path)
+                return
+            yield pd.DataFrame(columns=columns).to_csv(index=False)
+            for batch in pipeline.iter_mailbox_batches(tmp_file.name):
+                yield pd.DataFrame(batch, columns=columns).to_csv(header=False, index=False)
+        finally:
+            remove_upload()
+
+    try:
+        columns = pipeline.output_columns()
+        # The background task also covers responses that fail or disconnect before the generator starts
+        return StreamingResponse(
+            csv_rows(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{os.path.splitext(file.filename or "mailbox")[0]}_predictions.csv"'},
+            background=BackgroundTask(remove_upload)
+        )
+    except Exception:
+        remove_upload()
+        raise
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("api:app", host=config.api_host, port=config.api_port, workers=config.api_workers)
@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import tempfile
 import os
 import time
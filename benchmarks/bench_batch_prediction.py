@@ -0,0 +1,35 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_mbox
+from src.pipeline.prediction_pipeline import PredictionPipeline
+
+
+def run(n_messages: int, batch_size: int) -> None:
+    pipeline = PredictionPipeline(load_models=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_mbox(os.path.join(tmp_dir, "synthetic.mbox"), n_messages)
+        mail_data = pipeline.process_mailbox(mbox_path)
+
+    results = {}
+    for label, size in (("per-email", 1), ("batched", batch_size)):
+        rows = [dict(mail) for mail in mail_data]
+        start = time.perf_counter()
+        pipeline.run_prediction(rows, batch_size=size)
+        elapsed = time.perf_counter() - start
+        results[label] = [row["Prediction"] for row in rows]
+        print(f"{label:>10} (batch_size={size}): {len(rows) / elapsed:,.0f} emails/second")
+
+    assert results["per-email"] == results["batched"], "Batched labels differ from per-email labels"
+    print("Labels match between per-email and batched inference")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-email vs batched inference")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.messages, args.batch_size)
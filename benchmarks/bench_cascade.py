@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_mbox
+from src.config.config import Config
+
+
+def run(bundle_path, n_messages) -> int:
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_mbox(os.path.join(tmp_dir, "cascade.mbox"), n_messages)
+        results = {}
+        for use_cascade in (False, True):
+            pipeline = PredictionPipeline(load_models=False)
+            pipeline.cache = None
+            pipeline.config.bundle_path = bundle_path
+            pipeline.config.use_cascade = use_cascade
+            pipeline._load_models()
+            if use_cascade and pipeline.cascade is None:
+                print(f"{bundle_path} has no cascade (its model is linear or it was trained with cascade_enabled off)")
+                return 0
+            rows = [mail for mail in pipeline.iter_mailbox(mbox_path)]
+            bodies = [mail["Body"] for mail in rows]
+
+            start = time.perf_counter()
+            results[use_cascade] = [result['prediction'] for result in pipeline.predict_emails(bodies)]
+            seconds = time.perf_counter() - start
+            print(f"{'cascade' if use_cascade else 'full model':>10}: {len(bodies) / seconds:8.0f} emails/s")
+
+        report = pipeline.cascade_report()
+        agreement = sum(a == b for a, b in zip(results[True], results[False])) / len(bodies)
+        print(f"Screened {report['screen_fraction']:.1%}, escalated {report['escalated_fraction']:.1%}, "
+              f"agreement with the full model {agreement:.4f}, estimated speedup {report['estimated_speedup']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cascade and full-model scoring for a bundle with a cascade")
+    parser.add_argument("--bundle", default=Config().served_bundle_path())
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+    sys.exit(run(args.bundle, args.messages))
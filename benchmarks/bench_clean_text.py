@@ -0,0 +1,80 @@
+import argparse
+import random
+import re
+import time
+
+from benchmarks.synthetic import make_message
+from src.utils.email_utils import EXCEL_CELL_LIMIT, clean_text, extract_body
+
+# Characters the cleaner treats specially, mixed with plain and astral text
+FUZZ_ALPHABET = (
+    [chr(c) for c in range(0x00, 0x20)]
+    + ["​", "‌", "‍", "‎", "‏", "﻿", "\ud83d", "\ude00", "\udbff", "\udc00"]
+    + ["=", "+", "-", "@", " ", "a", "Z", "é", "中", "😀", " ", "\x7f", "\x85"]
+)
+
+
+def reference_clean_text(text):
+    """The original regex + UTF-16 round-trip implementation, kept as the parity reference"""
+    if not isinstance(text, str):
+        return text
+    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F​‌‍‎‏﻿]', '', text)
+    text = text.encode("utf-16", "surrogatepass").decode("utf-16", "ignore")
+    text = text[:32767]
+    if text.startswith(("=", "+", "-", "@")):
+        text = "'" + text
+    return text
+
+
+def fuzz_corpus(n_cases, rng):
+    yield from (None, 42, "", "=SUM(A1)", "﻿=1", "\ud83d​\ude00")
+    for _ in range(n_cases):
+        length = rng.choice([rng.randint(0, 40), rng.randint(0, 400),
+                             EXCEL_CELL_LIMIT + rng.randint(-4, 4), EXCEL_CELL_LIMIT + rng.randint(1000, 1100)])
+        if length > 1000:
+            # Long inputs: mostly plain text, with special characters clustered near the cell limit
+            chars = ["x"] * length
+            for _ in range(rng.randint(0, 40)):
+                chars[min(length - 1, max(0, int(rng.gauss(EXCEL_CELL_LIMIT, 600))))] = rng.choice(FUZZ_ALPHABET)
+            if rng.random() < 0.1:
+                # Enough dropped characters that the early-truncation prefix comes up short
+                chars[:2000] = ["\x00"] * 2000
+            yield "".join(chars)
+        else:
+            yield "".join(rng.choice(FUZZ_ALPHABET) for _ in range(length))
+
+
+def html_bodies(n_bodies, rng):
+    bodies = []
+    for index in range(n_bodies):
+        body = extract_body(make_message(index, rng, html_ratio=1.0, body_repeat=rng.choice([50, 500, 5000])))
+        bodies.append(body if index % 2 else body.replace(" you ", " y​ou "))
+    return bodies
+
+
+def run(n_cases, n_bodies, repeat) -> None:
+    rng = random.Random(42)
+    cases = list(fuzz_corpus(n_cases, rng))
+    mismatches = [case for case in cases if clean_text(case) != reference_clean_text(case)]
+    print(f"Parity: {len(cases) - len(mismatches)}/{len(cases)} fuzz cases identical")
+
+    bodies = html_bodies(n_bodies, rng)
+    mib = sum(len(body.encode("utf-8")) for body in bodies) / 2**20
+    timings = {}
+    for name, func in (("reference", reference_clean_text), ("clean_text", clean_text)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for body in bodies:
+                func(body)
+        timings[name] = (time.perf_counter() - start) / repeat
+        print(f"{name:>10}: {mib / timings[name]:8.1f} MiB/s on {len(bodies)} HTML-derived bodies ({mib:.1f} MiB)")
+    print(f"Speedup: {timings['reference'] / timings['clean_text']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzz parity and throughput of clean_text against the original")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--bodies", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.cases, args.bodies, args.repeat)
@@ -0,0 +1,62 @@
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from benchmarks.synthetic import HAM_PHRASES, SPAM_PHRASES
+from src.pipeline.prediction_pipeline import PredictionPipeline
+from src.pipeline.prediction_coalescer import PredictionCoalescer
+
+
+def drive(predict, texts, concurrency: int, requests_per_client: int):
+    latencies, lock = [], threading.Lock()
+
+    def client(seed: int) -> None:
+        rng = random.Random(seed)
+        local = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            predict(rng.choice(texts))
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    quantiles = statistics.quantiles(latencies, n=100)
+    return len(latencies) / elapsed, quantiles[49] * 1000, quantiles[98] * 1000
+
+
+def run(concurrency: int, requests_per_client: int, max_batch_size: int, max_wait_ms: float, pickle_models: bool) -> None:
+    pipeline = PredictionPipeline(load_models=False)
+    if pickle_models:
+        pipeline.config.bundle_path = ""
+    pipeline._load_models()
+    rng = random.Random(0)
+    texts = [" ".join(rng.choice(SPAM_PHRASES + HAM_PHRASES) for _ in range(5)) for _ in range(500)]
+
+    coalescer = PredictionCoalescer(pipeline, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    assert [coalescer.predict(text) for text in texts[:50]] == [pipeline.predict_single_email(text) for text in texts[:50]]
+
+    for name, predict in (("direct", pipeline.predict_single_email), ("coalesced", coalescer.predict)):
+        throughput, p50, p99 = drive(predict, texts, concurrency, requests_per_client)
+        print(f"{name:>9}: {throughput:,.0f} requests/second, p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+    coalescer.close()
+    print(f"Average coalesced batch: {coalescer.requests / max(coalescer.batches, 1):.1f} emails")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent single-email throughput with and without coalescing")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per client")
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--pickle", action="store_true", help="Score with the pickled sklearn models instead of the bundle")
+    args = parser.parse_args()
+    run(args.concurrency, args.requests, args.max_batch_size, args.max_wait_ms, args.pickle)
@@ -0,0 +1,75 @@
+import argparse
+import glob
+import os
+import random
+import re
+import time
+from email import message_from_bytes
+from html import unescape
+
+from bs4 import BeautifulSoup
+
+from benchmarks.synthetic import make_message
+from src.utils.email_utils import extract_body
+
+MIME_SAMPLES_DIR = os.path.join(os.path.dirname(__file__), "data", "mime")
+
+
+def reference_extract_body(msg):
+    """The original BeautifulSoup-only implementation, kept as the parity reference"""
+    texts = []
+    parts = [part for part in msg.walk() if part.get_content_type() in ("text/plain", "text/html")] if msg.is_multipart() else [msg]
+    for part in parts:
+        payload = part.get_payload(decode=True)
+        if payload:
+            text = unescape(payload.decode(errors="ignore"))
+            texts.append(BeautifulSoup(text, "html.parser").get_text(" "))
+
+    clean = " ".join(texts)
+    clean = re.sub(r'\\+', ' ', clean)
+    clean = re.sub(r'[\r\n\t]+', ' ', clean)
+    clean = re.sub(r'\s+', ' ', clean)
+    return clean.strip()
+
+
+def load_corpus(n_synthetic: int):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(MIME_SAMPLES_DIR, "*.eml"))):
+        with open(path, "rb") as f:
+            corpus.append((os.path.basename(path), message_from_bytes(f.read())))
+    rng = random.Random(42)
+    for index in range(n_synthetic):
+        corpus.append((f"synthetic_{index}", make_message(index, rng, html_ratio=0.5, body_repeat=10)))
+    return corpus
+
+
+def time_engine(func, messages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for msg in messages:
+            func(msg)
+    return time.perf_counter() - start
+
+
+def run(n_synthetic: int, repeat: int) -> None:
+    corpus = load_corpus(n_synthetic)
+
+    mismatches = [name for name, msg in corpus if extract_body(msg) != reference_extract_body(msg)]
+    for name in mismatches:
+        print(f"MISMATCH: {name}")
+    print(f"Parity: {len(corpus) - len(mismatches)}/{len(corpus)} messages identical")
+
+    messages = [msg for _, msg in corpus]
+    reference = time_engine(reference_extract_body, messages, repeat)
+    fast = time_engine(extract_body, messages, repeat)
+    total = len(messages) * repeat
+    print(f"reference: {total / reference:,.0f} messages/second")
+    print(f"     fast: {total / fast:,.0f} messages/second ({reference / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark for extract_body against the BeautifulSoup reference")
+    parser.add_argument("--synthetic", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.synthetic, args.repeat)
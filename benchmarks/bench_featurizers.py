@@ -0,0 +1,56 @@
+import argparse
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from src.config.config import Config
+from src.components.featurizers import FEATURIZER_BACKENDS, build_featurizer
+from src.components.inference_bundle import InferenceBundle
+
+
+def throughput(func, texts, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        func(texts[i:i + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+
+def run(batch_size: int) -> None:
+    config = Config()
+    with open(config.model_path, "rb") as f:
+        base_model = pickle.load(f)
+
+    data = pd.read_csv(config.training_data_path)
+    X = data["Message"].astype(str).tolist()
+    y = (data["Category"] == "ham").astype(int).values
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+
+    for backend in FEATURIZER_BACKENDS:
+        featurizer = build_featurizer(backend)
+        model = clone(base_model).fit(featurizer.fit_transform(X_train), y_train)
+        f1 = f1_score(y_test, model.predict(featurizer.transform(X_test)), average="weighted")
+
+        with tempfile.TemporaryDirectory() as bundle_dir:
+            bundle = InferenceBundle.load(InferenceBundle.export(featurizer, model, bundle_dir))
+            margins = model.decision_function(featurizer.transform(X_test))
+            parity = np.abs(margins - bundle.scorer.decision_function(X_test)).max() if bundle.scorer else float("nan")
+            sklearn_rate = throughput(lambda texts: model.predict(featurizer.transform(texts)), X_test, batch_size)
+            fused_rate = throughput(bundle.scorer.predict, X_test, batch_size) if bundle.scorer else float("nan")
+
+        print(f"{backend:>8}: {featurizer.transform(X_test[:1]).shape[1]:>7} features, "
+              f"pickle {len(pickle.dumps(featurizer)) / 1024:8.1f} KiB, F1 {f1:.4f}, "
+              f"sklearn {sklearn_rate:8.0f} emails/s, fused {fused_rate:8.0f} emails/s, "
+              f"bundle margin diff {parity:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy, size and throughput of the TF-IDF and hashing featurizers")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.batch_size)
@@ -0,0 +1,67 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules that must not be imported just to score one email from the inference bundle
+HEAVY_MODULES = ("pandas", "bs4", "sklearn", "scipy")
+
+COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from src.pipeline.prediction_pipeline import PredictionPipeline
+imported = time.perf_counter()
+PredictionPipeline(load_models=True).predict_single_email("Congratulations, you won a free prize. Reply now!")
+done = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_prediction": done - imported,
+                  "heavy": sorted(m for m in %r if m in sys.modules)}))
+""" % (HEAVY_MODULES,)
+
+
+def import_times(module):
+    """Parse python -X importtime output into {module: (self_us, cumulative_us)}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def run(module, repeat, top) -> None:
+    # Take the best of several runs; a single cold import is dominated by disk and scheduler noise
+    runs = [import_times(module) for _ in range(repeat)]
+    best = min(runs, key=lambda times: times[module][1])
+    cumulative_ms = best[module][1] / 1000
+    heavy = sorted(name for name in best if name.split(".")[0] in HEAVY_MODULES)
+
+    print(f"import {module}: {cumulative_ms:.1f} ms cumulative (best of {repeat})")
+    print("Slowest modules by self time:")
+    for name, (self_us, _) in sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    if heavy:
+        print(f"Heavy modules imported eagerly: {', '.join(sorted({name.split('.')[0] for name in heavy}))}")
+
+    cold = subprocess.run([sys.executable, "-c", COLD_START], capture_output=True, text=True)
+    if cold.returncode == 0:
+        timings = json.loads(cold.stdout.strip().splitlines()[-1])
+        print(f"Cold start to first single-email prediction: {(timings['import'] + timings['first_prediction']) * 1e3:.1f} ms "
+              f"(import {timings['import'] * 1e3:.1f} ms, load and score {timings['first_prediction'] * 1e3:.1f} ms)")
+        if timings["heavy"]:
+            # Pickled artifacts unpickle through sklearn; only the bundle path is expected to stay light
+            print(f"Loaded while predicting: {', '.join(timings['heavy'])}")
+    else:
+        print(f"Skipping the cold start check, prediction failed: {cold.stderr.strip().splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time breakdown and cold start of the prediction entry point")
+    parser.add_argument("--module", default="src.pipeline.prediction_pipeline")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    run(args.module, args.repeat, args.top)
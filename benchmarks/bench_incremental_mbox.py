@@ -0,0 +1,75 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_mbox
+
+
+def append_mbox(target, source):
+    with open(target, "ab") as out, open(source, "rb") as f:
+        shutil.copyfileobj(f, out)
+
+
+def run(history, daily, days) -> int:
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    pipeline = PredictionPipeline(load_models=True)
+    pipeline.cache = None
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline.config.mbox_state_path = os.path.join(tmp_dir, "mbox_state.json")
+        mbox_path = write_mbox(os.path.join(tmp_dir, "export.mbox"), history)
+        output_path = os.path.join(tmp_dir, "predictions.csv")
+        reference_path = os.path.join(tmp_dir, "reference.csv")
+
+        start = time.perf_counter()
+        result = pipeline.predict_mbox_incremental(mbox_path, output_path)
+        print(f"Initial run ({result['mode']}): {result['new_messages']} messages in {time.perf_counter() - start:.2f}s")
+
+        for day in range(1, days + 1):
+            append_mbox(mbox_path, write_mbox(os.path.join(tmp_dir, f"day{day}.mbox"), daily, seed=day))
+            start = time.perf_counter()
+            result = pipeline.predict_mbox_incremental(mbox_path, output_path)
+            incremental_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            pipeline.predict_mbox_to_csv(mbox_path, reference_path)
+            full_seconds = time.perf_counter() - start
+            with open(output_path, "rb") as a, open(reference_path, "rb") as b:
+                identical = a.read() == b.read()
+            ok &= identical and result["mode"] == "append"
+            print(f"Day {day} ({result['mode']}): {result['new_messages']} new of {result['messages']} messages, "
+                  f"incremental {incremental_seconds:.2f}s vs full rerun {full_seconds:.2f}s, output identical: {identical}")
+
+        result = pipeline.predict_mbox_incremental(mbox_path, output_path)
+        ok &= result["mode"] == "unchanged"
+        print(f"Rerun with nothing new: {result['mode']}")
+
+        # A crashed run leaves rows after the recorded output size; the next run drops them before appending
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write("partial,row,from,a,crashed,run\n")
+        append_mbox(mbox_path, write_mbox(os.path.join(tmp_dir, "late.mbox"), daily, seed=99))
+        result = pipeline.predict_mbox_incremental(mbox_path, output_path)
+        pipeline.predict_mbox_to_csv(mbox_path, reference_path)
+        with open(output_path, "rb") as a, open(reference_path, "rb") as b:
+            identical = a.read() == b.read()
+        ok &= identical
+        print(f"After a simulated crash ({result['mode']}): output identical: {identical}")
+
+        # Re-exporting the mailbox with different content must not be mistaken for an append
+        write_mbox(mbox_path, history + daily * (days + 1) + 10, seed=7)
+        result = pipeline.predict_mbox_incremental(mbox_path, output_path)
+        ok &= result["mode"] == "full"
+        print(f"Rewritten mailbox: {result['mode']} run of {result['new_messages']} messages")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily incremental mbox runs against full reruns")
+    parser.add_argument("--history", type=int, default=20000, help="Messages already in the export")
+    parser.add_argument("--daily", type=int, default=500, help="Messages appended per day")
+    parser.add_argument("--days", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(run(args.history, args.daily, args.days))
@@ -0,0 +1,69 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_labeled_csv
+
+MODES = ("pandas", "streaming", "cold-cache", "warm-cache")
+
+
+def child(csv_path: str, cache_dir: str, mode: str) -> None:
+    from src.utils.state import TrainingState
+
+    start_time = time.time()
+    if mode == "pandas":
+        # The previous ingestion path: one read_csv, then copy, .loc rewrites and astype(int)
+        import pandas as pd
+
+        data = pd.read_csv(csv_path).copy()
+        data.loc[data['Category'] == 'spam', 'Category'] = 0
+        data.loc[data['Category'] == 'ham', 'Category'] = 1
+        data['Category'] = data['Category'].astype(int)
+    else:
+        from src.components.data_ingestion import DataIngestion
+
+        ingestion = DataIngestion()
+        ingestion.config.training_data_path = csv_path
+        ingestion.config.ingestion_cache_dir = cache_dir
+        ingestion.config.use_ingestion_cache = mode != "streaming"
+        data = ingestion.load_data(TrainingState()).training_data
+    # ru_maxrss is reported in KiB on Linux
+    print(f"{time.time() - start_time} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} {len(data)}")
+
+
+def measure(csv_path: str, cache_dir: str, mode: str):
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingestion", "--child", csv_path, cache_dir, mode],
+        check=True, capture_output=True, text=True
+    )
+    seconds, max_rss, rows = result.stdout.strip().splitlines()[-1].split()
+    return float(seconds), int(max_rss) / 1024, int(rows)
+
+
+def run(n_rows: int, modes) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "labeled.csv")
+        start_time = time.time()
+        write_labeled_csv(csv_path, n_rows)
+        print(f"Wrote {n_rows} rows ({os.path.getsize(csv_path) / 2**20:.1f} MiB) in {time.time() - start_time:.1f} s")
+
+        cache_dir = os.path.join(tmp_dir, "cache")
+        for mode in modes:
+            seconds, peak_mib, rows = measure(csv_path, cache_dir, mode)
+            print(f"{mode:>11}: {seconds:7.2f} s, peak RSS {peak_mib:8.1f} MiB, {rows} rows")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Ingestion time and peak RSS of pandas vs streaming vs cached loading")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+    run(args.rows, args.modes)
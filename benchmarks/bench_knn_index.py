@@ -0,0 +1,92 @@
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+
+from src.config.config import Config, ModelConfig
+from src.components.featurizers import build_featurizer
+from src.components.inference_bundle import InferenceBundle
+from src.components.knn_index import InvertedIndexKNN, neighbour_recall
+
+
+def lengthen(texts, labels, factor, seed=0):
+    """Join each text with factor - 1 random texts of the same class, to mimic longer emails"""
+    if factor <= 1:
+        return texts
+    rng = np.random.default_rng(seed)
+    by_class = {label: np.flatnonzero(labels == label) for label in np.unique(labels)}
+    return [" ".join([text] + [texts[j] for j in rng.choice(by_class[label], factor - 1)])
+            for text, label in zip(texts, labels)]
+
+
+def timed(func, X, repeats):
+    seconds, result = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(X)
+        seconds = min(seconds, time.perf_counter() - start)
+    return result, seconds * 1000 / X.shape[0]
+
+
+def run(factor, n_neighbors, repeats) -> int:
+    config = Config()
+    data = pd.read_csv(config.training_data_path)
+    y = (data["Category"] == "ham").astype(int).values
+    X = lengthen(data["Message"].astype(str).tolist(), y, factor)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    featurizer = build_featurizer("tfidf")
+    X_train, X_test = featurizer.fit_transform(X_train), featurizer.transform(X_test)
+    print(f"{X_train.shape[0]} training rows, {X_train.shape[1]} features, "
+          f"{X_train.nnz / X_train.shape[0]:.1f} terms per row")
+
+    ok = True
+    index = InvertedIndexKNN(n_neighbors=n_neighbors).fit(X_train, y_train)
+    _, exact_indices = index.kneighbors(X_test)
+    for metric in ("euclidean", "cosine"):
+        brute = KNeighborsClassifier(n_neighbors=n_neighbors, metric=metric, algorithm="brute").fit(X_train, y_train)
+        y_pred, ms = timed(brute.predict, X_test, repeats)
+        print(f"{'sklearn ' + metric:>22}: accuracy {accuracy_score(y_test, y_pred):.4f}, {ms:.3f} ms/email")
+        if metric == "cosine":
+            brute_pred = y_pred
+
+    for max_query_terms in ModelConfig.knn_recall_curve:
+        index.set_params(max_query_terms=max_query_terms)
+        y_pred, ms = timed(index.predict, X_test, repeats)
+        recall = neighbour_recall(index.kneighbors(X_test)[1], exact_indices)
+        print(f"{'index ' + str(max_query_terms or 'exact'):>22}: accuracy {accuracy_score(y_test, y_pred):.4f}, "
+              f"{ms:.3f} ms/email, neighbour recall {recall:.3f}")
+        if max_query_terms is None:
+            agreement = float((y_pred == brute_pred).mean())
+            ok &= agreement >= 0.99
+            print(f"{'':>22}  label agreement with sklearn cosine {agreement:.4f}")
+
+    # Grid search cost: scoring every cross-validation fold
+    folds = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    for name, model in (("sklearn euclidean", KNeighborsClassifier(n_neighbors=n_neighbors)),
+                        ("index exact", InvertedIndexKNN(n_neighbors=n_neighbors))):
+        start = time.perf_counter()
+        scores = cross_val_score(model, X_train, y_train, cv=folds, scoring="f1_weighted")
+        print(f"{name:>22}: 5-fold CV {time.perf_counter() - start:.2f}s, F1 {scores.mean():.4f}")
+
+    index.set_params(max_query_terms=None)
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        bundle = InferenceBundle.load(InferenceBundle.export(featurizer, index, bundle_dir))
+        same = bool((bundle.model.predict(X_test) == index.predict(X_test)).all())
+        ok &= same
+        print(f"Bundle round trip (memory-mapped index): predictions identical: {same}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy, neighbour recall and latency of the inverted-index KNN against brute force")
+    parser.add_argument("--length-factor", type=int, default=1, help="Texts joined into each document")
+    parser.add_argument("--neighbors", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(run(args.length_factor, args.neighbors, args.repeats))
@@ -0,0 +1,54 @@
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.config.config import Config
+from src.components.inference_bundle import InferenceBundle
+
+
+def latency_us(func, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def run(n_emails: int, repeat: int) -> None:
+    config = Config()
+    with open(config.feature_path, "rb") as f:
+        vectorizer = pickle.load(f)
+    with open(config.model_path, "rb") as f:
+        model = pickle.load(f)
+    bundle = InferenceBundle.load(config.served_bundle_path())
+    if bundle.scorer is None:
+        raise SystemExit(f"{config.served_bundle_path()} has no fused linear scorer (model is not linear)")
+
+    texts = pd.read_csv(config.training_data_path)["Message"].astype(str).tolist()[:n_emails]
+
+    sklearn_margins = model.decision_function(vectorizer.transform(texts))
+    fused_margins = bundle.scorer.decision_function(texts)
+    labels_match = (model.predict(vectorizer.transform(texts)) == bundle.scorer.predict(texts)).all()
+    print(f"Labels match: {labels_match}, max margin difference: {np.abs(sklearn_margins - fused_margins).max():.2e}")
+
+    paths = {
+        "sklearn": lambda text: model.predict(vectorizer.transform([text])),
+        "bundle CSR": lambda text: bundle.model.predict(bundle.feature_transformer.transform([text])),
+        "fused": lambda text: bundle.scorer.predict([text]),
+    }
+    baseline = None
+    for name, func in paths.items():
+        latency = latency_us(func, texts, repeat)
+        baseline = baseline or latency
+        print(f"{name:>10}: {latency:8.1f} us/email ({baseline / latency:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Single-email latency of sklearn vs fused linear scoring")
+    parser.add_argument("--emails", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.emails, args.repeat)
@@ -0,0 +1,81 @@
+import argparse
+import mailbox
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import write_mbox
+from src.utils.mbox_index import MboxIndex
+from src.utils.mbox_utils import iter_mbox_messages
+
+
+def check_parity(mbox_path, index) -> bool:
+    """Every indexed message must match the streaming reader byte for byte, From line included"""
+    streamed = iter_mbox_messages(mbox_path)
+    for indexed, reference in zip(index.iter_messages(), streamed):
+        if indexed.as_bytes() != reference.as_bytes() or indexed.get_from() != reference.get_from():
+            return False
+    return next(streamed, None) is None and len(index) == sum(1 for _ in iter_mbox_messages(mbox_path))
+
+
+def run(n_messages, workers) -> int:
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_mbox(os.path.join(tmp_dir, "indexed.mbox"), n_messages, body_repeat=10)
+        print(f"{n_messages} messages, {os.path.getsize(mbox_path) / 2**20:.1f} MiB")
+
+        start = time.perf_counter()
+        toc = mailbox.mbox(mbox_path)
+        toc.keys()
+        toc.close()
+        print(f"mailbox.mbox table of contents: {time.perf_counter() - start:.3f}s (paid on every run)")
+
+        start = time.perf_counter()
+        MboxIndex.build(mbox_path)
+        print(f"Index build:                    {time.perf_counter() - start:.3f}s (once per file version)")
+
+        start = time.perf_counter()
+        index = MboxIndex.open(mbox_path)
+        print(f"Index open:                     {(time.perf_counter() - start) * 1e3:.2f}ms")
+
+        parity = check_parity(mbox_path, index)
+        print(f"Parity with iter_mbox_messages: {parity}")
+
+        pipeline = PredictionPipeline(load_models=True)
+        pipeline.cache = None
+        output_path = os.path.join(tmp_dir, "predictions.csv")
+
+        start = time.perf_counter()
+        full = pipeline.predict_mbox_file(mbox_path)
+        stream_filter_seconds = time.perf_counter() - start
+        expected = full[full["Category"] == "Spam"].reset_index(drop=True)
+
+        start = time.perf_counter()
+        selection = pipeline.select_messages(mbox_path, labels=["Spam"])
+        subset = pipeline.predict_mbox_file(mbox_path, selection=selection)
+        indexed_seconds = time.perf_counter() - start
+        subset_matches = subset.equals(expected)
+        print(f"Spam-labelled subset ({len(selection)} messages): stream + filter {stream_filter_seconds:.2f}s, "
+              f"indexed {indexed_seconds:.2f}s ({stream_filter_seconds / indexed_seconds:.1f}x), identical: {subset_matches}")
+
+        parts = index.split(np.arange(len(index)), workers * 4)
+        part_bytes = [int((index.ends[part] - index.starts[part]).sum()) for part in parts]
+        print(f"Even split into {len(parts)} parts: largest part {max(part_bytes) / np.mean(part_bytes):.3f}x the mean")
+
+        if workers > 1:
+            start = time.perf_counter()
+            pipeline.predict_mbox_to_csv(mbox_path, output_path, workers=workers, selection=np.arange(len(index)))
+            print(f"Indexed run with {workers} workers: {n_messages / (time.perf_counter() - start):,.0f} emails/s")
+        return 0 if parity and subset_matches else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an mbox sidecar index and compare indexed subset reads with a full scan")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    sys.exit(run(args.messages, args.workers))
@@ -0,0 +1,76 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def rss_mib() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def child(artifact: str) -> None:
+    import pickle
+    from src.config.config import Config
+    from src.components.inference_bundle import InferenceBundle
+
+    config = Config()
+    before = rss_mib()
+    start = time.perf_counter()
+    if artifact == "bundle":
+        bundle = InferenceBundle.load(config.served_bundle_path())
+        bundle.feature_transformer.transform(["warm up"])
+    else:
+        with open(config.feature_path, "rb") as f:
+            vectorizer = pickle.load(f)
+        with open(config.model_path, "rb") as f:
+            pickle.load(f)
+        vectorizer.transform(["warm up"])
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed} {rss_mib() - before}")
+
+
+def artifact_size_mib(paths) -> float:
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            total += sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        else:
+            total += os.path.getsize(path)
+    return total / 2**20
+
+
+def run(repeat: int) -> None:
+    from src.config.config import Config
+
+    config = Config()
+    sizes = {
+        "pickle": artifact_size_mib([config.feature_path, config.model_path]),
+        "bundle": artifact_size_mib([config.served_bundle_path()]),
+    }
+    for artifact in ("pickle", "bundle"):
+        timings, rss = [], []
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_model_load", "--child", artifact],
+                check=True, capture_output=True, text=True
+            )
+            elapsed, rss_delta = map(float, result.stdout.split())
+            timings.append(elapsed)
+            rss.append(rss_delta)
+        print(f"{artifact:>6}: load {min(timings) * 1000:7.1f} ms, RSS +{min(rss):6.1f} MiB, on disk {sizes[artifact]:.2f} MiB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Compare cold model load time and RSS for pickle vs inference bundle")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.repeat)
@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from benchmarks.synthetic import write_campaign_mbox
+from src.config.config import Config
+from src.utils.metrics import metrics
+
+
+def make_pipeline(bundle_path, clustering, threshold, output_dir):
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    pipeline = PredictionPipeline(load_models=False, config=Config(metrics_enabled=True))
+    pipeline.cache = None
+    pipeline.config.bundle_path = bundle_path
+    pipeline.config.near_duplicate_clustering = clustering
+    pipeline.config.near_duplicate_threshold = threshold
+    pipeline.config.OUTPUT_BASE_DIR = output_dir
+    pipeline._load_models()
+    return pipeline
+
+
+def score_bodies(pipeline, bodies, batch_size=1000):
+    """Scoring stage alone: clustering plus the model, without mbox parsing"""
+    start = time.perf_counter()
+    with pipeline.near_duplicate_run():
+        for offset in range(0, len(bodies), batch_size):
+            pipeline._predict_cleaned(bodies[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+def campaign_report(df):
+    """Share of clusters holding a single campaign, and how many clusters each campaign was split into"""
+    tags = df["Subject"].str.extract(r"^\[(\w+)\]")[0]
+    campaigns_per_cluster = tags.groupby(df["Cluster"]).nunique()
+    clusters_per_campaign = defaultdict(set)
+    for tag, cluster in zip(tags, df["Cluster"]):
+        if tag != "distinct":
+            clusters_per_campaign[tag].add(cluster)
+    fragments = [len(clusters) for clusters in clusters_per_campaign.values()]
+    distinct = df[tags == "distinct"]
+    return {
+        "pure_clusters": float((campaigns_per_cluster == 1).mean()),
+        "clusters_per_campaign": sum(fragments) / max(len(fragments), 1),
+        "distinct_in_shared_clusters": float((distinct["ClusterSize"] > 1).mean()) if len(distinct) else 0.0,
+    }
+
+
+def run(bundle_path, n_messages, threshold, workers) -> int:
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_campaign_mbox(os.path.join(tmp_dir, "campaigns.mbox"), n_messages)
+        outputs, stage_seconds = {}, {}
+        for clustering in (False, True):
+            pipeline = make_pipeline(bundle_path, clustering, threshold, tmp_dir)
+            bodies = [mail["Body"] for mail in pipeline.iter_mailbox(mbox_path)]
+            stage_seconds[clustering] = score_bodies(pipeline, bodies)
+
+            metrics.reset()
+            outputs[clustering] = os.path.join(tmp_dir, f"clustering_{clustering}.csv")
+            start = time.perf_counter()
+            pipeline.predict_mbox_to_csv(mbox_path, outputs[clustering])
+            seconds = time.perf_counter() - start
+            scored = metrics.snapshot()["counters"].get("predict.scored", 0)
+            print(f"{'clustered' if clustering else 'baseline':>10}: scoring stage {len(bodies) / stage_seconds[clustering]:8,.0f} emails/s, "
+                  f"end to end {n_messages / seconds:7,.0f} emails/s, {scored} emails sent to the model")
+
+        baseline = pd.read_csv(outputs[False], dtype=str, keep_default_na=False)
+        clustered = pd.read_csv(outputs[True], dtype=str, keep_default_na=False)
+        clustered["Cluster"] = clustered["Cluster"].astype(int)
+        clustered["ClusterSize"] = clustered["ClusterSize"].astype(int)
+        agreement = float((baseline["Prediction"] == clustered["Prediction"]).mean())
+        same_rows = baseline.equals(clustered[baseline.columns].astype(str).where(clustered[baseline.columns].notna(), ""))
+        sizes_match = (clustered["ClusterSize"] == clustered["Cluster"].map(Counter(clustered["Cluster"]))).all()
+        report = campaign_report(clustered)
+        ok &= agreement >= 0.99 and bool(sizes_match)
+        print(f"Scoring stage speedup {stage_seconds[False] / stage_seconds[True]:.1f}x, {clustered['Cluster'].nunique()} clusters, "
+              f"label agreement {agreement:.4f}, other columns identical: {same_rows}, ClusterSize consistent: {sizes_match}")
+        print(f"Pure clusters {report['pure_clusters']:.1%}, {report['clusters_per_campaign']:.1f} clusters per campaign, "
+              f"distinct emails in shared clusters {report['distinct_in_shared_clusters']:.1%}")
+
+        if workers > 1:
+            pipeline = make_pipeline(bundle_path, True, threshold, tmp_dir)
+            parallel_path = os.path.join(tmp_dir, "parallel.csv")
+            pipeline.predict_mbox_to_csv(mbox_path, parallel_path, workers=workers)
+            parallel = pd.read_csv(parallel_path, dtype=str, keep_default_na=False)
+            leaders_valid = (parallel["Cluster"].astype(int).map(lambda row: parallel["Cluster"].iat[row]) == parallel["Cluster"]).all()
+            ok &= bool(leaders_valid)
+            print(f"{workers} workers: {parallel['Cluster'].nunique()} clusters (ranges are clustered separately), "
+                  f"every cluster id is its leader's row: {leaders_valid}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Near-duplicate clustering on a campaign-heavy synthetic mailbox")
+    parser.add_argument("--bundle", default=Config().served_bundle_path())
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--threshold", type=float, default=Config().near_duplicate_threshold)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    sys.exit(run(args.bundle, args.messages, args.threshold, args.workers))
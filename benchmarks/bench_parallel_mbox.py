@@ -0,0 +1,38 @@
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_mbox
+from src.pipeline.prediction_pipeline import PredictionPipeline
+
+
+def run(n_messages: int, worker_counts) -> None:
+    pipeline = PredictionPipeline(load_models=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_mbox(os.path.join(tmp_dir, "synthetic.mbox"), n_messages)
+        serial_path = os.path.join(tmp_dir, "serial.csv")
+
+        start = time.perf_counter()
+        pipeline.predict_mbox_to_csv(mbox_path, serial_path, workers=1)
+        serial_time = time.perf_counter() - start
+        print(f"workers= 1: {n_messages / serial_time:,.0f} emails/second")
+
+        for workers in worker_counts:
+            output_path = os.path.join(tmp_dir, f"parallel_{workers}.csv")
+            start = time.perf_counter()
+            pipeline.predict_mbox_to_csv(mbox_path, output_path, workers=workers)
+            elapsed = time.perf_counter() - start
+            identical = filecmp.cmp(serial_path, output_path, shallow=False)
+            print(f"workers={workers:>2}: {n_messages / elapsed:,.0f} emails/second, "
+                  f"speedup {serial_time / elapsed:.2f}x, output identical: {identical}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serial vs process-pool mbox prediction")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    args = parser.parse_args()
+    run(args.messages, args.workers)
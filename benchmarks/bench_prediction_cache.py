@@ -0,0 +1,40 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_mbox
+from src.pipeline.prediction_pipeline import PredictionPipeline
+from src.utils.prediction_cache import PredictionCache
+
+
+def timed_run(pipeline, mbox_path: str, output_path: str) -> float:
+    start = time.perf_counter()
+    total = pipeline.predict_mbox_to_csv(mbox_path, output_path)
+    return total / (time.perf_counter() - start)
+
+
+def run(n_messages: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        mbox_path = write_mbox(os.path.join(tmp_dir, "synthetic.mbox"), n_messages)
+        output_path = os.path.join(tmp_dir, "predictions.csv")
+
+        uncached = PredictionPipeline(load_models=False)
+        uncached.cache = None
+        print(f"    no cache: {timed_run(uncached, mbox_path, output_path):,.0f} emails/second")
+
+        cache_path = os.path.join(tmp_dir, "cache", "predictions.sqlite")
+        for label in ("cold disk", "warm disk"):
+            # A fresh pipeline per run, so the second run can only hit the on-disk tier
+            pipeline = PredictionPipeline(load_models=False)
+            pipeline.cache = PredictionCache(pipeline.config.prediction_cache_size, cache_path)
+            throughput = timed_run(pipeline, mbox_path, output_path)
+            print(f"{label:>12}: {throughput:,.0f} emails/second, {pipeline.cache.stats()}")
+            pipeline.cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prediction throughput with and without the content-hash cache")
+    parser.add_argument("--messages", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.messages)
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from src.config.config import Config, ModelConfig
+from src.components.featurizers import build_featurizer
+from src.components.model_search import ModelSearch, FoldFeatureCache
+
+# The grid before regularization paths: every C crossed with a blind max_iter axis, each fit cold
+COLD_GRID = {**ModelConfig.models['LogisticRegression'], 'max_iter': [100, 200, 300]}
+
+
+def search(name, param_grid, X, y, feature_cache=None, **kwargs):
+    model = LogisticRegression(random_state=42, max_iter=ModelConfig.path_max_iter)
+    start = time.perf_counter()
+    result = ModelSearch(strategy="grid", **kwargs).search("LogisticRegression", model, param_grid, X, y,
+                                                           n_jobs=1, feature_cache=feature_cache)
+    seconds = time.perf_counter() - start
+    print(f"{name:>30}: {seconds:6.2f}s, {result['n_fits']:3d} fits, best {result['best_params']} "
+          f"(CV F1 {result['best_score']:.4f})")
+    return result, seconds
+
+
+def run(per_fold) -> int:
+    config = Config()
+    data = pd.read_csv(config.training_data_path)
+    texts = data["Message"].astype(str).tolist()
+    y = (data["Category"] == "ham").astype(int).values
+    X_train, _, y_train, _ = train_test_split(texts, y, test_size=0.2, random_state=42, stratify=y)
+    feature_cache = FoldFeatureCache(X_train, y_train) if per_fold else None
+    X = None if per_fold else build_featurizer(ModelConfig.featurizer).fit_transform(X_train)
+    if feature_cache is not None:
+        # Featurize every fold up front so both searches are timed on model fits alone
+        for fold in range(feature_cache.n_folds):
+            for vectorizer_params in ModelSearch()._candidate_list(ModelConfig.vectorizer_params):
+                feature_cache.fold(fold, vectorizer_params)
+
+    grid = ModelConfig.models['LogisticRegression']
+    cold_max_iter, cold_max_iter_seconds = search("cold grid with max_iter axis", COLD_GRID, X, y_train, feature_cache,
+                                                  regularization_paths={})
+    cold, _ = search("cold grid", grid, X, y_train, feature_cache, regularization_paths={})
+    path, path_seconds = search("warm-started C path", grid, X, y_train, feature_cache)
+
+    same_c = path["best_params"]["C"] == cold["best_params"]["C"] == cold_max_iter["best_params"]["C"]
+    same_params = path["best_params"] == cold["best_params"]
+    score_diff = abs(path["best_score"] - cold["best_score"])
+    print(f"Speedup over the max_iter grid {cold_max_iter_seconds / path_seconds:.1f}x, same best C: {same_c}, "
+          f"same best parameters as the cold grid: {same_params}, best CV score difference {score_diff:.1e}")
+    return 0 if same_c and score_diff < 1e-3 else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-started regularization path against the cold LogisticRegression grid")
+    parser.add_argument("--per-fold", action="store_true", help="Refit TF-IDF inside every CV fold (cv_featurization='per_fold')")
+    args = parser.parse_args()
+    sys.exit(run(args.per_fold))
@@ -0,0 +1,57 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import write_mbox
+
+
+def child(mbox_path: str, output_path: str, mode: str, batch_size: int) -> None:
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    pipeline = PredictionPipeline(load_models=True)
+    if mode == "streaming":
+        pipeline.predict_mbox_to_csv(mbox_path, output_path, batch_size=batch_size)
+    else:
+        pipeline.predict_mbox_file(mbox_path, output_path, batch_size=batch_size)
+    # ru_maxrss is reported in KiB on Linux
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def peak_rss_mib(mbox_path: str, output_path: str, mode: str, batch_size: int) -> float:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_streaming_memory", "--child", mbox_path, output_path, mode, str(batch_size)],
+        check=True, capture_output=True, text=True
+    )
+    return int(result.stdout.strip().splitlines()[-1]) / 1024
+
+
+def run(sizes, batch_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        streaming_peaks = []
+        for n_messages in sizes:
+            mbox_path = write_mbox(os.path.join(tmp_dir, f"synthetic_{n_messages}.mbox"), n_messages, body_repeat=20)
+            output_path = os.path.join(tmp_dir, "predictions.csv")
+            mbox_mib = os.path.getsize(mbox_path) / 2**20
+            in_memory = peak_rss_mib(mbox_path, output_path, "in-memory", batch_size)
+            streaming = peak_rss_mib(mbox_path, output_path, "streaming", batch_size)
+            streaming_peaks.append(streaming)
+            print(f"{n_messages:>8} emails ({mbox_mib:7.1f} MiB): in-memory peak {in_memory:7.1f} MiB, streaming peak {streaming:7.1f} MiB")
+            os.unlink(mbox_path)
+
+    growth = streaming_peaks[-1] - streaming_peaks[0]
+    print(f"Streaming peak RSS growth across sizes: {growth:.1f} MiB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Measure peak RSS of in-memory vs streaming mbox prediction")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.sizes, args.batch_size)
@@ -0,0 +1,75 @@
+import argparse
+import http.client
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import HAM_PHRASES, SPAM_PHRASES
+
+
+def worker(host: str, port: int, path: str, payloads, deadline: float, latencies, errors, lock) -> None:
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    rng = random.Random(threading.get_ident())
+    local_latencies, local_errors = [], 0
+    while time.perf_counter() < deadline:
+        body = json.dumps(rng.choice(payloads))
+        start = time.perf_counter()
+        try:
+            connection.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        local_latencies.append(time.perf_counter() - start)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def run(host: str, port: int, endpoint: str, concurrency: int, duration: float, batch_size: int) -> None:
+    texts = [" ".join(random.choice(SPAM_PHRASES + HAM_PHRASES) for _ in range(3)) for _ in range(200)]
+    if endpoint == "batch":
+        path = "/predict/batch"
+        payloads = [{"emails": random.sample(texts, batch_size)} for _ in range(50)]
+    else:
+        path = "/predict"
+        payloads = [{"body": text} for text in texts]
+
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker, host, port, path, payloads, deadline, latencies, errors, lock)
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        raise SystemExit(f"No successful requests ({sum(errors)} errors)")
+    quantiles = statistics.quantiles(latencies, n=100)
+    emails = len(latencies) * (batch_size if endpoint == "batch" else 1)
+    print(f"{path} with {concurrency} concurrent clients for {elapsed:.1f}s")
+    print(f"  requests: {len(latencies)} ok, {sum(errors)} errors")
+    print(f"  throughput: {len(latencies) / elapsed:,.1f} requests/second ({emails / elapsed:,.0f} emails/second)")
+    print(f"  latency: p50 {quantiles[49] * 1000:.2f} ms, p99 {quantiles[98] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a running scoring service (python api.py)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--endpoint", choices=["single", "batch"], default="single")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    run(args.host, args.port, args.endpoint, args.concurrency, args.duration, args.batch_size)
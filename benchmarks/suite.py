@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from email import message_from_bytes
+
+import numpy as np
+
+from benchmarks.synthetic import make_message, write_labeled_csv, write_mbox
+from src.config.config import Config, ModelConfig
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def metric(value, unit, higher_is_better):
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# ----------------------------------------------------------------------------
+# Cold start: python -X importtime of the prediction entry point
+# ----------------------------------------------------------------------------
+def bench_import(repeat):
+    from benchmarks.bench_import_time import import_times
+
+    module = "src.pipeline.prediction_pipeline"
+    cumulative_us = min(import_times(module)[module][1] for _ in range(repeat))
+    return {"import_prediction_pipeline_ms": metric(cumulative_us / 1000, "ms", False)}
+
+
+# ----------------------------------------------------------------------------
+# Text processing: clean_text and extract_body throughput per MiB
+# ----------------------------------------------------------------------------
+def bench_text(n_messages, repeat):
+    from src.utils.email_utils import clean_text, extract_body
+
+    rng = random.Random(42)
+    raw_messages = [make_message(i, rng, html_ratio=0.5, body_repeat=20).as_bytes() for i in range(n_messages)]
+    messages = [message_from_bytes(raw) for raw in raw_messages]
+    bodies = [extract_body(message) for message in messages]
+
+    raw_mib = sum(len(raw) for raw in raw_messages) / 2**20
+    body_mib = sum(len(body.encode("utf-8")) for body in bodies) / 2**20
+    extract_seconds = best_of(lambda: [extract_body(message) for message in messages], repeat)
+    clean_seconds = best_of(lambda: [clean_text(body) for body in bodies], repeat)
+    return {
+        "extract_body_mib_per_s": metric(raw_mib / extract_seconds, "MiB/s", True),
+        "clean_text_mib_per_s": metric(body_mib / clean_seconds, "MiB/s", True),
+    }, bodies
+
+
+# ----------------------------------------------------------------------------
+# Model artifacts: load time, vectorizer transform and single-email latency
+# ----------------------------------------------------------------------------
+def bench_model(bodies, repeat):
+    from src.components.inference_bundle import InferenceBundle
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    config = Config()
+    results = {}
+
+    def load_pickles():
+        with open(config.feature_path, "rb") as f:
+            pickle.load(f)
+        with open(config.model_path, "rb") as f:
+            pickle.load(f)
+
+    # Loads take milliseconds, so take the best of more runs to keep the comparison stable
+    results["model_load_pickle_ms"] = metric(best_of(load_pickles, repeat * 10) * 1e3, "ms", False)
+    if InferenceBundle.is_bundle(config.served_bundle_path()):
+        results["model_load_bundle_ms"] = metric(best_of(lambda: InferenceBundle.load(config.served_bundle_path()), repeat * 10) * 1e3, "ms", False)
+
+    with open(config.feature_path, "rb") as f:
+        vectorizer = pickle.load(f)
+    docs = (bodies * (1000 // len(bodies) + 1))[:1000]
+    results["vectorizer_transform_ms_per_1k"] = metric(best_of(lambda: vectorizer.transform(docs), repeat) * 1e3, "ms", False)
+
+    pipeline = PredictionPipeline(load_models=True)
+    # Disable the prediction cache so repeated bodies are scored every time
+    pipeline.cache = None
+    latencies = []
+    for body in docs[:200] * repeat:
+        start = time.perf_counter()
+        pipeline.predict_single_email(body)
+        latencies.append(time.perf_counter() - start)
+    results["predict_single_email_p50_us"] = metric(np.percentile(latencies, 50) * 1e6, "us", False)
+    results["predict_single_email_p99_us"] = metric(np.percentile(latencies, 99) * 1e6, "us", False)
+    return results
+
+
+# ----------------------------------------------------------------------------
+# End to end: predict_mbox_file on generated mbox files of several sizes
+# ----------------------------------------------------------------------------
+def bench_mbox(sizes, tmp_dir):
+    from src.pipeline.prediction_pipeline import PredictionPipeline
+
+    pipeline = PredictionPipeline(load_models=True)
+    pipeline.cache = None
+    results = {}
+    for n_messages in sizes:
+        mbox_path = write_mbox(os.path.join(tmp_dir, f"suite_{n_messages}.mbox"), n_messages)
+        start = time.perf_counter()
+        pipeline.predict_mbox_file(mbox_path, os.path.join(tmp_dir, "predictions.csv"))
+        results[f"predict_mbox_{n_messages}_emails_per_s"] = metric(n_messages / (time.perf_counter() - start), "emails/s", True)
+        os.unlink(mbox_path)
+    return results
+
+
+# ----------------------------------------------------------------------------
+# Training: per-family train_models wall time on a synthetic labeled corpus
+# ----------------------------------------------------------------------------
+def bench_training(n_rows, max_fits, tmp_dir):
+    from src.components.data_ingestion import DataIngestion
+    from src.components.data_transformation import DataTransformation
+    from src.components.model_training import ModelTraining
+    from src.utils.state import TrainingState
+
+    ModelConfig.max_fits_per_model = max_fits
+    ingestion = DataIngestion()
+    ingestion.config.training_data_path = write_labeled_csv(os.path.join(tmp_dir, "labeled.csv"), n_rows)
+    ingestion.config.use_ingestion_cache = False
+    state = DataTransformation().transform_data(ingestion.load_data(TrainingState()))
+
+    trainer = ModelTraining()
+    trainer.config.OUTPUT_BASE_DIR = os.path.join(tmp_dir, "outputs")
+    state = trainer.train_models(state, cv_folds=3)
+    return {
+        f"train_{model_name}_seconds": metric(cv_data["search_time"], "s", False)
+        for model_name, cv_data in state.cv_results.items()
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline, current, change) for every metric that regressed by more than threshold"""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is None or base["value"] == 0:
+            continue
+        change = (current["value"] - base["value"]) / base["value"]
+        worse = -change if base["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, base["value"], current["value"], change))
+    return regressions
+
+
+def run(args) -> int:
+    repeat = 1 if args.quick else 3
+    results = {
+        "created": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "metrics": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results["metrics"].update(bench_import(repeat))
+        text_metrics, bodies = bench_text(200 if args.quick else 1000, repeat)
+        results["metrics"].update(text_metrics)
+        results["metrics"].update(bench_model(bodies, repeat))
+        results["metrics"].update(bench_mbox([500, 2000] if args.quick else [1000, 5000, 20000], tmp_dir))
+        if not args.skip_training:
+            results["metrics"].update(bench_training(1000 if args.quick else 5000, args.max_fits, tmp_dir))
+
+    for name, result in results["metrics"].items():
+        print(f"{name:>40}: {result['value']:12.2f} {result['unit']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != results["quick"]:
+        print("Baseline and current run use different --quick settings; skipping comparison")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, current, change in regressions:
+        print(f"REGRESSION {name}: {base:.2f} -> {current:.2f} ({change:+.1%})")
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the train and predict hot paths against a stored baseline")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown before failing")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and a single repeat")
+    parser.add_argument("--skip-training", action="store_true")
+    parser.add_argument("--max-fits", type=int, default=15, help="Fit budget per model family for the training benchmark")
+    sys.exit(run(parser.parse_args()))
@@ -0,0 +1,123 @@
+import csv
+import random
+from email.generator import BytesGenerator
+from email.message import EmailMessage
+
+SPAM_PHRASES = [
+    "WINNER!! You have been selected to receive a 1000 cash prize",
+    "Claim your free ringtone now, reply WIN to 80086",
+    "URGENT! Your mobile number has won a guaranteed award, call 09061701461",
+    "Limited offer: cheap loans approved instantly, click the link below",
+    "Congratulations, you won a free holiday. Text CLAIM to 87121",
+]
+
+HAM_PHRASES = [
+    "Are we still meeting for lunch tomorrow at noon?",
+    "I'll be home late tonight, don't wait up for dinner",
+    "Please find the quarterly report attached for your review",
+    "Thanks for the update, let's discuss it on Monday",
+    "Can you send me the notes from today's lecture?",
+]
+
+LABELS = ["Inbox", "Spam", "Category_Promotions", "Category_Social", "Category_Updates", "Sent"]
+
+
+# ----------------------------------------------------------------------------
+# Function to build one synthetic email message
+# ----------------------------------------------------------------------------
+def make_message(index, rng, html_ratio=0.3, body_repeat=3):
+    phrases = SPAM_PHRASES if rng.random() < 0.4 else HAM_PHRASES
+    text = " ".join(rng.choice(phrases) for _ in range(body_repeat))
+
+    msg = EmailMessage()
+    msg["From"] = f"sender{index % 97}@example.com"
+    msg["To"] = f"user{index % 13}@example.org"
+    msg["Subject"] = f"Message {index}: {text[:40]}"
+    msg["Date"] = "Thu, 25 Dec 2025 10:00:00 +0000"
+    msg["X-Gmail-Labels"] = rng.choice(LABELS)
+    msg.set_content(text)
+    if rng.random() < html_ratio:
+        msg.add_alternative(f"<html><body><p>{text}</p><a href='http://example.com/{index}'>link</a></body></html>", subtype="html")
+    msg.set_unixfrom(f"From sender{index % 97}@example.com Thu Dec 25 10:00:00 2025")
+    return msg
+
+
+# ----------------------------------------------------------------------------
+# Function to write a synthetic mbox file with a fixed number of messages
+# ----------------------------------------------------------------------------
+def write_mbox(path, n_messages, seed=42, **kwargs):
+    rng = random.Random(seed)
+    with open(path, "wb") as f:
+        generator = BytesGenerator(f, mangle_from_=True)
+        for index in range(n_messages):
+            generator.flatten(make_message(index, rng, **kwargs), unixfrom=True)
+            f.write(b"\n")
+    return path
+
+
+# ----------------------------------------------------------------------------
+# Function to write a synthetic labeled CSV with the dataset.csv columns
+# ----------------------------------------------------------------------------
+def write_labeled_csv(path, n_rows, seed=42, chunk_rows=100000):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Category", "Message"])
+        for start in range(0, n_rows, chunk_rows):
+            rows = []
+            for index in range(start, min(start + chunk_rows, n_rows)):
+                spam = rng.random() < 0.15
+                phrase = rng.choice(SPAM_PHRASES if spam else HAM_PHRASES)
+                rows.append(("spam" if spam else "ham", f"{phrase} #{index}"))
+            writer.writerows(rows)
+    return path
+
+
+# ----------------------------------------------------------------------------
+# Function to write a campaign-heavy mbox: template variants plus distinct mail
+# ----------------------------------------------------------------------------
+FIRST_NAMES = ["James", "Mary", "Wei", "Fatima", "Olga", "Carlos", "Aisha", "John", "Priya", "Lukas"]
+FILLER_WORDS = [
+    "project", "meeting", "budget", "review", "draft", "schedule", "client", "invoice", "travel", "lunch",
+    "report", "deadline", "team", "update", "agenda", "contract", "feedback", "launch", "design", "notes",
+]
+
+
+def make_campaign_template(rng):
+    sentences = rng.sample(SPAM_PHRASES, 3) + [rng.choice(HAM_PHRASES)]
+    rng.shuffle(sentences)
+    return "Dear {name}, " + " ".join(sentences) + " Visit http://promo.example.com/c?id={token} before {day}. Ref {token}."
+
+
+def write_campaign_mbox(path, n_messages, n_campaigns=20, campaign_share=0.8, seed=42):
+    """Mailbox where campaign_share of the messages are variants of n_campaigns templates.
+
+    Variants differ by recipient name, tracking token and day; the rest are
+    distinct messages. Subjects start with [c<campaign>] or [distinct] so a
+    benchmark can check which messages belong together.
+    """
+    rng = random.Random(seed)
+    templates = [make_campaign_template(rng) for _ in range(n_campaigns)]
+    days = ["Monday", "Tuesday", "Friday", "the weekend", "midnight"]
+    with open(path, "wb") as f:
+        generator = BytesGenerator(f, mangle_from_=True)
+        for index in range(n_messages):
+            if rng.random() < campaign_share:
+                campaign = rng.randrange(n_campaigns)
+                tag = f"c{campaign}"
+                text = templates[campaign].format(name=rng.choice(FIRST_NAMES), token=f"{rng.getrandbits(48):012x}",
+                                                  day=rng.choice(days))
+            else:
+                tag = "distinct"
+                text = " ".join(rng.choice(FILLER_WORDS) for _ in range(40)) + " " + rng.choice(HAM_PHRASES)
+            msg = EmailMessage()
+            msg["From"] = f"sender{index % 97}@example.com"
+            msg["To"] = f"user{index % 13}@example.org"
+            msg["Subject"] = f"[{tag}] {text[:30]}"
+            msg["Date"] = "Thu, 25 Dec 2025 10:00:00 +0000"
+            msg["X-Gmail-Labels"] = "Spam" if tag != "distinct" else "Inbox"
+            msg.set_content(text)
+            msg.set_unixfrom(f"From sender{index % 97}@example.com Thu Dec 25 10:00:00 2025")
+            generator.flatten(msg, unixfrom=True)
+            f.write(b"\n")
+    return path
@@ -1,21 +1,45 @@
+import time
+
+import numpy as np
 import pandas as pd
 from src.utils.logger import get_logger
 from src.config.config import Config
 from src.utils.state import TrainingState
+from src.utils.dataset_cache import DatasetCache, file_fingerprint, iter_labeled_chunks, encode_chunk
 
 logger = get_logger(__name__)
 
 class DataIngestion:
     def __init__(self):
         self.config = Config()
-    
+
     def load_data(self, state: TrainingState) -> TrainingState:
+        """Load label-encoded, cleaned training data from the columnar cache, streaming the source on a miss"""
         try:
             logger.info("Loading data")
-            state.training_data = pd.read_csv(self.config.training_data_path)
-            logger.info("Data loaded successfully")
+            start_time = time.time()
+            path = self.config.training_data_path
+            chunks = (encode_chunk(chunk) for chunk in iter_labeled_chunks(path, self.config.ingestion_chunk_rows))
+
+            if self.config.use_ingestion_cache:
+                cache = DatasetCache(self.config.ingestion_cache_dir)
+                fingerprint = file_fingerprint(path)
+                if cache.has(fingerprint):
+                    logger.info(f"Ingestion cache hit for {path} ({fingerprint})")
+                else:
+                    rows = cache.write(fingerprint, chunks, source_path=path)
+                    logger.info(f"Cached {rows} rows from {path} as {fingerprint}")
+                labels, texts = cache.read(fingerprint, self.config.ingestion_chunk_rows)
+            else:
+                label_chunks, texts = [], []
+                for chunk_labels, chunk_texts in chunks:
+                    label_chunks.append(chunk_labels)
+                    texts.extend(chunk_texts)
+                labels = np.concatenate(label_chunks) if label_chunks else np.empty(0, dtype=np.int8)
+
+            state.training_data = pd.DataFrame({'Category': labels, 'Message': texts})
+            logger.info(f"Data loaded successfully in {time.time() - start_time:.2f} seconds")
             return state
         except Exception as e:
             logger.error(f"Failed to load data: {str(e)}")
             raise e
-    
\ No newline at end of file
@@ -1,8 +1,9 @@
+import pandas as pd
 from src.utils.logger import get_logger
 from src.config.config import Config
 from src.utils.state import TrainingState
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from src.components.featurizers import build_featurizer
 
 logger = get_logger(__name__)
 
@@ -10,50 +11,62 @@ class DataTransformation:
     def __init__(self):
         self.config = Config()
     
+    def encode_labels(self, data):
+        # Encode labels: spam -> 0, ham -> 1
+        data.loc[data['Category'] == 'spam', 'Category'] = 0
+        data.loc[data['Category'] == 'ham', 'Category'] = 1
+        
+        # Ensure Category column is integer type
+        data['Category'] = data['Category'].astype(int)
+        return data
+    
+    def split_data(self, state: TrainingState) -> TrainingState:
+        """Encode labels and make the 70:30 train/test split, without featurizing"""
+        data = state.training_data
+        # DataIngestion already label-encodes; raw frames (e.g. new labeled batches) are encoded here
+        if not pd.api.types.is_integer_dtype(data['Category']):
+            data = self.encode_labels(data.copy())
+        
+        logger.info(f"Label encoding completed. Data shape: {data.shape}")
+        logger.info(f"Unique labels: {data['Category'].unique()}")
+        logger.info(f"Label dtype: {data['Category'].dtype}")
+        
+        # Split features and target
+        X = data['Message']
+        y = data['Category']
+        
+        # Convert y to numpy array of integers to ensure proper type
+        import numpy as np
+        y = np.array(y, dtype=int)
+        
+        # Split into train and test sets (70:30 ratio)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.3, random_state=42, stratify=y
+        )
+        
+        logger.info(f"Train/test split completed. Train size: {len(X_train)}, Test size: {len(X_test)}")
+        
+        state.transformed_data = data
+        state.X_train = X_train
+        state.X_test = X_test
+        state.y_train = y_train
+        state.y_test = y_test
+        return state
+    
     def transform_data(self, state: TrainingState) -> TrainingState:
         logger.info("Data transformation started")
         try:
-            data = state.training_data.copy()
-            
-            # Encode labels: spam -> 0, ham -> 1
-            data.loc[data['Category'] == 'spam', 'Category'] = 0
-            data.loc[data['Category'] == 'ham', 'Category'] = 1
-            
-            # Ensure Category column is integer type
-            data['Category'] = data['Category'].astype(int)
-            
-            logger.info(f"Label encoding completed. Data shape: {data.shape}")
-            logger.info(f"Unique labels: {data['Category'].unique()}")
-            logger.info(f"Label dtype: {data['Category'].dtype}")
-            
-            # Split features and target
-            X = data['Message']
-            y = data['Category']
-            
-            # Convert y to numpy array of integers to ensure proper type
-            import numpy as np
-            y = np.array(y, dtype=int)
-            
-            # Split into train and test sets (70:30 ratio)
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.3, random_state=42, stratify=y
-            )
-            
-            logger.info(f"Train/test split completed. Train size: {len(X_train)}, Test size: {len(X_test)}")
+            state = self.split_data(state)
+            X_train, X_test = state.X_train, state.X_test
             
-            # Apply TF-IDF vectorization
-            tfidf_vectorizer = TfidfVectorizer(lowercase=True, stop_words='english')
+            # Apply TF-IDF vectorization with the configured backend
+            tfidf_vectorizer = build_featurizer()
             X_train_tfidf = tfidf_vectorizer.fit_transform(X_train)
             X_test_tfidf = tfidf_vectorizer.transform(X_test)
             
-            logger.info(f"TF-IDF transformation completed. Feature shape: {X_train_tfidf.shape}")
+            logger.info(f"TF-IDF transformation completed ({type(tfidf_vectorizer).__name__}). Feature shape: {X_train_tfidf.shape}")
             
             # Save to state
-            state.transformed_data = data
-            state.X_train = X_train
-            state.X_test = X_test
-            state.y_train = y_train
-            state.y_test = y_test
             state.X_train_tfidf = X_train_tfidf
             state.X_test_tfidf = X_test_tfidf
             state.tfidf_vectorizer = tfidf_vectorizer
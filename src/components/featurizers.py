@@ -0,0 +1,76 @@
+import numpy as np
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+
+from src.config.config import ModelConfig
+
+FEATURIZER_BACKENDS = ("tfidf", "hashing")
+
+
+class HashingTfidfVectorizer(TransformerMixin, BaseEstimator):
+    """TF-IDF over a fixed-size hashed feature space.
+
+    Tokens are mapped to columns with the same murmurhash HashingVectorizer
+    uses, so there is no vocabulary dict to grow, pickle or look up; the only
+    fitted state is an idf_ array of n_features floats.
+    """
+
+    def __init__(self, n_features=2 ** 18, lowercase=True, stop_words=None, token_pattern=r"(?u)\b\w\w+\b",
+                 ngram_range=(1, 1), binary=False, norm="l2", use_idf=True, smooth_idf=True, sublinear_tf=False,
+                 dtype=np.float64):
+        self.n_features = n_features
+        self.lowercase = lowercase
+        self.stop_words = stop_words
+        self.token_pattern = token_pattern
+        self.ngram_range = ngram_range
+        self.binary = binary
+        self.norm = norm
+        self.use_idf = use_idf
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+        self.dtype = dtype
+
+    def _hashing_vectorizer(self):
+        return HashingVectorizer(
+            n_features=self.n_features,
+            lowercase=self.lowercase,
+            stop_words=self.stop_words,
+            token_pattern=self.token_pattern,
+            ngram_range=self.ngram_range,
+            binary=self.binary,
+            alternate_sign=False,
+            norm=None,
+            dtype=self.dtype
+        )
+
+    def fit(self, raw_documents, y=None):
+        self.fit_transform(raw_documents)
+        return self
+
+    def fit_transform(self, raw_documents, y=None):
+        counts = self._hashing_vectorizer().transform(raw_documents)
+        self._tfidf = TfidfTransformer(norm=self.norm, use_idf=self.use_idf, smooth_idf=self.smooth_idf,
+                                       sublinear_tf=self.sublinear_tf)
+        return self._tfidf.fit_transform(counts)
+
+    def transform(self, raw_documents):
+        return self._tfidf.transform(self._hashing_vectorizer().transform(raw_documents))
+
+    @property
+    def idf_(self):
+        return self._tfidf.idf_
+
+    def get_stop_words(self):
+        return self._hashing_vectorizer().get_stop_words()
+
+
+def build_featurizer(backend=None, **params):
+    """Unfitted featurizer for a backend in FEATURIZER_BACKENDS (default ModelConfig.featurizer)"""
+    backend = backend or ModelConfig.featurizer
+    params = {'lowercase': True, 'stop_words': 'english', **params}
+    if backend == "tfidf":
+        return TfidfVectorizer(**params)
+    if backend == "hashing":
+        return HashingTfidfVectorizer(**{'n_features': ModelConfig.hashing_n_features, **params})
+    raise ValueError(f"Unknown featurizer backend: {backend}")
@@ -0,0 +1,202 @@
+import os
+import copy
+import json
+import time
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from sklearn.linear_model import SGDClassifier
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
+from src.utils.logger import get_logger
+from src.utils.state import TrainingState
+from src.utils.email_utils import clean_text
+from src.components.data_transformation import DataTransformation
+from src.config.config import Config, ModelConfig
+
+logger = get_logger(__name__)
+
+MODEL_NAME = "IncrementalSGD"
+MANIFEST_FILE = "incremental.json"
+CLASSES = np.array([0, 1])
+
+
+class IncrementalTraining:
+    """Fold new labeled mail into a hashed-feature linear model with partial_fit.
+
+    The featurizer is a stateless HashingVectorizer, so new batches never
+    change the feature space and nothing is refitted. Every update is written
+    as a new versioned artifact under outputs/<timestamp>/models, and only
+    promoted (recorded in the registry file) when its validation F1 is within
+    ModelConfig.incremental_max_f1_drop of the best F1 ever promoted, so
+    small drops cannot add up over a series of updates.
+    """
+
+    def __init__(self):
+        self.config = Config()
+
+    def build_vectorizer(self):
+        return HashingVectorizer(
+            lowercase=True,
+            stop_words='english',
+            n_features=ModelConfig.incremental_n_features,
+            alternate_sign=False,
+            norm='l2'
+        )
+
+    def load_latest(self):
+        """Return (vectorizer, model, manifest) for the promoted artifact, or None if there is none"""
+        if not os.path.isfile(self.config.incremental_registry_path):
+            return None
+        with open(self.config.incremental_registry_path, encoding="utf-8") as f:
+            models_dir = json.load(f)["models_dir"]
+
+        with open(os.path.join(models_dir, "vectorizer.pkl"), "rb") as f:
+            vectorizer = pickle.load(f)
+        with open(os.path.join(models_dir, f"{MODEL_NAME}_model.pkl"), "rb") as f:
+            model = pickle.load(f)
+        with open(os.path.join(models_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        logger.info(f"Loaded incremental model version {manifest['version']} from {models_dir}")
+        return vectorizer, model, manifest
+
+    def load_batch(self, data_path):
+        """Read a labeled CSV with the dataset.csv columns (Category, Message), cleaned as in training and serving"""
+        data = DataTransformation().encode_labels(pd.read_csv(data_path))
+        return [clean_text(text) for text in data['Message'].fillna("").astype(str)], np.array(data['Category'], dtype=int)
+
+    def fit_batch(self, model, X, y, epochs, seed):
+        random_state = np.random.RandomState(seed)
+        for _ in range(epochs):
+            order = random_state.permutation(X.shape[0])
+            model.partial_fit(X[order], y[order], classes=CLASSES)
+        return model
+
+    def evaluate(self, model, X, y):
+        y_pred = model.predict(X)
+        return {
+            'accuracy': accuracy_score(y, y_pred),
+            'precision': precision_score(y, y_pred, average='weighted', zero_division=0),
+            'recall': recall_score(y, y_pred, average='weighted', zero_division=0),
+            'f1_score': f1_score(y, y_pred, average='weighted', zero_division=0)
+        }
+
+    def bootstrap(self, state: TrainingState):
+        """Train version 1 from the training split and promote it"""
+        logger.info("Bootstrapping incremental model from the training split")
+        try:
+            vectorizer = self.build_vectorizer()
+            model = SGDClassifier(random_state=42, **ModelConfig.incremental_model)
+            X_train = vectorizer.transform(state.X_train)
+
+            start_time = time.time()
+            self.fit_batch(model, X_train, state.y_train, ModelConfig.incremental_epochs, seed=42)
+            fit_time = time.time() - start_time
+
+            metrics = self.evaluate(model, vectorizer.transform(state.X_test), state.y_test)
+            manifest = {
+                'version': 1,
+                'parent': None,
+                'n_samples_seen': len(state.y_train),
+                'batch_samples': len(state.y_train),
+                'fit_seconds': fit_time,
+                'validation': metrics,
+                'baseline_validation': None,
+                'best_promoted_f1': metrics['f1_score'],
+                'promoted': True
+            }
+            return self.save_artifact(vectorizer, model, manifest)
+        except Exception as e:
+            logger.error(f"Failed to bootstrap incremental model: {str(e)}")
+            raise e
+
+    def update(self, state: TrainingState, data_path: str):
+        """Fold a new labeled batch into the promoted model; returns the new artifact directory"""
+        logger.info(f"Incremental update from {data_path}")
+        try:
+            latest = self.load_latest()
+            if latest is None:
+                self.bootstrap(state)
+                latest = self.load_latest()
+            vectorizer, current_model, current_manifest = latest
+
+            X_new, y_new = self.load_batch(data_path)
+            X_new = vectorizer.transform(X_new)
+            X_val = vectorizer.transform(state.X_test)
+
+            start_time = time.time()
+            candidate = self.fit_batch(copy.deepcopy(current_model), X_new, y_new, ModelConfig.incremental_epochs,
+                                       seed=42 + current_manifest['version'])
+            fit_time = time.time() - start_time
+            logger.info(f"Folded {len(y_new)} labeled emails into the model in {fit_time:.2f} seconds")
+
+            # Validation gate: compare on the same held-out split against the best F1 ever promoted, not
+            # just the current version, so a series of small drops cannot add up to a large regression
+            baseline = self.evaluate(current_model, X_val, state.y_test)
+            metrics = self.evaluate(candidate, X_val, state.y_test)
+            best_f1 = max(current_manifest.get('best_promoted_f1', current_manifest['validation']['f1_score']),
+                          baseline['f1_score'])
+            promoted = metrics['f1_score'] >= best_f1 - ModelConfig.incremental_max_f1_drop
+            if promoted:
+                logger.info(f"Validation F1 {baseline['f1_score']:.4f} -> {metrics['f1_score']:.4f} "
+                            f"(best promoted {best_f1:.4f}), promoting")
+            else:
+                logger.warning(f"Validation F1 {metrics['f1_score']:.4f} is more than {ModelConfig.incremental_max_f1_drop} "
+                               f"below the best promoted {best_f1:.4f}, keeping version {current_manifest['version']}")
+
+            manifest = {
+                'version': current_manifest['version'] + 1,
+                'parent': current_manifest['models_dir'],
+                'n_samples_seen': current_manifest['n_samples_seen'] + len(y_new),
+                'batch_samples': len(y_new),
+                'batch_path': data_path,
+                'fit_seconds': fit_time,
+                'validation': metrics,
+                'baseline_validation': baseline,
+                'best_promoted_f1': max(best_f1, metrics['f1_score']) if promoted else best_f1,
+                'promoted': bool(promoted)
+            }
+            return self.save_artifact(vectorizer, candidate, manifest)
+        except Exception as e:
+            logger.error(f"Failed to update incremental model: {str(e)}")
+            raise e
+
+    def save_artifact(self, vectorizer, model, manifest):
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        output_dir = os.path.join(self.config.OUTPUT_BASE_DIR, timestamp)
+        if os.path.exists(output_dir):
+            # Bootstrap and first update can land in the same second
+            output_dir = f"{output_dir}_v{manifest['version']}"
+        models_dir = os.path.join(output_dir, "models")
+        observations_dir = os.path.join(output_dir, "observations")
+        os.makedirs(models_dir, exist_ok=True)
+        os.makedirs(observations_dir, exist_ok=True)
+
+        with open(os.path.join(models_dir, "vectorizer.pkl"), "wb") as f:
+            pickle.dump(vectorizer, f)
+        with open(os.path.join(models_dir, f"{MODEL_NAME}_model.pkl"), "wb") as f:
+            pickle.dump(model, f)
+
+        manifest = {'timestamp': timestamp, 'models_dir': models_dir, **manifest}
+        with open(os.path.join(models_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        row = {key: value for key, value in manifest.items() if not isinstance(value, dict)}
+        for prefix in ('validation', 'baseline_validation'):
+            for metric, value in (manifest[prefix] or {}).items():
+                row[f"{prefix}_{metric}"] = value
+        pd.DataFrame([row]).to_csv(os.path.join(observations_dir, "incremental_metrics.csv"), index=False)
+
+        if manifest['promoted']:
+            os.makedirs(os.path.dirname(self.config.incremental_registry_path) or ".", exist_ok=True)
+            with open(self.config.incremental_registry_path, "w", encoding="utf-8") as f:
+                json.dump({'version': manifest['version'], 'models_dir': models_dir,
+                           'best_promoted_f1': manifest['best_promoted_f1']}, f, indent=2)
+            logger.info(f"Promoted incremental model version {manifest['version']}: {models_dir}")
+        else:
+            logger.info(f"Saved rejected incremental model version {manifest['version']}: {models_dir}")
+        return models_dir
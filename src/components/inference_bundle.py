@@ -0,0 +1,464 @@
+import os
+import re
+import json
+import time
+import pickle
+from datetime import datetime
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+# Linear models whose probability estimate is the sigmoid of the margin
+LOGISTIC_MODELS = ("LogisticRegression", "LogisticRegressionCV")
+
+
+class BundleVectorizer:
+    """TF-IDF transform backed by memory-mapped arrays instead of a pickled TfidfVectorizer.
+
+    The vocabulary is a sorted string table (the same order sklearn uses for
+    feature indices); token lookup goes through a term-to-column dict built
+    from it on first use, so tokens are never copied into a fixed-width array.
+    """
+
+    def __init__(self, params, vocabulary, idf, stop_words):
+        self.params = params
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.stop_words = frozenset(stop_words)
+        self.token_pattern = re.compile(params["token_pattern"])
+        self.ngram_range = tuple(params["ngram_range"])
+        self.dtype = np.dtype(params["dtype"])
+        self._term_index = None
+
+    @property
+    def n_features(self):
+        return len(self.vocabulary)
+
+    def analyze(self, doc):
+        if self.params["lowercase"]:
+            doc = doc.lower()
+        tokens = [token for token in self.token_pattern.findall(doc) if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+
+        ngrams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), max_n + 1):
+            ngrams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return ngrams
+
+    def lookup(self, tokens):
+        """Map tokens to feature indices, returning -1 for out-of-vocabulary tokens"""
+        if self._term_index is None:
+            self._term_index = {term: i for i, term in enumerate(self.vocabulary.tolist())}
+        term_index = self._term_index
+        return np.fromiter((term_index.get(token, -1) for token in tokens), dtype=np.int64, count=len(tokens))
+
+    def transform(self, raw_documents):
+        from scipy import sparse
+
+        indptr, tokens = [0], []
+        for doc in raw_documents:
+            doc_tokens = self.analyze(doc)
+            tokens.extend(doc_tokens)
+            indptr.append(len(tokens))
+
+        indices = self.lookup(tokens)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        known = indices >= 0
+        # Drop out-of-vocabulary tokens and re-base the row pointers accordingly
+        indptr = np.concatenate([[0], np.cumsum(known)])[indptr]
+        data = np.ones(int(known.sum()), dtype=self.dtype)
+        X = sparse.csr_matrix((data, indices[known], indptr), shape=(len(indptr) - 1, self.n_features))
+        X.sum_duplicates()
+        X.sort_indices()
+
+        if self.params["binary"]:
+            X.data.fill(1)
+        if self.params["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf is not None:
+            X.data *= np.take(self.idf, X.indices)
+        if self.params["norm"]:
+            X = _normalize_rows(X, self.params["norm"])
+        return X
+
+
+class HashingBundleVectorizer(BundleVectorizer):
+    """BundleVectorizer whose token lookup is a murmurhash into a fixed number of columns, as in HashingVectorizer"""
+
+    def __init__(self, params, idf, stop_words):
+        # Imported here rather than at module load, so bundles with a vocabulary never import sklearn
+        from sklearn.utils import murmurhash3_32
+
+        super().__init__(params, None, idf, stop_words)
+        self._n_features = params["n_features"]
+        self._murmurhash = murmurhash3_32
+
+    @property
+    def n_features(self):
+        return self._n_features
+
+    def lookup(self, tokens):
+        # Hash each distinct token once; codes maps every token to its distinct token's position
+        distinct = {}
+        codes = np.fromiter((distinct.setdefault(token, len(distinct)) for token in tokens), dtype=np.int64, count=len(tokens))
+        murmurhash = self._murmurhash
+        hashes = np.fromiter((murmurhash(token) for token in distinct), dtype=np.int64, count=len(distinct))
+
+        n_features = self._n_features
+        # Same index rule as sklearn's _hashing_fast, including abs() overflow at INT32_MIN
+        indices = np.where(hashes == -2147483648, (2147483647 - (n_features - 1)) % n_features, np.abs(hashes) % n_features)
+        return indices[codes]
+
+
+class LinearBundleModel:
+    """Binary linear classifier evaluated from exported coefficient arrays.
+
+    predict_proba exists only when the model was trained with logistic loss,
+    mirroring sklearn estimators that hide it otherwise.
+    """
+
+    def __init__(self, coef, intercept, classes, probabilistic=False):
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+        self.probabilistic = probabilistic
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.coef).ravel() + self.intercept[0]
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+    @property
+    def predict_proba(self):
+        if not self.probabilistic:
+            raise AttributeError("predict_proba is only available for models trained with logistic loss")
+        return lambda X: _sigmoid_proba(self.decision_function(X))
+
+
+class FusedLinearScorer:
+    """Score raw documents against a linear model without building a CSR matrix.
+
+    Tokenization, vocabulary lookup, TF-IDF weighting, row normalization and
+    the dot product with the coefficient vector happen in one pass over the
+    batch's tokens, giving the same margins as vectorizer.transform followed
+    by model.decision_function.
+    """
+
+    def __init__(self, vectorizer, model):
+        self.vectorizer = vectorizer
+        self.coef = model.coef
+        self.intercept = float(model.intercept[0])
+        self.classes_ = model.classes_
+        self.probabilistic = _has_logistic_loss(model)
+
+    def decision_function(self, raw_documents):
+        vectorizer = self.vectorizer
+        raw_documents = list(raw_documents)
+        n_docs = len(raw_documents)
+        doc_ids, tokens = [], []
+        for doc_id, doc in enumerate(raw_documents):
+            doc_tokens = vectorizer.analyze(doc)
+            tokens.extend(doc_tokens)
+            doc_ids.extend([doc_id] * len(doc_tokens))
+
+        indices = vectorizer.lookup(tokens)
+        known = indices >= 0
+        # One entry per (document, feature) pair with its term count
+        keys, counts = np.unique(np.asarray(doc_ids, dtype=np.int64)[known] * vectorizer.n_features + indices[known],
+                                 return_counts=True)
+        rows, features = np.divmod(keys, vectorizer.n_features)
+
+        weights = counts.astype(vectorizer.dtype)
+        if vectorizer.params["binary"]:
+            weights.fill(1)
+        if vectorizer.params["sublinear_tf"]:
+            weights = np.log(weights) + 1
+        if vectorizer.idf is not None:
+            weights *= np.take(vectorizer.idf, features)
+
+        norm = vectorizer.params["norm"]
+        if norm:
+            magnitudes = weights ** 2 if norm == "l2" else np.abs(weights)
+            row_norms = np.bincount(rows, weights=magnitudes, minlength=n_docs)
+            if norm == "l2":
+                row_norms = np.sqrt(row_norms)
+            row_norms[row_norms == 0] = 1.0
+            weights /= row_norms[rows]
+
+        return np.bincount(rows, weights=weights * np.take(self.coef, features), minlength=n_docs) + self.intercept
+
+    def predict(self, raw_documents):
+        return self.classes_[(self.decision_function(raw_documents) > 0).astype(int)]
+
+    @property
+    def predict_proba(self):
+        if not self.probabilistic:
+            raise AttributeError("predict_proba is only available for models trained with logistic loss")
+        return lambda raw_documents: _sigmoid_proba(self.decision_function(raw_documents))
+
+
+class CascadeClassifier:
+    """Two-stage classifier: a linear screen scores every email and only margins inside
+    (lower, upper) are passed to the full model.
+
+    The band is tuned at training time so the cascade agrees with the full
+    model on a target fraction of emails. Running totals of emails and
+    seconds per path back PredictionPipeline.cascade_report().
+    """
+
+    def __init__(self, vectorizer, screen, model, lower, upper, fused=True):
+        self.vectorizer = vectorizer
+        self.screen = screen
+        self.model = model
+        self.lower = lower
+        self.upper = upper
+        self.screen_scorer = FusedLinearScorer(vectorizer, screen) if fused else None
+        self.reset()
+
+    def screen_margins(self, raw_documents):
+        if self.screen_scorer is not None:
+            return self.screen_scorer.decision_function(raw_documents)
+        return self.screen.decision_function(self.vectorizer.transform(raw_documents))
+
+    def predict(self, raw_documents, return_confidence=False):
+        """Return (predictions, escalated) where escalated marks emails scored by the full model.
+
+        With return_confidence, also return the probability of each predicted
+        class, NaN where the model that decided it has no probability estimate.
+        """
+        raw_documents = list(raw_documents)
+        start_time = time.perf_counter()
+        margins = self.screen_margins(raw_documents)
+        predictions = self.screen.classes_[(margins > 0).astype(int)]
+        escalated = (margins > self.lower) & (margins < self.upper)
+        confidences = np.full(len(raw_documents), np.nan)
+        if return_confidence and _has_logistic_loss(self.screen):
+            confidences = _sigmoid_proba(margins).max(axis=1)
+        self.screen_seconds += time.perf_counter() - start_time
+
+        if escalated.any():
+            start_time = time.perf_counter()
+            uncertain = [raw_documents[i] for i in np.flatnonzero(escalated)]
+            features = self.vectorizer.transform(uncertain)
+            predictions[escalated] = self.model.predict(features)
+            confidences[escalated] = np.nan
+            if return_confidence and hasattr(self.model, "predict_proba"):
+                confidences[escalated] = self.model.predict_proba(features).max(axis=1)
+            self.full_seconds += time.perf_counter() - start_time
+        self.screened += len(raw_documents)
+        self.escalated += int(escalated.sum())
+        if return_confidence:
+            return predictions, escalated, confidences
+        return predictions, escalated
+
+    def totals(self):
+        return self.screened, self.escalated, self.screen_seconds, self.full_seconds
+
+    def reset(self):
+        self.screened, self.escalated, self.screen_seconds, self.full_seconds = 0, 0, 0.0, 0.0
+
+    def merge(self, totals):
+        """Add counts reported by a worker process's copy of the cascade"""
+        screened, escalated, screen_seconds, full_seconds = totals
+        self.screened += screened
+        self.escalated += escalated
+        self.screen_seconds += screen_seconds
+        self.full_seconds += full_seconds
+
+
+class InferenceBundle:
+    """Directory of .npy arrays plus a manifest that replaces vectorizer.pkl and *_model.pkl at inference time"""
+
+    def __init__(self, bundle_dir, manifest, feature_transformer, model, cascade=None):
+        self.bundle_dir = bundle_dir
+        self.manifest = manifest
+        self.feature_transformer = feature_transformer
+        self.model = model
+        self.scorer = FusedLinearScorer(feature_transformer, model) if manifest.get("fused_scorer") else None
+        self.cascade = cascade
+
+    @staticmethod
+    def is_bundle(bundle_dir):
+        return bool(bundle_dir) and os.path.isfile(os.path.join(bundle_dir, MANIFEST_FILE))
+
+    @classmethod
+    def export(cls, vectorizer, model, bundle_dir, model_name=None, fused_scorer=True, cascade=None):
+        """Write the bundle; cascade optionally adds a linear screen ({"screen", "lower", "upper", ...} from training)"""
+        from scipy import sparse
+        from src.components.featurizers import HashingTfidfVectorizer
+        from src.components.knn_index import InvertedIndexKNN
+
+        featurizer = "hashing" if isinstance(vectorizer, HashingTfidfVectorizer) else "tfidf"
+        params = _exportable_vectorizer_params(vectorizer)
+        os.makedirs(bundle_dir, exist_ok=True)
+
+        if featurizer == "hashing":
+            # Hashed features need no vocabulary, only the column count
+            params["n_features"] = vectorizer.n_features
+            n_features = vectorizer.n_features
+        else:
+            vocabulary = np.array(vectorizer.get_feature_names_out(), dtype=str)
+            np.save(os.path.join(bundle_dir, "vocabulary.npy"), vocabulary)
+            n_features = len(vocabulary)
+        if params["use_idf"]:
+            np.save(os.path.join(bundle_dir, "idf.npy"), np.asarray(vectorizer.idf_, dtype=np.float64))
+
+        if _is_linear_binary(model):
+            model_format = "linear"
+            coef = model.coef_.toarray() if sparse.issparse(model.coef_) else np.asarray(model.coef_)
+            np.save(os.path.join(bundle_dir, "coef.npy"), np.ascontiguousarray(coef.ravel(), dtype=np.float64))
+            np.save(os.path.join(bundle_dir, "intercept.npy"), np.asarray(model.intercept_, dtype=np.float64))
+            np.save(os.path.join(bundle_dir, "classes.npy"), np.asarray(model.classes_))
+        elif isinstance(model, InvertedIndexKNN):
+            # Postings and rows as arrays, so workers memory-map one copy of the training matrix
+            model_format = "knn_index"
+            for name, values in model.arrays().items():
+                np.save(os.path.join(bundle_dir, f"knn_{name}.npy"), values)
+            np.save(os.path.join(bundle_dir, "classes.npy"), np.asarray(model.classes_))
+        else:
+            model_format = "pickle"
+            with open(os.path.join(bundle_dir, "model.pkl"), "wb") as f:
+                pickle.dump(model, f)
+
+        manifest = {
+            "format_version": BUNDLE_FORMAT_VERSION,
+            "created": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+            "model_name": model_name or type(model).__name__,
+            "model_class": type(model).__name__,
+            "model_format": model_format,
+            "featurizer": featurizer,
+            "n_features": n_features,
+            "fused_scorer": fused_scorer and model_format == "linear" and params["norm"] in ("l1", "l2", None),
+            "probabilistic": model_format == "linear" and _has_logistic_loss(model),
+            "vectorizer_params": params,
+            "stop_words": sorted(vectorizer.get_stop_words() or []),
+        }
+        if model_format == "knn_index":
+            manifest["knn_params"] = model.get_params()
+        if cascade is not None:
+            screen = cascade["screen"]
+            if not _is_linear_binary(screen):
+                raise ValueError(f"Cascade screen must be a binary linear model, got {type(screen).__name__}")
+            coef = screen.coef_.toarray() if sparse.issparse(screen.coef_) else np.asarray(screen.coef_)
+            np.save(os.path.join(bundle_dir, "screen_coef.npy"), np.ascontiguousarray(coef.ravel(), dtype=np.float64))
+            np.save(os.path.join(bundle_dir, "screen_intercept.npy"), np.asarray(screen.intercept_, dtype=np.float64))
+            np.save(os.path.join(bundle_dir, "screen_classes.npy"), np.asarray(screen.classes_))
+            manifest["cascade"] = {key: value for key, value in cascade.items() if key != "screen"}
+            manifest["cascade"]["screen_class"] = type(screen).__name__
+            manifest["cascade"]["screen_probabilistic"] = _has_logistic_loss(screen)
+        with open(os.path.join(bundle_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Exported {model_format} inference bundle to {bundle_dir}")
+        return bundle_dir
+
+    @classmethod
+    def load(cls, bundle_dir, mmap_mode="r"):
+        start_time = time.time()
+        with open(os.path.join(bundle_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["format_version"] != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported bundle format version: {manifest['format_version']}")
+
+        def array(name):
+            return np.load(os.path.join(bundle_dir, name), mmap_mode=mmap_mode)
+
+        params = manifest["vectorizer_params"]
+        idf = array("idf.npy") if params["use_idf"] else None
+        if manifest.get("featurizer", "tfidf") == "hashing":
+            feature_transformer = HashingBundleVectorizer(params, idf, manifest["stop_words"])
+        else:
+            feature_transformer = BundleVectorizer(params, array("vocabulary.npy"), idf, manifest["stop_words"])
+
+        if manifest["model_format"] == "linear":
+            # Bundles written before the flag existed fall back to the model class
+            probabilistic = manifest.get("probabilistic", manifest["model_class"] in LOGISTIC_MODELS)
+            model = LinearBundleModel(array("coef.npy"), array("intercept.npy"), array("classes.npy"), probabilistic)
+        elif manifest["model_format"] == "knn_index":
+            from src.components.knn_index import KNN_ARRAYS, InvertedIndexKNN
+
+            model = InvertedIndexKNN.from_arrays(manifest["knn_params"], array("classes.npy"),
+                                                 {name: array(f"knn_{name}.npy") for name in KNN_ARRAYS}, manifest["n_features"])
+        else:
+            with open(os.path.join(bundle_dir, "model.pkl"), "rb") as f:
+                model = pickle.load(f)
+
+        cascade = None
+        if manifest.get("cascade"):
+            screen_probabilistic = manifest["cascade"].get("screen_probabilistic",
+                                                           manifest["cascade"].get("screen_class") in LOGISTIC_MODELS)
+            screen = LinearBundleModel(array("screen_coef.npy"), array("screen_intercept.npy"), array("screen_classes.npy"),
+                                       screen_probabilistic)
+            cascade = CascadeClassifier(feature_transformer, screen, model, manifest["cascade"]["lower"],
+                                        manifest["cascade"]["upper"], fused=params["norm"] in ("l1", "l2", None))
+
+        logger.info(f"Loaded inference bundle from {bundle_dir} in {time.time() - start_time:.3f} seconds")
+        return cls(bundle_dir, manifest, feature_transformer, model, cascade)
+
+
+def _sigmoid_proba(margins):
+    """Two-column class probabilities from binary margins, as LogisticRegression.predict_proba computes them"""
+    positive = np.exp(-np.logaddexp(0.0, -margins))
+    return np.column_stack([1.0 - positive, positive])
+
+
+def _normalize_rows(X, norm):
+    row_lengths = np.diff(X.indptr)
+    row_ids = np.repeat(np.arange(X.shape[0]), row_lengths)
+    if norm == "l2":
+        row_norms = np.sqrt(np.bincount(row_ids, weights=X.data ** 2, minlength=X.shape[0]))
+    elif norm == "l1":
+        row_norms = np.bincount(row_ids, weights=np.abs(X.data), minlength=X.shape[0])
+    else:
+        raise ValueError(f"Unsupported norm: {norm}")
+
+    row_norms[row_norms == 0] = 1.0
+    X.data /= np.repeat(row_norms, row_lengths)
+    return X
+
+
+def _exportable_vectorizer_params(vectorizer):
+    params = vectorizer.get_params()
+    for name in ("analyzer", "preprocessor", "tokenizer"):
+        if callable(params.get(name)):
+            raise ValueError(f"Cannot export a vectorizer with a custom {name}")
+    if params.get("analyzer", "word") != "word":
+        raise ValueError(f"Cannot export a vectorizer with analyzer={params['analyzer']!r}")
+    if params.get("strip_accents") is not None:
+        raise ValueError("Cannot export a vectorizer with strip_accents set")
+
+    return {
+        "lowercase": params["lowercase"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": list(params["ngram_range"]),
+        "binary": params["binary"],
+        "sublinear_tf": params["sublinear_tf"],
+        "use_idf": params["use_idf"],
+        "norm": params["norm"],
+        "dtype": np.dtype(params["dtype"]).name,
+    }
+
+
+def _is_linear_binary(model):
+    if len(getattr(model, "classes_", [])) != 2 or not hasattr(model, "intercept_"):
+        return False
+    if hasattr(model, "kernel"):
+        return model.kernel == "linear"
+    return hasattr(model, "coef_")
+
+
+def _has_logistic_loss(model):
+    """Whether the sigmoid of the model's margin is its probability estimate"""
+    if isinstance(model, LinearBundleModel):
+        return model.probabilistic
+    return type(model).__name__ in LOGISTIC_MODELS or getattr(model, "loss", None) in ("log_loss", "log")
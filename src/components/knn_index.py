@@ -0,0 +1,159 @@
+import numpy as np
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+KNN_ARRAYS = ("postings_indptr", "postings_indices", "postings_data", "rows_indptr", "rows_indices", "rows_data", "labels")
+
+
+class InvertedIndexKNN(ClassifierMixin, BaseEstimator):
+    """K-nearest-neighbour classifier on L2-normalized sparse rows (TF-IDF) by cosine similarity.
+
+    fit keeps the training rows twice: term by term (one postings list of
+    (row, weight) per term) and row by row. A query only walks the postings of
+    the terms it contains, so unrelated training rows cost nothing, unlike a
+    brute-force scan. max_query_terms is the recall / speed knob: when set,
+    only each query's heaviest terms walk their postings, the
+    n_neighbors * rerank_factor best partial matches are rescored exactly and
+    the top n_neighbors kept. None searches exactly and finds the same
+    neighbours as KNeighborsClassifier(metric="cosine"), except that rows
+    sharing no term with the query never count as neighbours.
+    """
+
+    def __init__(self, n_neighbors=5, weights="uniform", max_query_terms=None, rerank_factor=4, batch_size=512):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.max_query_terms = max_query_terms
+        self.rerank_factor = rerank_factor
+        self.batch_size = batch_size
+
+    def fit(self, X, y):
+        if self.weights not in ("uniform", "distance"):
+            raise ValueError(f"Unknown weights: {self.weights}. Choose 'uniform' or 'distance'")
+        rows = sparse.csr_matrix(X, dtype=np.float64)
+        rows.sort_indices()
+        self.classes_, labels = np.unique(y, return_inverse=True)
+        self._set_index(rows, rows.T.tocsr(), labels)
+        return self
+
+    def _set_index(self, rows, postings, labels):
+        self.rows_ = rows
+        self.postings_ = postings
+        self.labels_ = labels
+        self.n_features_in_ = rows.shape[1]
+        # A query sharing no term with the training rows falls back to the majority class
+        self.prior_ = int(np.argmax(np.bincount(labels, minlength=len(self.classes_))))
+
+    def arrays(self):
+        """The index as flat arrays, for InferenceBundle to store and memory-map"""
+        return {
+            "postings_indptr": self.postings_.indptr, "postings_indices": self.postings_.indices,
+            "postings_data": self.postings_.data, "rows_indptr": self.rows_.indptr,
+            "rows_indices": self.rows_.indices, "rows_data": self.rows_.data, "labels": self.labels_,
+        }
+
+    @classmethod
+    def from_arrays(cls, params, classes, arrays, n_features):
+        model = cls(**params)
+        model.classes_ = np.asarray(classes)
+        n_rows = len(arrays["labels"])
+        rows = sparse.csr_matrix((arrays["rows_data"], arrays["rows_indices"], arrays["rows_indptr"]), shape=(n_rows, n_features))
+        postings = sparse.csr_matrix((arrays["postings_data"], arrays["postings_indices"], arrays["postings_indptr"]),
+                                     shape=(n_features, n_rows))
+        model._set_index(rows, postings, np.asarray(arrays["labels"]))
+        return model
+
+    def kneighbors(self, X):
+        """(similarities, indices) of each row's n_neighbors most similar training rows, best first.
+
+        Rows that share a term with fewer than n_neighbors training rows are
+        padded with index -1 and similarity 0.
+        """
+        X = sparse.csr_matrix(X, dtype=np.float64)
+        k = min(self.n_neighbors, self.rows_.shape[0])
+        similarities = np.zeros((X.shape[0], k))
+        indices = np.full((X.shape[0], k), -1, dtype=np.int64)
+        for start in range(0, X.shape[0], self.batch_size):
+            batch = X[start:start + self.batch_size]
+            pruned = self.max_query_terms is not None and np.diff(batch.indptr).max(initial=0) > self.max_query_terms
+            query = _top_terms(batch, self.max_query_terms) if pruned else batch
+            scores = (query @ self.postings_).tocsr()
+            candidates, batch_similarities = _top_per_row(scores, k * self.rerank_factor if pruned else k)
+            if pruned:
+                batch_similarities = self._exact_similarities(batch, candidates)
+            order = np.argsort(-batch_similarities, axis=1, kind="stable")[:, :k]
+            found = np.take_along_axis(batch_similarities, order, axis=1)
+            similarities[start:start + batch.shape[0]] = np.where(np.isfinite(found), found, 0.0)
+            indices[start:start + batch.shape[0]] = np.where(np.isfinite(found), np.take_along_axis(candidates, order, axis=1), -1)
+        return similarities, indices
+
+    def _exact_similarities(self, batch, candidates):
+        """Full cosine similarity of each query with its candidate rows (-inf where there is no candidate)"""
+        valid = candidates >= 0
+        query_rows = np.repeat(np.arange(batch.shape[0]), valid.sum(axis=1))
+        exact = np.asarray(self.rows_[candidates[valid]].multiply(batch[query_rows]).sum(axis=1)).ravel()
+        similarities = np.full(candidates.shape, -np.inf)
+        similarities[valid] = exact
+        return similarities
+
+    def predict_proba(self, X):
+        similarities, indices = self.kneighbors(X)
+        found = indices >= 0
+        if self.weights == "uniform":
+            weights = found.astype(np.float64)
+        else:
+            # Inverse cosine distance; exact matches outvote everything else, as in KNeighborsClassifier
+            distances = np.maximum(1.0 - similarities, 0.0)
+            exact = found & (distances <= 1e-12)
+            with np.errstate(divide="ignore"):
+                weights = np.where(found, 1.0 / distances, 0.0)
+            weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+
+        proba = np.zeros((len(indices), len(self.classes_)))
+        rows = np.repeat(np.arange(len(indices)), found.sum(axis=1))
+        np.add.at(proba, (rows, self.labels_[indices[found]]), weights[found])
+        empty = proba.sum(axis=1) == 0
+        proba[empty, self.prior_] = 1.0
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# ----------------------------------------------------------------------------
+# Function to keep each row's heaviest terms of a CSR matrix
+# ----------------------------------------------------------------------------
+def _top_terms(X, max_terms):
+    counts = np.diff(X.indptr)
+    rows = np.repeat(np.arange(X.shape[0]), counts)
+    order = np.lexsort((-X.data, rows))
+    rank = np.arange(len(order)) - X.indptr[rows[order]]
+    keep = np.sort(order[rank < max_terms])
+    indptr = np.concatenate([[0], np.cumsum(np.minimum(counts, max_terms))])
+    return sparse.csr_matrix((X.data[keep], X.indices[keep], indptr), shape=X.shape)
+
+# ----------------------------------------------------------------------------
+# Function to pick the n highest-scoring columns of each CSR row
+# ----------------------------------------------------------------------------
+def _top_per_row(scores, n):
+    """(columns, scores) of each row's n best entries, best first, padded with -1 / -inf"""
+    columns = np.full((scores.shape[0], n), -1, dtype=np.int64)
+    values = np.full((scores.shape[0], n), -np.inf)
+    for row in range(scores.shape[0]):
+        start, end = scores.indptr[row], scores.indptr[row + 1]
+        data, indices = scores.data[start:end], scores.indices[start:end]
+        if end - start > n:
+            top = np.argpartition(-data, n - 1)[:n]
+            data, indices = data[top], indices[top]
+        order = np.argsort(-data, kind="stable")
+        columns[row, :len(order)] = indices[order]
+        values[row, :len(order)] = data[order]
+    return columns, values
+
+# ----------------------------------------------------------------------------
+# Function to measure how many exact neighbours an approximate search found
+# ----------------------------------------------------------------------------
+def neighbour_recall(indices, exact_indices):
+    """Mean share of each row's exact neighbours (ignoring -1 padding) that also appear in indices"""
+    found = [len(set(row[row >= 0]) & set(exact[exact >= 0])) for row, exact in zip(indices, exact_indices)]
+    total = int((exact_indices >= 0).sum())
+    return sum(found) / total if total else 1.0
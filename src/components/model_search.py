@@ -0,0 +1,433 @@
+import os
+import time
+import json
+from itertools import product
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from joblib import Memory, Parallel, delayed
+
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV, HalvingGridSearchCV, HalvingRandomSearchCV, ParameterGrid, ParameterSampler, StratifiedKFold
+)
+
+from src.utils.logger import get_logger
+from src.utils.utils import iter_batches
+from src.config.config import ModelConfig
+from src.components.featurizers import build_featurizer
+
+logger = get_logger(__name__)
+
+SEARCH_STRATEGIES = ("grid", "randomized", "halving")
+VECTORIZER_PREFIX = "vectorizer__"
+
+
+class FoldFeatureCache:
+    """Fitted TF-IDF features per (CV fold, vectorizer params), computed once and shared.
+
+    The vectorizer is fitted on each fold's training texts only, so validation
+    folds never leak into the vocabulary or IDF weights. Results are memoized
+    in memory and, when cache_dir is set, on disk through joblib.Memory so
+    repeat runs and worker processes reuse them.
+    """
+
+    def __init__(self, texts, y, cv_folds=5, cache_dir=None):
+        self.texts = [str(text) for text in texts]
+        self.y = np.asarray(y)
+        # Same splits GridSearchCV(cv=cv_folds) uses for a classifier
+        self.splits = list(StratifiedKFold(n_splits=cv_folds).split(self.texts, self.y))
+        self.cache_dir = cache_dir
+        self.backend = ModelConfig.featurizer
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}
+        self._fit_transform = Memory(cache_dir, verbose=0).cache(_fit_transform_texts) if cache_dir else _fit_transform_texts
+
+    @property
+    def n_folds(self):
+        return len(self.splits)
+
+    def fold(self, fold_index, vectorizer_params):
+        """Return (X_train, y_train, X_val, y_val) for one fold"""
+        key = (fold_index, self.backend, _params_key(vectorizer_params))
+        if key in self._memory:
+            self.hits += 1
+        else:
+            self.misses += 1
+            train_index, val_index = self.splits[fold_index]
+            _, X_train, X_val = self._fit_transform(
+                [self.texts[i] for i in train_index], [self.texts[i] for i in val_index], self.backend, vectorizer_params
+            )
+            self._memory[key] = (X_train, X_val)
+        X_train, X_val = self._memory[key]
+        train_index, val_index = self.splits[fold_index]
+        return X_train, self.y[train_index], X_val, self.y[val_index]
+
+    def full(self, vectorizer_params):
+        """Fit the vectorizer on every training text; returns (vectorizer, X)"""
+        vectorizer, X, _ = self._fit_transform(self.texts, [], self.backend, vectorizer_params)
+        return vectorizer, X
+
+
+def _fit_transform_texts(train_texts, val_texts, backend, vectorizer_params):
+    vectorizer = build_featurizer(backend, **vectorizer_params)
+    X_train = vectorizer.fit_transform(train_texts)
+    X_val = vectorizer.transform(val_texts) if val_texts else None
+    return vectorizer, X_train, X_val
+
+
+def _params_key(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _fit_path(model, params, path_param, path_values, X_train, y_train, X_val, y_val, scoring):
+    """Fit and score params at each of path_values in order, every fit warm-started from the previous solution.
+
+    Returns one (score, fit_time, score_time, n_iter) tuple per value.
+    """
+    estimator = clone(model).set_params(**params, warm_start=True)
+    scorer = get_scorer(scoring)
+    outputs = []
+    for value in path_values:
+        estimator.set_params(**{path_param: value})
+        start = time.time()
+        estimator.fit(X_train, y_train)
+        fit_time = time.time() - start
+        start = time.time()
+        score = scorer(estimator, X_val, y_val)
+        outputs.append((score, fit_time, time.time() - start, int(np.max(getattr(estimator, "n_iter_", 0)))))
+    return outputs
+
+
+def _fit_and_score(model, params, X_train, y_train, X_val, y_val, scoring):
+    estimator = clone(model).set_params(**params)
+    start = time.time()
+    estimator.fit(X_train, y_train)
+    fit_time = time.time() - start
+    start = time.time()
+    score = get_scorer(scoring)(estimator, X_val, y_val)
+    return score, fit_time, time.time() - start
+
+
+class ModelSearch:
+    """Hyperparameter search for the model families compared in ModelTraining.
+
+    Supports exhaustive grid, randomized and successive-halving strategies, a
+    fit-count and/or wall-clock budget per family, and searching several
+    families concurrently in a process pool. Every evaluated candidate keeps
+    its fit and score times in the returned cv_results.
+    """
+
+    def __init__(self, strategy=None, max_fits=None, max_seconds=None, parallel_families=None,
+                 n_iter=None, cv_folds=5, scoring="f1", random_state=42, regularization_paths=None):
+        self.strategy = strategy or ModelConfig.search_strategy
+        if self.strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {self.strategy}. Choose from {SEARCH_STRATEGIES}")
+        self.max_fits = max_fits if max_fits is not None else ModelConfig.max_fits_per_model
+        self.max_seconds = max_seconds if max_seconds is not None else ModelConfig.max_seconds_per_model
+        if self.strategy == "halving" and self.max_seconds:
+            # sklearn runs every rung inside one fit call, so there is no point to stop at between rungs
+            raise ValueError("A wall-clock budget (max_seconds_per_model) is not supported with the 'halving' "
+                             "strategy; use max_fits_per_model or the 'grid' / 'randomized' strategies")
+        self.parallel_families = parallel_families or ModelConfig.parallel_families
+        self.n_iter = n_iter or ModelConfig.n_iter
+        self.cv_folds = cv_folds
+        self.scoring = scoring
+        self.random_state = random_state
+        self.regularization_paths = ModelConfig.regularization_paths if regularization_paths is None else regularization_paths
+
+    def run(self, models, param_grids, X, y, feature_cache=None):
+        """Search every family in models; returns {model_name: search result dict}
+
+        With a FoldFeatureCache, X is ignored and each candidate is scored on
+        features fitted inside its CV fold; the vectorizer grid is searched too.
+        """
+        if self.parallel_families <= 1:
+            return {name: self.search(name, model, param_grids.get(name, {}), X, y, n_jobs=-1, feature_cache=feature_cache)
+                    for name, model in models.items()}
+
+        # Split the cores between concurrently searched families to avoid oversubscription
+        n_jobs = max(1, (os.cpu_count() or 1) // self.parallel_families)
+        logger.info(f"Searching {len(models)} model families, {self.parallel_families} at a time with {n_jobs} jobs each")
+        with ProcessPoolExecutor(max_workers=self.parallel_families) as executor:
+            futures = {
+                name: executor.submit(self.search, name, model, param_grids.get(name, {}), X, y, n_jobs, feature_cache)
+                for name, model in models.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def search(self, model_name, model, param_grid, X, y, n_jobs=-1, feature_cache=None):
+        start_time = time.time()
+        path_param = self._path_param(model_name, model, param_grid)
+        if feature_cache is not None and self.strategy == "halving":
+            raise ValueError("Per-fold featurization supports the 'grid' and 'randomized' strategies only")
+        if path_param is not None:
+            result = self._path_search(model_name, model, param_grid, path_param, X, y, n_jobs, start_time, feature_cache)
+        elif feature_cache is not None:
+            result = self._per_fold_search(model_name, model, param_grid, feature_cache, n_jobs, start_time)
+        elif self.strategy == "halving":
+            result = self._halving_search(model, param_grid, X, y, n_jobs)
+        else:
+            result = self._chunked_search(model_name, model, param_grid, X, y, n_jobs, start_time)
+
+        result["search_time"] = time.time() - start_time
+        result["strategy"] = self.strategy
+        logger.info(f"{model_name} - {self.strategy} search evaluated {result['n_candidates']} candidates "
+                    f"({result['n_fits']} fits) in {result['search_time']:.2f} seconds")
+        return result
+
+    def _path_param(self, model_name, model, param_grid):
+        """The parameter swept as a warm-started path for this family, or None for a plain search"""
+        path_param = self.regularization_paths.get(model_name)
+        if self.strategy != "grid" or path_param not in param_grid or "warm_start" not in model.get_params():
+            return None
+        return path_param
+
+    def _candidate_list(self, param_grid):
+        grid = ParameterGrid(param_grid)
+        max_candidates = len(grid)
+        if self.strategy == "randomized":
+            max_candidates = min(max_candidates, self.n_iter)
+        if self.max_fits:
+            max_candidates = min(max_candidates, max(1, self.max_fits // self.cv_folds))
+
+        if max_candidates == len(grid) and self.strategy == "grid":
+            candidates = list(grid)
+            if self.max_seconds:
+                # A wall-clock budget may stop part-way, so visit the grid in a random order
+                np.random.RandomState(self.random_state).shuffle(candidates)
+            return candidates
+        # Sampling (rather than truncating the grid) keeps a budgeted grid representative
+        return list(ParameterSampler(param_grid, n_iter=max_candidates, random_state=self.random_state))
+
+    def _chunked_search(self, model_name, model, param_grid, X, y, n_jobs, start_time):
+        candidates = self._candidate_list(param_grid)
+        # Without a wall-clock budget the whole candidate list is a single search
+        chunk_size = max(1, os.cpu_count() or 1) if self.max_seconds else len(candidates)
+
+        merged = {}
+        for chunk in iter_batches(candidates, chunk_size):
+            if self.max_seconds and time.time() - start_time > self.max_seconds:
+                logger.info(f"{model_name} - wall-clock budget of {self.max_seconds}s reached, stopping search")
+                break
+            search = GridSearchCV(
+                model,
+                param_grid=[{key: [value] for key, value in params.items()} for params in chunk],
+                cv=self.cv_folds,
+                scoring=self.scoring,
+                n_jobs=n_jobs,
+                refit=False
+            )
+            search.fit(X, y)
+            _merge_cv_results(merged, search.cv_results_)
+
+        cv_results = _finalize_cv_results(merged)
+        scores = np.where(np.isnan(cv_results["mean_test_score"]), -np.inf, cv_results["mean_test_score"])
+        best_index = int(np.argmax(scores))
+        best_params = cv_results["params"][best_index]
+
+        return {
+            "best_estimator": clone(model).set_params(**best_params).fit(X, y),
+            "best_params": best_params,
+            "best_score": float(cv_results["mean_test_score"][best_index]),
+            "cv_results": cv_results,
+            "n_candidates": len(cv_results["params"]),
+            "n_fits": len(cv_results["params"]) * self.cv_folds,
+        }
+
+    def _per_fold_search(self, model_name, model, param_grid, feature_cache, n_jobs, start_time):
+        vectorizer_candidates = list(ParameterGrid(ModelConfig.vectorizer_params))
+        candidates = [
+            (vectorizer_params, params)
+            for vectorizer_params, params in product(vectorizer_candidates, self._candidate_list(param_grid))
+        ]
+        if self.max_fits and len(candidates) * self.cv_folds > self.max_fits:
+            # The vectorizer grid multiplies the candidate count, so sample down to the fit budget
+            np.random.RandomState(self.random_state).shuffle(candidates)
+            candidates = candidates[:max(1, self.max_fits // self.cv_folds)]
+        chunk_size = max(1, os.cpu_count() or 1) if self.max_seconds else len(candidates)
+        n_folds = feature_cache.n_folds
+        hits, misses = feature_cache.hits, feature_cache.misses
+
+        rows = []
+        for chunk in iter_batches(candidates, chunk_size):
+            if self.max_seconds and time.time() - start_time > self.max_seconds:
+                logger.info(f"{model_name} - wall-clock budget of {self.max_seconds}s reached, stopping search")
+                break
+            # Each (fold, vectorizer params) pair is featurized once and shared by every estimator candidate
+            outputs = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_and_score)(model, params, *feature_cache.fold(fold, vectorizer_params), self.scoring)
+                for vectorizer_params, params in chunk
+                for fold in range(n_folds)
+            )
+            for i, (vectorizer_params, params) in enumerate(chunk):
+                rows.append((vectorizer_params, params, outputs[i * n_folds:(i + 1) * n_folds]))
+
+        cv_results = _finalize_cv_results(_merge_fold_outputs(rows))
+        scores = np.where(np.isnan(cv_results["mean_test_score"]), -np.inf, cv_results["mean_test_score"])
+        best_index = int(np.argmax(scores))
+        best_vectorizer_params, best_model_params = rows[best_index][0], rows[best_index][1]
+        logger.info(f"{model_name} - fold features: {feature_cache.misses - misses} computed, "
+                    f"{feature_cache.hits - hits} reused from memory")
+
+        vectorizer, X_full = feature_cache.full(best_vectorizer_params)
+        return {
+            "best_estimator": clone(model).set_params(**best_model_params).fit(X_full, feature_cache.y),
+            "best_params": cv_results["params"][best_index],
+            "best_score": float(cv_results["mean_test_score"][best_index]),
+            "cv_results": cv_results,
+            "n_candidates": len(rows),
+            "n_fits": len(rows) * n_folds,
+            "vectorizer": vectorizer,
+        }
+
+    def _path_search(self, model_name, model, param_grid, path_param, X, y, n_jobs, start_time, feature_cache=None):
+        """Grid search that sweeps path_param in ascending order per (fold, other params), warm-starting each fit.
+
+        Adjacent values have nearly identical solutions, so each fit starts
+        close to its optimum and converges in a few solver iterations. Every
+        grid candidate is still scored on every fold, and candidates keep the
+        grid's order, so ties resolve as in GridSearchCV.
+        """
+        path_values = sorted(param_grid[path_param])
+        rest = {key: values for key, values in param_grid.items() if key != path_param}
+        vectorizer_candidates = list(ParameterGrid(ModelConfig.vectorizer_params)) if feature_cache is not None else [{}]
+        paths = list(product(vectorizer_candidates, ParameterGrid(rest)))
+        if feature_cache is not None:
+            n_folds, fold_data = feature_cache.n_folds, feature_cache.fold
+        else:
+            y = np.asarray(y)
+            # Same splits GridSearchCV(cv=cv_folds) uses for a classifier
+            splits = list(StratifiedKFold(n_splits=self.cv_folds).split(X, y))
+            n_folds = len(splits)
+
+            def fold_data(fold, _):
+                train_index, val_index = splits[fold]
+                return X[train_index], y[train_index], X[val_index], y[val_index]
+        if self.max_fits and len(paths) * len(path_values) * n_folds > self.max_fits:
+            np.random.RandomState(self.random_state).shuffle(paths)
+            n_values = self.max_fits // n_folds
+            if n_values < len(path_values):
+                # Not even one full path fits the budget: sweep evenly spaced values, ends included
+                keep = np.unique(np.linspace(0, len(path_values) - 1, max(1, n_values)).round().astype(int))
+                path_values = [path_values[i] for i in keep]
+                logger.info(f"{model_name} - fit budget of {self.max_fits} allows one {path_param} path of {path_values}")
+            paths = paths[:max(1, self.max_fits // (len(path_values) * n_folds))]
+            if len(path_values) * n_folds > self.max_fits:
+                logger.warning(f"{model_name} - fit budget of {self.max_fits} is below one fit per fold; "
+                               f"running {len(path_values) * n_folds} fits")
+        chunk_size = max(1, os.cpu_count() or 1) if self.max_seconds else len(paths)
+
+        evaluated = {}
+        for chunk in iter_batches(paths, chunk_size):
+            if self.max_seconds and time.time() - start_time > self.max_seconds:
+                logger.info(f"{model_name} - wall-clock budget of {self.max_seconds}s reached, stopping search")
+                break
+            outputs = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_path)(model, params, path_param, path_values, *fold_data(fold, vectorizer_params), self.scoring)
+                for vectorizer_params, params in chunk
+                for fold in range(n_folds)
+            )
+            for i, (vectorizer_params, params) in enumerate(chunk):
+                fold_paths = outputs[i * n_folds:(i + 1) * n_folds]
+                for j, value in enumerate(path_values):
+                    candidate = {**params, path_param: value}
+                    evaluated[(_params_key(vectorizer_params), _params_key(candidate))] = [path[j] for path in fold_paths]
+
+        rows = [(vectorizer_params, params, evaluated[(_params_key(vectorizer_params), _params_key(params))])
+                for vectorizer_params in vectorizer_candidates for params in ParameterGrid(param_grid)
+                if (_params_key(vectorizer_params), _params_key(params)) in evaluated]
+        cv_results = _finalize_cv_results(_merge_fold_outputs(rows))
+        scores = np.where(np.isnan(cv_results["mean_test_score"]), -np.inf, cv_results["mean_test_score"])
+        best_index = int(np.argmax(scores))
+        best_vectorizer_params, best_model_params = rows[best_index][0], rows[best_index][1]
+        logger.info(f"{model_name} - warm-started {path_param} path: {len(rows) // len(path_values)} paths of {len(path_values)} values, "
+                    f"{int(np.sum(cv_results['mean_n_iter']) * n_folds)} solver iterations in total")
+
+        result = {
+            "best_params": cv_results["params"][best_index],
+            "best_score": float(cv_results["mean_test_score"][best_index]),
+            "cv_results": cv_results,
+            "n_candidates": len(rows),
+            "n_fits": len(rows) * n_folds,
+        }
+        if feature_cache is not None:
+            result["vectorizer"], X = feature_cache.full(best_vectorizer_params)
+            y = feature_cache.y
+        result["best_estimator"] = clone(model).set_params(**best_model_params).fit(X, y)
+        return result
+
+    def _halving_search(self, model, param_grid, X, y, n_jobs):
+        # 'exhaust' sizes the first rung so the last one uses the full training set
+        factor = 3
+        common = dict(cv=self.cv_folds, scoring=self.scoring, n_jobs=n_jobs, factor=factor,
+                      min_resources="exhaust", random_state=self.random_state, refit=True)
+        grid_size = len(ParameterGrid(param_grid))
+        if self.max_fits and _halving_fits(grid_size, factor) * self.cv_folds > self.max_fits:
+            # Size the first rung so every rung together stays within the fit budget
+            n_candidates = 1
+            while n_candidates < grid_size and _halving_fits(n_candidates + 1, factor) * self.cv_folds <= self.max_fits:
+                n_candidates += 1
+            search = HalvingRandomSearchCV(model, param_distributions=param_grid, n_candidates=n_candidates, **common)
+        else:
+            search = HalvingGridSearchCV(model, param_grid=param_grid, **common)
+        search.fit(X, y)
+
+        return {
+            "best_estimator": search.best_estimator_,
+            "best_params": search.best_params_,
+            "best_score": float(search.best_score_),
+            "cv_results": search.cv_results_,
+            "n_candidates": int(sum(search.n_candidates_)),
+            "n_fits": int(sum(search.n_candidates_)) * self.cv_folds,
+        }
+
+
+def _halving_fits(n_candidates, factor):
+    """Candidates evaluated over every rung of successive halving (per CV fold) when it runs all its rungs"""
+    total, n_iterations = 0, 1 + int(np.floor(np.log(n_candidates) / np.log(factor) + 1e-9))
+    for _ in range(n_iterations):
+        total += n_candidates
+        n_candidates = int(np.ceil(n_candidates / factor))
+    return total
+
+
+def _merge_fold_outputs(rows):
+    """cv_results-style columns from (vectorizer params, params, per-fold (score, fit_time, score_time[, n_iter])) rows"""
+    merged = {"params": []}
+    for vectorizer_params, params, fold_outputs in rows:
+        columns = [np.array(values, dtype=float) for values in zip(*fold_outputs)]
+        candidate = {**{VECTORIZER_PREFIX + k: v for k, v in vectorizer_params.items()}, **params}
+        merged["params"].append(candidate)
+        for key, value in candidate.items():
+            merged.setdefault(f"param_{key}", []).append(value)
+        for fold, score in enumerate(columns[0]):
+            merged.setdefault(f"split{fold}_test_score", []).append(score)
+        for key, values in zip(("test_score", "fit_time", "score_time", "n_iter"), columns):
+            merged.setdefault(f"mean_{key}", []).append(float(np.mean(values)))
+            merged.setdefault(f"std_{key}", []).append(float(np.std(values)))
+    return merged
+
+
+def _merge_cv_results(merged, cv_results):
+    for key, values in cv_results.items():
+        if key.startswith("rank_"):
+            continue
+        merged.setdefault(key, []).extend(list(values))
+
+
+def _finalize_cv_results(merged):
+    cv_results = {}
+    for key, values in merged.items():
+        if key == "params" or key.startswith("param_"):
+            cv_results[key] = values if key == "params" else np.array(values, dtype=object)
+        else:
+            cv_results[key] = np.asarray(values, dtype=float)
+
+    # Rank with ties sharing the best rank, matching GridSearchCV
+    scores = np.where(np.isnan(cv_results["mean_test_score"]), -np.inf, cv_results["mean_test_score"])
+    cv_results["rank_test_score"] = np.array([1 + int(np.sum(scores > score)) for score in scores], dtype=np.int32)
+    return cv_results
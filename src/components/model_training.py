@@ -1,4 +1,5 @@
 import os
+import copy
 import time
 import json
 import pickle
@@ -8,15 +9,21 @@ import numpy as np
 import pandas as pd
 
 from sklearn.svm import SVC
+from sklearn.base import clone
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, StackingClassifier
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, cross_val_score
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, classification_report
+from sklearn.model_selection import cross_val_predict
 
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics as stage_metrics, TIME_BUCKETS
 from src.utils.state import TrainingState
+from src.components.inference_bundle import InferenceBundle, CascadeClassifier, _is_linear_binary
+from src.components.knn_index import InvertedIndexKNN, neighbour_recall
+from src.components.model_search import ModelSearch, FoldFeatureCache
+from src.components.featurizers import FEATURIZER_BACKENDS, build_featurizer
 from src.config.config import Config, ModelConfig
 
 logger = get_logger(__name__)
@@ -45,6 +52,10 @@ class ModelTraining:
             with open(best_model_path, 'wb') as f:
                 pickle.dump(state.best_model, f)
             logger.info(f"Saved best model: {state.best_model_name}_model.pkl")
+
+            InferenceBundle.export(state.tfidf_vectorizer, state.best_model,
+                                   os.path.join(models_dir, "bundle"), model_name=state.best_model_name,
+                                   fused_scorer=self.config.use_fused_scorer, cascade=state.cascade)
         
             metadata = {
                 'timestamp': timestamp,
@@ -155,11 +166,184 @@ class ModelTraining:
         best_path = os.path.join(observations_dir, "best_model_info.csv")
         df_best.to_csv(best_path, index=False)
         logger.info(f"Saved: best_model_info.csv")
+        
+        # 5. Per-Candidate Search Timings
+        # ----------------------------------------------------------------------
+        if state.cv_results:
+            candidate_rows = []
+            for model_name, cv_data in state.cv_results.items():
+                results = cv_data.get('cv_scores') or {}
+                for i, params in enumerate(results.get('params', [])):
+                    row = {
+                        'Model': model_name,
+                        'Parameters': json.dumps(params, default=str),
+                        'Mean_Fit_Time': results['mean_fit_time'][i],
+                        'Std_Fit_Time': results['std_fit_time'][i],
+                        'Mean_Score_Time': results['mean_score_time'][i],
+                        'Mean_Test_Score': results['mean_test_score'][i],
+                        'Rank': results['rank_test_score'][i]
+                    }
+                    if 'mean_n_iter' in results:
+                        row['Mean_Solver_Iterations'] = results['mean_n_iter'][i]
+                    if 'iter' in results:
+                        row['Halving_Iteration'] = results['iter'][i]
+                        row['N_Resources'] = results['n_resources'][i]
+                    candidate_rows.append(row)
+            
+            df_candidates = pd.DataFrame(candidate_rows)
+            candidates_path = os.path.join(observations_dir, "candidate_fit_times.csv")
+            df_candidates.to_csv(candidates_path, index=False)
+            logger.info(f"Saved: candidate_fit_times.csv")
+            
+            df_search = pd.DataFrame([
+                {
+                    'Model': model_name,
+                    'Search_Time_Seconds': cv_data.get('search_time', 'N/A'),
+                    'Fits': cv_data.get('n_fits', 'N/A'),
+                    # mean_fit_time is per fold, so scale by the folds each candidate was fitted on
+                    'Total_Fit_Seconds': float(np.sum(cv_data['cv_scores']['mean_fit_time'])
+                                               * cv_data['n_fits'] / max(len(cv_data['cv_scores']['params']), 1))
+                }
+                for model_name, cv_data in state.cv_results.items()
+            ])
+            search_path = os.path.join(observations_dir, "search_summary.csv")
+            df_search.to_csv(search_path, index=False)
+            logger.info(f"Saved: search_summary.csv")
+        
+        # 6. Featurizer Backend Comparison
+        # ----------------------------------------------------------------------
+        if state.featurizer_comparison:
+            df_featurizers = pd.DataFrame(state.featurizer_comparison)
+            featurizers_path = os.path.join(observations_dir, "featurizer_comparison.csv")
+            df_featurizers.to_csv(featurizers_path, index=False)
+            logger.info(f"Saved: featurizer_comparison.csv")
+        if state.knn_tradeoff:
+            knn_path = os.path.join(observations_dir, "knn_index_tradeoff.csv")
+            pd.DataFrame(state.knn_tradeoff).to_csv(knn_path, index=False)
+            logger.info(f"Saved: knn_index_tradeoff.csv")
+        if state.cascade:
+            cascade_path = os.path.join(observations_dir, "cascade.csv")
+            pd.DataFrame([{key: value for key, value in state.cascade.items() if key != "screen"}]).to_csv(cascade_path, index=False)
+            logger.info(f"Saved: cascade.csv")
+
+
+    def compare_featurizers(self, state: TrainingState, repeats: int = 3):
+        """Refit the best model on every featurizer backend and measure test accuracy and inference throughput"""
+        rows = []
+        for backend in FEATURIZER_BACKENDS:
+            featurizer = build_featurizer(backend)
+            start_time = time.time()
+            X_train = featurizer.fit_transform(state.X_train)
+            fit_time = time.time() - start_time
+            model = clone(state.best_model).fit(X_train, state.y_train)
+            
+            # Throughput covers featurization plus prediction, best of several runs
+            predict_time = float('inf')
+            for _ in range(repeats):
+                start_time = time.time()
+                y_pred = model.predict(featurizer.transform(state.X_test))
+                predict_time = min(predict_time, time.time() - start_time)
+            
+            rows.append({
+                'Featurizer': backend,
+                'Model': state.best_model_name,
+                'N_Features': X_train.shape[1],
+                'Serialized_Bytes': len(pickle.dumps(featurizer)),
+                'Fit_Seconds': fit_time,
+                'Accuracy': accuracy_score(state.y_test, y_pred),
+                'F1_Score': f1_score(state.y_test, y_pred, average='weighted', zero_division=0),
+                'Emails_Per_Second': len(state.y_test) / max(predict_time, 1e-9),
+                'Is_Configured': '1' if backend == ModelConfig.featurizer else '0'
+            })
+            logger.info(f"Featurizer {backend}: F1 {rows[-1]['F1_Score']:.4f}, "
+                        f"{rows[-1]['Emails_Per_Second']:.0f} emails/second")
+        return rows
+    
+    def compare_knn_recall(self, knn: InvertedIndexKNN, X_test, y_test, repeats: int = 3):
+        """Neighbour recall, test accuracy and latency of the indexed KNN at each knn_recall_curve setting, next to brute force"""
+        def timed_predict(model):
+            seconds = float('inf')
+            for _ in range(repeats):
+                start_time = time.perf_counter()
+                y_pred = model.predict(X_test)
+                seconds = min(seconds, time.perf_counter() - start_time)
+            return y_pred, seconds
+
+        def row(backend, max_query_terms, recall, y_pred, seconds, is_configured):
+            return {
+                'Backend': backend,
+                'Max_Query_Terms': max_query_terms if max_query_terms is not None else 'exact',
+                'Neighbour_Recall': recall,
+                'Accuracy': accuracy_score(y_test, y_pred),
+                'F1_Score': f1_score(y_test, y_pred, average='weighted', zero_division=0),
+                'Ms_Per_Email': seconds * 1000 / max(X_test.shape[0], 1),
+                'Is_Configured': '1' if is_configured else '0'
+            }
 
+        brute = KNeighborsClassifier(n_neighbors=knn.n_neighbors, weights=knn.weights, metric='cosine', algorithm='brute')
+        brute.fit(knn.rows_, knn.classes_[knn.labels_])
+        rows = [row('sklearn_brute', None, None, *timed_predict(brute), False)]
+        _, exact_indices = copy.copy(knn).set_params(max_query_terms=None).kneighbors(X_test)
+        for max_query_terms in ModelConfig.knn_recall_curve:
+            # Shallow copies share the fitted index and differ only in the knob
+            model = copy.copy(knn).set_params(max_query_terms=max_query_terms)
+            recall = neighbour_recall(model.kneighbors(X_test)[1], exact_indices)
+            rows.append(row('inverted_index', max_query_terms, recall, *timed_predict(model),
+                            max_query_terms == knn.max_query_terms))
+        for result in rows:
+            logger.info(f"KNN {result['Backend']} (query terms: {result['Max_Query_Terms']}): "
+                        f"recall {result['Neighbour_Recall'] if result['Neighbour_Recall'] is not None else 'n/a'}, "
+                        f"F1 {result['F1_Score']:.4f}, {result['Ms_Per_Email']:.3f} ms/email")
+        return rows
+
+    def build_cascade(self, state: TrainingState):
+        """Fit a linear screen for a non-linear best model and tune its uncertainty band on out-of-fold predictions"""
+        if _is_linear_binary(state.best_model):
+            logger.info(f"Best model {state.best_model_name} is linear, no cascade needed")
+            return None
+
+        X_train, y_train = state.X_train_tfidf, state.y_train
+        base = state.trained_models.get('LogisticRegression', LogisticRegression(random_state=42, max_iter=1000))
+        screen = clone(base)
+        folds = ModelConfig.cascade_cv_folds
+        margins = cross_val_predict(clone(base), X_train, y_train, cv=folds, method='decision_function')
+        full_predictions = cross_val_predict(clone(state.best_model), X_train, y_train, cv=folds)
+        screen_predictions = np.unique(y_train)[(margins > 0).astype(int)]
+        lower, upper, agreement = _tune_cascade_band(margins, screen_predictions, full_predictions,
+                                                     ModelConfig.cascade_target_agreement)
+        screen.fit(X_train, y_train)
+
+        # Measure the tuned cascade against the full model on the held-out split, featurization included
+        texts = list(state.X_test)
+        start_time = time.perf_counter()
+        y_full = state.best_model.predict(state.tfidf_vectorizer.transform(texts))
+        full_seconds = time.perf_counter() - start_time
+        cascade = CascadeClassifier(state.tfidf_vectorizer, screen, state.best_model, lower, upper, fused=False)
+        start_time = time.perf_counter()
+        y_cascade, escalated = cascade.predict(texts)
+        cascade_seconds = time.perf_counter() - start_time
+
+        result = {
+            'screen': screen,
+            'screen_model': type(screen).__name__,
+            'full_model': state.best_model_name,
+            'lower': float(lower),
+            'upper': float(upper),
+            'target_agreement': ModelConfig.cascade_target_agreement,
+            'cv_agreement': agreement,
+            'test_agreement': float(np.mean(y_cascade == y_full)),
+            'test_escalated_fraction': float(escalated.mean()),
+            'test_f1_full': f1_score(state.y_test, y_full, average='weighted', zero_division=0),
+            'test_f1_cascade': f1_score(state.y_test, y_cascade, average='weighted', zero_division=0),
+            'test_speedup': full_seconds / max(cascade_seconds, 1e-9),
+        }
+        logger.info(f"Cascade band ({lower:.4f}, {upper:.4f}): {result['test_escalated_fraction']:.1%} of test emails escalated, "
+                    f"agreement {result['test_agreement']:.4f}, F1 {result['test_f1_cascade']:.4f} vs {result['test_f1_full']:.4f}, "
+                    f"{result['test_speedup']:.1f}x faster")
+        return result
 
     def train_models(self, state: TrainingState, cv_folds: int = 5) -> TrainingState:
         logger.info("Model training started")
-        logger.info(f"Using GridSearchCV with {cv_folds}-fold CV")
         
         try:
             X_train = state.X_train_tfidf
@@ -171,54 +355,59 @@ class ModelTraining:
             
             # Define model instances
             models = {
-                'LogisticRegression': LogisticRegression(random_state=42),
+                'LogisticRegression': LogisticRegression(random_state=42, max_iter=ModelConfig.path_max_iter),
                 'DecisionTree': DecisionTreeClassifier(random_state=42),
                 'SVM': SVC(random_state=42),
-                'KNN': KNeighborsClassifier(),
+                'KNN': (InvertedIndexKNN(max_query_terms=ModelConfig.knn_max_query_terms, rerank_factor=ModelConfig.knn_rerank_factor)
+                        if ModelConfig.knn_backend == 'inverted_index' else KNeighborsClassifier(metric='cosine', algorithm='brute')),
                 'RandomForest': RandomForestClassifier(random_state=42)
             }
             
-            for model_name, model in models.items():
-                start_time = time.time()
+            model_search = ModelSearch(cv_folds=cv_folds)
+            logger.info(f"Using {model_search.strategy} search with {cv_folds}-fold CV")
+            feature_cache = None
+            if ModelConfig.cv_featurization == 'per_fold':
+                # TF-IDF is refitted inside each CV fold and shared by every candidate on that fold
+                logger.info(f"Fitting TF-IDF per CV fold, feature cache at {ModelConfig.feature_cache_dir}")
+                feature_cache = FoldFeatureCache(state.X_train, y_train, cv_folds, ModelConfig.feature_cache_dir)
+            search_results = model_search.run(models, self.param_grids, X_train, y_train, feature_cache=feature_cache)
+            vectorizers = {}
+            
+            for model_name, search in search_results.items():
                 logger.info(f"\n{'='*60}")
-                logger.info(f"Training {model_name}...")
-                
-                param_grid = self.param_grids.get(model_name, {})
-                
-                search = GridSearchCV(model,
-                                    param_grid=param_grid,
-                                    cv=cv_folds,
-                                    scoring='f1',
-                                    n_jobs=-1
-                                    )
-                
-                search.fit(X_train, y_train)
-                best_model = search.best_estimator_
+                logger.info(f"Evaluating {model_name}...")
                 
-                y_pred = best_model.predict(X_test)
+                best_model = search['best_estimator']
+                stage_metrics.observe(f"train.search.{model_name}", search['search_time'], TIME_BUCKETS)
+                vectorizers[model_name] = search.get('vectorizer', state.tfidf_vectorizer)
+                model_X_test = vectorizers[model_name].transform(state.X_test) if 'vectorizer' in search else X_test
+                y_pred = best_model.predict(model_X_test)
                 
                 metrics = {
                     'accuracy': accuracy_score(y_test, y_pred),
                     'precision': precision_score(y_test, y_pred, average='weighted', zero_division=0),
                     'recall': recall_score(y_test, y_pred, average='weighted', zero_division=0),
                     'f1_score': f1_score(y_test, y_pred, average='weighted', zero_division=0),
-                    'best_params': search.best_params_,
-                    'best_cv_score': search.best_score_
+                    'best_params': search['best_params'],
+                    'best_cv_score': search['best_score']
                 }
                 
                 trained_models[model_name] = best_model
                 model_metrics[model_name] = metrics
+                if isinstance(best_model, InvertedIndexKNN):
+                    with stage_metrics.timer("train.knn_tradeoff"):
+                        state.knn_tradeoff = self.compare_knn_recall(best_model, model_X_test, y_test)
                 cv_results[model_name] = {
-                    'cv_scores': search.cv_results_,
-                    'best_params': search.best_params_,
-                    'best_score': search.best_score_
+                    'cv_scores': search['cv_results'],
+                    'best_params': search['best_params'],
+                    'best_score': search['best_score'],
+                    'search_time': search['search_time'],
+                    'n_fits': search['n_fits']
                 }
                 
-                end_time = time.time()
-                
-                logger.info(f"{model_name} - Training time: {end_time - start_time:.2f} seconds")
-                logger.info(f"{model_name} - Best Parameters: {search.best_params_}")
-                logger.info(f"{model_name} - CV Score: {search.best_score_:.4f}")
+                logger.info(f"{model_name} - Training time: {search['search_time']:.2f} seconds")
+                logger.info(f"{model_name} - Best Parameters: {search['best_params']}")
+                logger.info(f"{model_name} - CV Score: {search['best_score']:.4f}")
                 logger.info(f"{model_name} - Test Accuracy: {metrics['accuracy']:.4f}")
                 logger.info(f"{model_name} - Test Precision: {metrics['precision']:.4f}")
                 logger.info(f"{model_name} - Test Recall: {metrics['recall']:.4f}")
@@ -235,19 +424,71 @@ class ModelTraining:
             logger.info(f"Best Parameters: {best_params}")
             logger.info(f"{'='*60}")
             
+            if feature_cache is not None:
+                # The saved artifacts must pair the best model with the vectorizer it was trained on
+                state.tfidf_vectorizer = vectorizers[best_model_name]
+                state.X_train_tfidf = state.tfidf_vectorizer.transform(state.X_train)
+                state.X_test_tfidf = state.tfidf_vectorizer.transform(state.X_test)
+            
             state.trained_models = trained_models
             state.model_metrics = model_metrics
             state.best_model_name = best_model_name
             state.best_model = best_model
             state.best_params = best_params
             state.cv_results = cv_results
+            with stage_metrics.timer("train.featurizer_comparison"):
+                state.featurizer_comparison = self.compare_featurizers(state)
+            if ModelConfig.cascade_enabled:
+                with stage_metrics.timer("train.cascade"):
+                    state.cascade = self.build_cascade(state)
             
-            output_dir = self.save_pickle_files(state)
-            self.save_metrics_to_csv(state, output_dir)
+            with stage_metrics.timer("train.save_artifacts"):
+                output_dir = self.save_pickle_files(state)
+                self.save_metrics_to_csv(state, output_dir)
+            state.output_dir = output_dir
             logger.info("\nModel training completed successfully")
             logger.info(f"All outputs saved to: {output_dir}/")
             return state
             
         except Exception as e:
             logger.error(f"Failed to train models: {str(e)}")
-            raise e
\ No newline at end of file
+            raise e
+
+
+# ----------------------------------------------------------------------------
+# Function to pick the narrowest screen band that keeps the target agreement
+# ----------------------------------------------------------------------------
+def _tune_cascade_band(margins, screen_predictions, full_predictions, target_agreement):
+    """Return (lower, upper, agreement) so that margins <= lower or >= upper keep the screen's answer.
+
+    Emails are screened from the confident ends inwards, separately on each
+    side of the decision boundary, choosing the split that screens the most
+    emails while screen/full disagreements stay within the allowed
+    (1 - target_agreement) share.
+    """
+    margins = np.asarray(margins, dtype=np.float64)
+    disagree = np.asarray(screen_predictions) != np.asarray(full_predictions)
+    budget = int(np.floor((1 - target_agreement) * len(margins) + 1e-9))
+
+    negative = np.flatnonzero(margins <= 0)
+    negative = negative[np.argsort(margins[negative], kind="stable")]
+    positive = np.flatnonzero(margins > 0)
+    positive = positive[np.argsort(-margins[positive], kind="stable")]
+    negative_cost = np.concatenate([[0], np.cumsum(disagree[negative])])
+    positive_cost = np.concatenate([[0], np.cumsum(disagree[positive])])
+
+    feasible = np.flatnonzero(negative_cost <= budget)
+    k_positive = np.searchsorted(positive_cost, budget - negative_cost[feasible], side="right") - 1
+    best = int(np.argmax(feasible + k_positive))
+    k_negative, k_positive = int(feasible[best]), int(k_positive[best])
+
+    def threshold(order, k, sign):
+        if k == 0:
+            return sign * np.inf
+        if k == len(order):
+            return 0.0
+        return (margins[order[k - 1]] + margins[order[k]]) / 2
+
+    lower, upper = threshold(negative, k_negative, -1), threshold(positive, k_positive, 1)
+    agreement = 1 - (negative_cost[k_negative] + positive_cost[k_positive]) / max(len(margins), 1)
+    return lower, upper, float(agreement)
@@ -1,19 +1,117 @@
+import os
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class Config:
     training_data_path: str = "data/dataset/dataset.csv"
+    ingestion_chunk_rows: int = 100000
+    use_ingestion_cache: bool = True
+    ingestion_cache_dir: str = "outputs/ingestion_cache"
     validation_data_path: str = "data/dataset/All_mail_Including_Spam_and_Trash.mbox"
     OUTPUT_BASE_DIR: str = "outputs"
     model_path: str = "outputs/2025-12-25_14-02-05/models/SVM_model.pkl"
     feature_path: str = "outputs/2025-12-25_14-02-05/models/vectorizer.pkl"
+    # None serves the bundle exported next to model_path (<models dir>/bundle) when there is one; "" never uses a bundle
+    bundle_path: Optional[str] = None
+    use_fused_scorer: bool = True
+    # Serve a bundle's cascade (linear screen + full model for uncertain margins) when it has one
+    use_cascade: bool = True
+    # Overrides the recall knob (max_query_terms) of an indexed KNN model at inference; None keeps the trained one
+    knn_max_query_terms: Optional[int] = None
+    api_host: str = "127.0.0.1"
+    api_port: int = 8000
+    api_workers: int = 1
+    api_scoring_threads: int = 4
+    api_max_batch_size: int = 10000
+    api_coalesce: bool = True
+    coalesce_max_batch_size: int = 256
+    coalesce_max_wait_ms: float = 2.0
+    prediction_cache_size: int = 100000
+    prediction_cache_path: Optional[str] = None
+    prediction_batch_size: int = 1000
+    # Near-duplicate clustering: MinHash/LSH groups campaign variants so each cluster is scored once
+    # and its leader's result is shared; mbox CSVs gain Cluster and ClusterSize columns
+    near_duplicate_clustering: bool = False
+    near_duplicate_threshold: float = 0.8
+    minhash_num_perm: int = 64
+    minhash_shingle_size: int = 5
+    near_duplicate_max_clusters: int = 100000
+    prediction_workers: int = 1
+    parallel_chunk_bytes: int = 16 * 1024 * 1024
+    # Read mbox files through a <mbox>.idx sidecar (offsets + filter headers) built on first use
+    use_mbox_index: bool = False
+    # Per-mailbox offset and fingerprint of the last incremental run
+    mbox_state_path: str = "outputs/mbox_state.json"
+    batch_output_dir: str = "outputs/batch"
+    batch_output_format: str = "csv"
+    batch_shard_rows: int = 100000
+    batch_eml_files_per_unit: int = 500
+    incremental_registry_path: str = "outputs/incremental_latest.json"
+    metrics_enabled: bool = False
+    # Opt-in per-run profiling: None, 'cprofile' (.prof) or 'sampling' (folded stacks for flame graphs)
+    profile_mode: Optional[str] = None
+    profile_dir: str = "outputs/profiles"
+    profile_interval_ms: float = 5.0
+
+    def served_bundle_path(self) -> str:
+        """The bundle PredictionPipeline serves; it follows model_path unless bundle_path is set"""
+        if self.bundle_path is None:
+            return os.path.join(os.path.dirname(self.model_path), "bundle")
+        return self.bundle_path
+
 
 class ModelConfig:
+    # Hyperparameter search: 'grid', 'randomized' or 'halving'
+    search_strategy = 'grid'
+    n_iter = 20
+    # Optional budgets per model family (None = unlimited)
+    max_fits_per_model = None
+    max_seconds_per_model = None
+    # Number of model families searched concurrently in a process pool
+    parallel_families = 1
+    # Regularization paths: with the 'grid' strategy these families sweep the named parameter in
+    # ascending order inside each CV fold, warm-starting every fit from the previous value's
+    # solution (solvers without warm starts, such as liblinear, refit cold). Each fit runs until the
+    # solver's tolerance is met, capped at path_max_iter, so max_iter is not searched
+    # (LogisticRegression is built with max_iter=path_max_iter)
+    regularization_paths = {'LogisticRegression': 'C'}
+    path_max_iter = 1000
+    # Featurizer backend: 'tfidf' (vocabulary dict) or 'hashing' (fixed-size hashed TF-IDF)
+    featurizer = 'tfidf'
+    hashing_n_features = 2 ** 18
+    # 'global' fits TF-IDF once on the training split; 'per_fold' fits it inside every
+    # CV fold (leak-free) and memoizes the features per (fold, vectorizer params)
+    cv_featurization = 'global'
+    feature_cache_dir = "outputs/feature_cache"
+    vectorizer_params = {
+        'lowercase': [True],
+        'stop_words': ['english']
+    }
+    # Cascade: when the best model is not linear, a linear screen scores every email and only
+    # margins inside a band tuned to this agreement with the full model are sent to it
+    cascade_enabled = True
+    cascade_target_agreement = 0.995
+    cascade_cv_folds = 3
+    # KNN backend: 'inverted_index' (cosine similarity over postings lists, see knn_index.py)
+    # or 'sklearn' (KNeighborsClassifier brute force, also with cosine similarity)
+    knn_backend = 'inverted_index'
+    # Recall knob: how many of each query's heaviest TF-IDF terms walk their postings (None = exact
+    # search); the trained KNN is measured on the test split at every knn_recall_curve setting
+    knn_max_query_terms = None
+    knn_rerank_factor = 4
+    knn_recall_curve = [None, 32, 16, 8, 4]
+    # Incremental retraining: hashed features and a partial_fit linear model
+    incremental_n_features = 2 ** 20
+    incremental_model = {'loss': 'hinge', 'alpha': 1e-5}
+    incremental_epochs = 5
+    # Largest validation F1 drop an update may cause and still be promoted
+    incremental_max_f1_drop = 0.005
+
     models = {
         'LogisticRegression': {
             'C': [0.01, 0.1, 1, 10, 100],
-            'solver': ['lbfgs', 'liblinear'],
-            'max_iter': [100, 200, 300]
+            'solver': ['lbfgs', 'liblinear']
         },
         'DecisionTree': {
             'criterion': ['gini', 'entropy'],
@@ -28,8 +126,7 @@ class ModelConfig:
         },
         'KNN': {
             'n_neighbors': [3, 5, 7, 9, 11],
-            'weights': ['uniform', 'distance'],
-            'metric': ['euclidean', 'manhattan']
+            'weights': ['uniform', 'distance']
         },
         'RandomForest': {
             'n_estimators': [50, 100, 200],
@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional
+
+from src.config.config import Config
+from src.utils.logger import get_logger
+from src.utils.metrics import metrics, profile_run
+from src.utils.mbox_utils import iter_mbox_messages
+from src.utils.batch_utils import BatchCheckpoint, discover_inputs, iter_eml_messages, plan_work_units, write_shards
+from src.pipeline.prediction_pipeline import PredictionPipeline, output_columns
+
+logger = get_logger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SUMMARY_FILE = "batch_summary.json"
+
+class BatchPredictionPipeline:
+    """Classify many mbox files and .eml directories into sharded CSV/Parquet output.
+
+    Inputs are split into work units (byte ranges of large mbox files, groups
+    of .eml files) that a process pool classifies independently. Every unit
+    writes its own shards and is then recorded in checkpoint.jsonl, so an
+    interrupted run picks up where it stopped.
+    """
+
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        if self.config.metrics_enabled:
+            metrics.enabled = True
+
+    def run(self, inputs: List[str], output_dir: Optional[str] = None, workers: Optional[int] = None,
+            output_format: Optional[str] = None, shard_rows: Optional[int] = None,
+            batch_size: Optional[int] = None, resume: bool = True) -> Dict:
+        with profile_run("batch_prediction", self.config):
+            return self._run(inputs, output_dir, workers, output_format, shard_rows, batch_size, resume)
+
+    def _run(self, inputs, output_dir, workers, output_format, shard_rows, batch_size, resume):
+        try:
+            output_dir = output_dir or self.config.batch_output_dir
+            output_format = output_format or self.config.batch_output_format
+            shard_rows = shard_rows or self.config.batch_shard_rows
+            workers = workers or self.config.prediction_workers
+            workers = (os.cpu_count() or 1) if workers < 0 else workers
+            if output_format not in ("csv", "parquet"):
+                raise ValueError(f"Unknown output format: {output_format}")
+            if output_format == "parquet":
+                try:
+                    import pyarrow  # noqa: F401
+                except ImportError as e:
+                    raise ImportError("Writing Parquet shards requires pyarrow (pip install pyarrow)") from e
+
+            mbox_paths, eml_dirs = discover_inputs(inputs)
+            units = plan_work_units(mbox_paths, eml_dirs, self.config.parallel_chunk_bytes, self.config.batch_eml_files_per_unit)
+            os.makedirs(os.path.join(output_dir, "shards"), exist_ok=True)
+            checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+            checkpoint = BatchCheckpoint(checkpoint_path)
+            if not resume:
+                # Starting over: drop the shards the previous run recorded along with its checkpoint
+                for record in checkpoint.completed.values():
+                    for path in record["shards"]:
+                        if os.path.exists(path):
+                            os.remove(path)
+                if os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                checkpoint = BatchCheckpoint(checkpoint_path)
+
+            # Shards of sources that changed since they were recorded would otherwise sit next to the new ones
+            for path in checkpoint.discard_stale(units):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            pending = []
+            for index, unit in enumerate(units):
+                if checkpoint.is_done(unit):
+                    continue
+                unit_id = hashlib.blake2b(unit["key"].encode(), digest_size=4).hexdigest()
+                unit["prefix"] = os.path.join(output_dir, "shards", f"part-{index:05d}-{unit_id}")
+                pending.append(unit)
+
+            logger.info(f"Batch prediction: {len(mbox_paths)} mbox files, {sum(map(len, eml_dirs.values()))} .eml files, "
+                        f"{len(units)} work units ({len(units) - len(pending)} already done), {workers} workers")
+
+            since = metrics.snapshot() if metrics.enabled else None
+            progress = _Progress(len(units), len(units) - len(pending))
+            # The prediction columns (with Cluster and ClusterSize when clustering is on) plus the source file
+            task_args = (output_columns(self.config) + ["Source"], shard_rows, output_format, batch_size)
+            if workers <= 1 or len(pending) <= 1:
+                pipeline = PredictionPipeline(load_models=True, config=self.config)
+                for unit in pending:
+                    rows, shards = _process_unit(pipeline, unit, *task_args)
+                    checkpoint.record(unit, rows, shards)
+                    progress.update(rows)
+            else:
+                self._run_parallel(pending, workers, task_args, checkpoint, progress)
+            progress.finish()
+
+            summary = {
+                "inputs": [os.path.abspath(path) for path in inputs],
+                "units": len(units),
+                "rows": sum(checkpoint.completed[unit["key"]]["rows"] for unit in units),
+                "rows_this_run": progress.rows,
+                "seconds_this_run": round(progress.elapsed(), 3),
+                "format": output_format,
+                "shards": [path for unit in units for path in checkpoint.completed[unit["key"]]["shards"]],
+            }
+            with open(os.path.join(output_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+            if metrics.enabled:
+                metrics.write_observations(output_dir, since)
+
+            logger.info(f"Batch prediction completed: {summary['rows']} emails in {len(summary['shards'])} shards under {output_dir}")
+            return summary
+
+        except Exception as e:
+            logger.error(f"Batch prediction failed: {str(e)}")
+            raise e
+
+    def _run_parallel(self, pending, workers, task_args, checkpoint, progress):
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        units = iter(pending)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.config,)) as executor:
+            # Keep a bounded window in flight and checkpoint units as they finish, in any order
+            in_flight = {}
+            for unit in units:
+                in_flight[executor.submit(_process_unit_in_worker, unit, *task_args)] = unit
+                if len(in_flight) >= workers * 2:
+                    break
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit = in_flight.pop(future)
+                    rows, shards, worker_metrics = future.result()
+                    metrics.merge(worker_metrics)
+                    checkpoint.record(unit, rows, shards)
+                    progress.update(rows)
+                    next_unit = next(units, None)
+                    if next_unit is not None:
+                        in_flight[executor.submit(_process_unit_in_worker, next_unit, *task_args)] = next_unit
+
+
+class _Progress:
+    """Live units / emails / emails-per-second line on stderr (logs only go to the log file).
+
+    On a terminal the line is redrawn after every unit; otherwise it is
+    printed every LOG_INTERVAL seconds so redirected output stays readable.
+    """
+
+    LOG_INTERVAL = 10.0
+
+    def __init__(self, total_units, done_units):
+        self.total_units = total_units
+        self.done_units = done_units
+        self.rows = 0
+        self.start = time.perf_counter()
+        self.last_print = self.start
+        self.interactive = sys.stderr.isatty()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def line(self):
+        return (f"{self.done_units}/{self.total_units} units, {self.rows:,} emails, "
+                f"{self.rows / max(self.elapsed(), 1e-9):,.0f} emails/s")
+
+    def update(self, rows):
+        self.done_units += 1
+        self.rows += rows
+        if self.interactive:
+            sys.stderr.write(f"\r{self.line()}   ")
+            sys.stderr.flush()
+        elif time.perf_counter() - self.last_print >= self.LOG_INTERVAL:
+            self.last_print = time.perf_counter()
+            print(self.line(), file=sys.stderr, flush=True)
+
+    def finish(self):
+        line = self.line()
+        print(f"\r{line}   " if self.interactive else line, file=sys.stderr, flush=True)
+        logger.info(line)
+
+
+# ----------------------------------------------------------------------------
+# Work units: parse, classify and write the shards of one unit
+# ----------------------------------------------------------------------------
+def _iter_unit_messages(unit):
+    if unit["kind"] == "mbox":
+        for message in iter_mbox_messages(unit["path"], unit["start"], unit["end"]):
+            yield unit["path"], message
+    else:
+        yield from iter_eml_messages(unit["files"])
+
+
+def _process_unit(pipeline, unit, columns, shard_rows, output_format, batch_size):
+    rows = []
+    for source, message in metrics.timed_iter("predict.mbox_parse", _iter_unit_messages(unit)):
+        row = pipeline.parse_message(message)
+        row["Source"] = source
+        rows.append(row)
+    # Near-duplicates are clustered across the whole unit, so cluster ids are row numbers within the unit
+    with pipeline.near_duplicate_run():
+        rows = [mail for batch in pipeline.iter_predictions(rows, batch_size=batch_size) for mail in batch]
+    if "ClusterSize" in columns:
+        cluster_sizes = Counter(mail["Cluster"] for mail in rows)
+        for mail in rows:
+            mail["ClusterSize"] = cluster_sizes[mail["Cluster"]]
+    with metrics.timer("predict.write_shards"):
+        shards = write_shards(rows, unit["prefix"], columns, shard_rows, output_format)
+    return len(rows), shards
+
+
+_worker_pipeline = None
+
+def _init_worker(config: Optional[Config] = None) -> None:
+    global _worker_pipeline
+    # The pipeline turns the worker's metrics registry on when config.metrics_enabled is set
+    _worker_pipeline = PredictionPipeline(load_models=True, config=config)
+
+
+def _process_unit_in_worker(unit, columns, shard_rows, output_format, batch_size):
+    metrics.reset()
+    rows, shards = _process_unit(_worker_pipeline, unit, columns, shard_rows, output_format, batch_size)
+    return rows, shards, metrics.snapshot() if metrics.enabled else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify mbox files and directories of .eml files into sharded output")
+    parser.add_argument("inputs", nargs="+", help="mbox files, .eml files, or directories to search for both")
+    parser.add_argument("-o", "--output-dir", help="Directory for shards, checkpoint.jsonl and batch_summary.json")
+    parser.add_argument("-w", "--workers", type=int, help="Worker processes (-1 = one per CPU)")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], help="Shard format")
+    parser.add_argument("--shard-rows", type=int, help="Maximum rows per shard file")
+    parser.add_argument("--batch-size", type=int, help="Emails per vectorized predict call")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+    BatchPredictionPipeline().run(args.inputs, args.output_dir, args.workers, args.format,
+                                  args.shard_rows, args.batch_size, resume=not args.no_resume)
@@ -0,0 +1,41 @@
+import argparse
+
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation
+from src.components.incremental_training import IncrementalTraining
+from src.utils.state import TrainingState
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class IncrementalTrainingPipeline:
+    """Fold newly labeled mail into the hashed-feature model without a full retrain"""
+
+    def __init__(self):
+        self.state = TrainingState()
+
+    def run_pipeline(self, data_path=None):
+        try:
+            logger.info("Initiating incremental training pipeline")
+            # The held-out split of dataset.csv is the validation set for the promotion gate
+            self.state = DataIngestion().load_data(self.state)
+            self.state = DataTransformation().split_data(self.state)
+
+            trainer = IncrementalTraining()
+            if data_path is None:
+                models_dir = trainer.bootstrap(self.state)
+            else:
+                models_dir = trainer.update(self.state, data_path)
+
+            logger.info(f"Incremental training completed: {models_dir}")
+            return models_dir
+
+        except Exception as e:
+            logger.error(f"Incremental pipeline failed: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental retraining from new labeled mail")
+    parser.add_argument("data_path", nargs="?", help="CSV of new labeled mail (Category, Message); omit to bootstrap")
+    args = parser.parse_args()
+    IncrementalTrainingPipeline().run_pipeline(args.data_path)
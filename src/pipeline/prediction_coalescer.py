@@ -0,0 +1,97 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class PredictionCoalescer:
+    """Coalesce concurrent single-email predictions into vectorized batches.
+
+    Callers submit one email body at a time. A background thread gathers
+    pending requests until max_batch_size is reached or max_wait_ms has passed
+    since the first one arrived, scores them with one predict_emails call and
+    resolves each caller's Future with its own result. Defaults come from the
+    pipeline's config.
+    """
+
+    def __init__(self, pipeline, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        config = pipeline.config
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size or config.coalesce_max_batch_size
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.coalesce_max_wait_ms) / 1000
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="prediction-coalescer", daemon=True)
+        self._thread.start()
+
+    def submit(self, email_body: str) -> Future:
+        future = Future()
+        self._queue.put((email_body, future))
+        return future
+
+    def predict(self, email_body: str, timeout: Optional[float] = None) -> Dict:
+        return self.submit(email_body).result(timeout=timeout)
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+        logger.info(f"Coalescer closed after {self.requests} requests in {self.batches} batches")
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._score(batch)
+            if stop:
+                return
+
+    def _score(self, batch) -> None:
+        bodies = [email_body for email_body, _ in batch]
+        try:
+            results = self.pipeline.predict_emails(bodies)
+        except Exception as e:
+            logger.error(f"Coalesced prediction of {len(batch)} emails failed, scoring them one by one: {str(e)}")
+            self._score_each(batch)
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _score_each(self, batch) -> None:
+        """Score a failed batch one email at a time, so only the emails that fail on their own get the exception"""
+        for email_body, future in batch:
+            try:
+                result = self.pipeline.predict_emails([email_body])[0]
+            except Exception as e:
+                logger.error(f"Prediction of a coalesced email failed: {str(e)}")
+                future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += 1
+            future.set_result(result)
@@ -1,55 +1,272 @@
+import os
+import math
 import mailbox
 import pickle
+import shutil
 import time
-import pandas as pd
-from typing import Dict, List, Optional
+import threading
+import numpy as np
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
 from pathlib import Path
 
 from src.utils.state import PredictionState
 from src.utils.logger import get_logger
 from src.config.config import Config
+from src.components.inference_bundle import InferenceBundle
 from src.utils.email_utils import extract_body, all_recipients, clean_text
+from src.utils.mbox_utils import (iter_mbox_messages, split_mbox_ranges, mailbox_fingerprint, is_message_boundary,
+                                  load_mbox_state, save_mbox_state)
+from src.utils.mbox_index import MboxIndex
+from src.utils.near_duplicates import NearDuplicateIndex
+from src.utils.utils import iter_batches
+from src.utils.prediction_cache import PredictionCache, artifact_identity, content_key
+from src.utils.metrics import metrics, profile_run
+
+# pandas, the process pool and the model libraries are imported where they are first needed,
+# so scoring a single email does not pay their import time
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = get_logger(__name__)
 
+PREDICTION_COLUMNS = ["Time", "Recipients", "Subject", "Body", "Category", "Direction", "Prediction"]
+# Added to mbox outputs when near-duplicate clustering is on: the row number of the cluster's leader and its size
+CLUSTER_COLUMNS = ["Cluster", "ClusterSize"]
+
+# ----------------------------------------------------------------------------
+# Function to list the columns of mbox prediction output for a config
+# ----------------------------------------------------------------------------
+def output_columns(config: Config) -> List[str]:
+    return PREDICTION_COLUMNS + CLUSTER_COLUMNS if config.near_duplicate_clustering else PREDICTION_COLUMNS
+
+
 class PredictionPipeline:
-    def __init__(self, load_models: bool = True):
-        self.config = Config()
+    def __init__(self, load_models: bool = True, config: Optional[Config] = None):
+        self.config = config or Config()
+        # Only ever switch the process-wide registry on, so another pipeline's config cannot turn it off
+        if self.config.metrics_enabled:
+            metrics.enabled = True
         self.mailbox = None
         self.feature_transformer = None
         self.model = None
+        self.scorer = None
+        self.cascade = None
+        self.loaded_artifacts = None
+        self.loaded_settings = None
+        self.cache = None
+        # The near-duplicate index of the run in progress; per thread, since the API scores concurrent requests
+        self._run_state = threading.local()
+        
+        if self.config.prediction_cache_size > 0:
+            self.cache = PredictionCache(self.config.prediction_cache_size, self.config.prediction_cache_path)
         
         if load_models:
             self._load_models()
     
+    def _artifact_paths(self) -> tuple:
+        return (self.config.served_bundle_path(), self.config.feature_path, self.config.model_path)
+
+    def _serving_settings(self) -> Dict:
+        """Config values that change what the loaded artifacts return, so they are part of the cache identity"""
+        return {
+            "use_fused_scorer": self.config.use_fused_scorer,
+            "use_cascade": self.config.use_cascade,
+            "knn_max_query_terms": self.config.knn_max_query_terms,
+        }
+
     def _load_models(self) -> None:
 
         logger.info("Loading models...")
-        self.feature_transformer = pickle.load(open(self.config.feature_path, "rb"))
-        self.model = pickle.load(open(self.config.model_path, "rb"))
-        logger.info("Models loaded successfully")
+        bundle_path = self.config.served_bundle_path()
+        if InferenceBundle.is_bundle(bundle_path):
+            bundle = InferenceBundle.load(bundle_path)
+            self.feature_transformer = bundle.feature_transformer
+            self.model = bundle.model
+            self.scorer = bundle.scorer if self.config.use_fused_scorer else None
+            self.cascade = bundle.cascade if self.config.use_cascade else None
+            featurizer = bundle.manifest.get("featurizer", "tfidf")
+        else:
+            with open(self.config.feature_path, "rb") as f:
+                self.feature_transformer = pickle.load(f)
+            with open(self.config.model_path, "rb") as f:
+                self.model = pickle.load(f)
+            self.scorer = None
+            self.cascade = None
+            featurizer = type(self.feature_transformer).__name__
+        if self.config.knn_max_query_terms is not None and hasattr(self.model, "max_query_terms"):
+            self.model.max_query_terms = self.config.knn_max_query_terms
+        
+        self.loaded_artifacts = self._artifact_paths()
+        self.loaded_settings = self._serving_settings()
+        if self.cache is not None:
+            self.cache.set_identity(artifact_identity(*self.loaded_artifacts, settings=self.loaded_settings))
+        logger.info(f"Models loaded successfully (featurizer: {featurizer})")
+
+    def _ensure_models(self) -> None:
+        """Load the models on first use, and reload them if the configured artifact paths or serving settings changed"""
+
+        if (self.model is None or self.feature_transformer is None or self.loaded_artifacts != self._artifact_paths()
+                or self.loaded_settings != self._serving_settings()):
+            self._load_models()
     
     def predict_single_email(self, email_body: str) -> Dict:
-        if self.model is None or self.feature_transformer is None:
-            self._load_models()
+        return self.predict_emails([email_body])[0]
 
-        cleaned_body = clean_text(email_body)
-        features = self.feature_transformer.transform([cleaned_body])
-        prediction = self.model.predict(features)
-        prediction_label = "Spam" if str(prediction[0]) == "0" else "Ham"
-        
+    def predict_emails(self, email_bodies: List[str]) -> List[Dict]:
+        """Clean and classify several raw email bodies with one vectorized predict call"""
+
+        self._ensure_models()
+        with metrics.timer("predict.clean_text"):
+            cleaned_bodies = [clean_text(email_body) for email_body in email_bodies]
+        return self._predict_cleaned(cleaned_bodies)
+
+    def _predict_cleaned(self, cleaned_bodies: List[str]) -> List[Dict]:
+        if not self.config.near_duplicate_clustering:
+            return self._predict_cached(cleaned_bodies)
+        # Inside near_duplicate_run() clusters span every batch of the run, otherwise just this call
+        clusters = self.clusters if self.clusters is not None else self._new_cluster_index()
+        return self._predict_clustered(cleaned_bodies, clusters)
+
+    def _predict_clustered(self, cleaned_bodies: List[str], clusters: NearDuplicateIndex) -> List[Dict]:
+        """Score the first email of each near-duplicate cluster and share its result with the later members"""
+
+        with metrics.timer("predict.near_duplicates"):
+            cluster_ids, new = clusters.add([body or "" for body in cleaned_bodies])
+        leaders = np.flatnonzero(new)
+        scored = dict(zip(cluster_ids[leaders].tolist(), self._predict_cached([cleaned_bodies[i] for i in leaders])))
+        for cluster_id, result in scored.items():
+            clusters.remember(cluster_id, result)
+        metrics.count("predict.near_duplicates.shared", len(cleaned_bodies) - len(leaders))
+        return [dict(scored.get(cluster_id) or clusters.results[cluster_id], cluster=cluster_id)
+                for cluster_id in cluster_ids.tolist()]
+
+    def _new_cluster_index(self, first_row: int = 0) -> NearDuplicateIndex:
+        return NearDuplicateIndex(self.config.near_duplicate_threshold, self.config.minhash_num_perm,
+                                  self.config.minhash_shingle_size, self.config.near_duplicate_max_clusters, first_row)
+
+    @property
+    def clusters(self) -> Optional[NearDuplicateIndex]:
+        return getattr(self._run_state, "clusters", None)
+
+    @clusters.setter
+    def clusters(self, clusters: Optional[NearDuplicateIndex]) -> None:
+        self._run_state.clusters = clusters
+
+    @contextmanager
+    def near_duplicate_run(self, first_row: int = 0):
+        """Share one near-duplicate index across every batch scored inside the block (when clustering is on)"""
+
+        previous = self.clusters
+        self.clusters = self._new_cluster_index(first_row) if self.config.near_duplicate_clustering else None
         try:
-            prediction_proba = self.model.predict_proba(features)
-            confidence = float(max(prediction_proba[0])) * 100
-        except:
-            confidence = None
+            yield self.clusters
+        finally:
+            self.clusters = previous
+
+    def output_columns(self) -> List[str]:
+        return output_columns(self.config)
+
+    def _predict_cached(self, cleaned_bodies: List[str]) -> List[Dict]:
+        """Serve cached results by content hash and score only the distinct uncached bodies"""
+
+        if self.cache is None:
+            return self._score_cleaned(cleaned_bodies)
+
+        keys = [content_key(body or "") for body in cleaned_bodies]
+        results = self.cache.get_many(keys)
+        pending = {}
+        for key, body in zip(keys, cleaned_bodies):
+            if key not in results:
+                pending.setdefault(key, body)
+        
+        if pending:
+            scored = dict(zip(pending, self._score_cleaned(list(pending.values()))))
+            self.cache.put_many(scored)
+            results.update(scored)
+        
+        return [dict(results[key]) for key in keys]
+
+    def _score_cleaned(self, cleaned_bodies: List[str]) -> List[Dict]:
+        metrics.count("predict.scored", len(cleaned_bodies))
+        metrics.observe("predict.batch_size", len(cleaned_bodies))
+        if self.scorer is not None:
+            with metrics.timer("predict.fused_score"):
+                # Bundles exported from a logistic-loss model score probabilities as the sigmoid of the margin
+                if hasattr(self.scorer, "predict_proba"):
+                    prediction_proba = self.scorer.predict_proba(cleaned_bodies)
+                    predictions = self.scorer.classes_[prediction_proba.argmax(axis=1)]
+                    confidences = [float(max(proba)) * 100 for proba in prediction_proba]
+                else:
+                    predictions = self.scorer.predict(cleaned_bodies)
+                    confidences = [None] * len(predictions)
+        elif self.cascade is not None:
+            with metrics.timer("predict.cascade"):
+                predictions, escalated, probabilities = self.cascade.predict(cleaned_bodies, return_confidence=True)
+            n_escalated = int(escalated.sum())
+            metrics.count("predict.cascade.screened", len(cleaned_bodies) - n_escalated)
+            metrics.count("predict.cascade.escalated", n_escalated)
+            confidences = [None if np.isnan(probability) else float(probability) * 100 for probability in probabilities]
+        else:
+            with metrics.timer("predict.vectorize"):
+                features = self.feature_transformer.transform(cleaned_bodies)
+            with metrics.timer("predict.model"):
+                predictions = self.model.predict(features)
+                
+                # SVC without probability=True hides predict_proba, so check instead of calling and catching
+                if hasattr(self.model, "predict_proba"):
+                    prediction_proba = self.model.predict_proba(features)
+                    confidences = [float(max(proba)) * 100 for proba in prediction_proba]
+                else:
+                    confidences = [None] * len(predictions)
         
+        return [
+            {
+                'prediction': "Spam" if str(prediction) == "0" else "Ham",
+                'confidence': confidence,
+                'raw_prediction': int(prediction)
+            }
+            for prediction, confidence in zip(predictions, confidences)
+        ]
+
+    def cascade_report(self, since: Optional[tuple] = None) -> Optional[Dict]:
+        """Fraction of emails settled by the linear screen vs escalated to the full model, and the throughput gain.
+
+        Covers the pipeline's lifetime, or only what came after since, a
+        CascadeClassifier.totals() snapshot. The gain compares the time
+        actually spent with the estimated time of sending every email to the
+        full model at its measured per-email cost.
+        """
+        if self.cascade is None:
+            return None
+        totals = self.cascade.totals()
+        screened, escalated, screen_seconds, full_seconds = (
+            tuple(total - before for total, before in zip(totals, since)) if since is not None else totals
+        )
+        if not screened:
+            return None
+        cascade_seconds = screen_seconds + full_seconds
+        full_per_email = full_seconds / escalated if escalated else None
         return {
-            'prediction': prediction_label,
-            'confidence': confidence,
-            'raw_prediction': int(prediction[0])
+            "emails": screened,
+            "screen_fraction": 1 - escalated / screened,
+            "escalated_fraction": escalated / screened,
+            "screen_seconds": screen_seconds,
+            "full_seconds": full_seconds,
+            "emails_per_second": screened / max(cascade_seconds, 1e-9),
+            "estimated_speedup": screened * full_per_email / max(cascade_seconds, 1e-9) if full_per_email else None,
         }
 
+    def _log_cascade_report(self, since: Optional[tuple] = None) -> None:
+        report = self.cascade_report(since)
+        if report is not None:
+            speedup = f"{report['estimated_speedup']:.1f}x" if report["estimated_speedup"] else "n/a"
+            logger.info(f"Cascade: {report['screen_fraction']:.1%} of {report['emails']} emails settled by the screen, "
+                        f"{report['escalated_fraction']:.1%} escalated, {report['emails_per_second']:.0f} emails/s "
+                        f"(estimated {speedup} vs full model only)")
+
     def load_mailbox(self, mailbox_path: str) -> None:
         """Load MBOX file"""
 
@@ -57,7 +274,41 @@ class PredictionPipeline:
         self.mailbox = mailbox.mbox(mailbox_path)
         logger.info(f"Loaded mailbox from {mailbox_path}")
 
-    def process_mailbox(self, mailbox_path: Optional[str] = None) -> List[Dict]:
+    def parse_message(self, message) -> Dict:
+        labels = (message.get("X-Gmail-Labels") or "").lower()
+        category = (
+            "Spam" if "spam" in labels else
+            "Promotions" if "category_promotions" in labels else
+            "Social" if "category_social" in labels else
+            "Updates" if "category_updates" in labels else
+            "Inbox"
+        )
+        time_str = message.get("Date", "")
+        raw_recipients = all_recipients(message)
+        with metrics.timer("predict.extract_body"):
+            raw_body = extract_body(message)
+        with metrics.timer("predict.clean_text"):
+            recipients = clean_text(raw_recipients)
+            subject = clean_text(message.get("Subject", ""))
+            body = clean_text(raw_body)
+        direction = "Sent" if "Sent" in (message.get("X-Gmail-Labels") or "") else "Received"
+        
+        return {
+            "Time": time_str,
+            "Recipients": recipients,
+            "Subject": subject,
+            "Body": body,
+            "Category": category,
+            "Direction": direction
+        }
+
+    def process_mailbox(self, mailbox_path: Optional[str] = None, workers: Optional[int] = None) -> List[Dict]:
+        workers = self._resolve_workers(workers)
+        if mailbox_path and workers > 1:
+            data = [mail for batch in self.iter_mailbox_batches(mailbox_path, classify=False, workers=workers) for mail in batch]
+            logger.info(f"Processed {len(data)} emails from mailbox with {workers} workers")
+            return data
+
         if mailbox_path:
             self.load_mailbox(mailbox_path)
         
@@ -65,71 +316,367 @@ class PredictionPipeline:
             raise ValueError("No mailbox loaded. Call load_mailbox() first.")
         
         logger.info("Processing mailbox")
-        data = []
-        
-        for message in self.mailbox:
-            labels = (message.get("X-Gmail-Labels") or "").lower()
-            category = (
-                "Spam" if "spam" in labels else
-                "Promotions" if "category_promotions" in labels else
-                "Social" if "category_social" in labels else
-                "Updates" if "category_updates" in labels else
-                "Inbox"
-            )
-            time_str = message.get("Date", "")
-            recipients = clean_text(all_recipients(message))
-            subject = clean_text(message.get("Subject", ""))
-            body = clean_text(extract_body(message))
-            direction = "Sent" if "Sent" in (message.get("X-Gmail-Labels") or "") else "Received"
-            
-            data.append({
-                "Time": time_str,
-                "Recipients": recipients,
-                "Subject": subject,
-                "Body": body,
-                "Category": category,
-                "Direction": direction
-            })
+        data = [self.parse_message(message) for message in metrics.timed_iter("predict.mbox_parse", self.mailbox)]
         
         logger.info(f"Processed {len(data)} emails from mailbox")
         self.mailbox.close()
         
         return data
-    
-    def run_prediction(self, mail_data: List[Dict]) -> List[Dict]:
-        if self.model is None or self.feature_transformer is None:
-            self._load_models()
+
+    def _resolve_workers(self, workers: Optional[int]) -> int:
+        workers = workers or self.config.prediction_workers
+        return (os.cpu_count() or 1) if workers < 0 else workers
+
+    def iter_mailbox(self, mailbox_path: str, selection=None, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        """Stream parsed emails from an MBOX file, one message in memory at a time
+
+        With a selection (message numbers from select_messages) only those
+        messages are read, by seeking through the mailbox's sidecar index.
+        Otherwise start/end limit the stream to a byte range of the file.
+        """
+
+        if selection is None:
+            logger.info(f"Streaming mailbox from {mailbox_path}" + (f" at byte {start}" if start else ""))
+            messages = iter_mbox_messages(mailbox_path, start, end)
+        else:
+            logger.info(f"Reading {len(selection)} indexed messages from {mailbox_path}")
+            messages = MboxIndex.open(mailbox_path).iter_messages(selection)
+        for message in metrics.timed_iter("predict.mbox_parse", messages):
+            yield self.parse_message(message)
+
+    def select_messages(self, mailbox_path: str, labels: Optional[Iterable[str]] = None, since=None, until=None,
+                        min_offset: Optional[int] = None):
+        """Message numbers of an MBOX file matching the filters, from its sidecar index (built on first use)"""
+
+        index = MboxIndex.open(mailbox_path)
+        selection = index.select(labels=labels, since=since, until=until, min_offset=min_offset)
+        logger.info(f"Selected {len(selection)} of {len(index)} messages from {mailbox_path}")
+        return selection
+
+    def iter_predictions(self, mail_rows: Iterable[Dict], batch_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Classify a stream of parsed emails in micro-batches, yielding each batch once predicted"""
+
+        self._ensure_models()
+
+        batch_size = batch_size or self.config.prediction_batch_size
+        for batch in iter_batches(mail_rows, batch_size):
+            self._apply_predictions(batch)
+            yield batch
+
+    def iter_mailbox_batches(self, mailbox_path: str, classify: bool = True, batch_size: Optional[int] = None,
+                             workers: Optional[int] = None, selection=None, start: int = 0,
+                             end: Optional[int] = None) -> Iterator[List[Dict]]:
+        """Yield parsed (and optionally classified) emails in mailbox order, serially or across a process pool"""
+
+        workers = self._resolve_workers(workers)
+        if selection is None and self.config.use_mbox_index and start == 0 and end is None:
+            selection = np.arange(len(MboxIndex.open(mailbox_path)))
+        if workers <= 1:
+            rows = self.iter_mailbox(mailbox_path, selection, start, end)
+            if classify:
+                yield from self.iter_predictions(rows, batch_size=batch_size)
+            else:
+                yield from iter_batches(rows, batch_size or self.config.prediction_batch_size)
+            return
+
+        if selection is not None:
+            # The index gives every message's size, so parts hold even byte counts without scanning for boundaries
+            index = MboxIndex.open(mailbox_path)
+            selected_bytes = int((index.ends[selection] - index.starts[selection]).sum()) if len(selection) else 0
+            parts = index.split(selection, max(workers * 4, math.ceil(selected_bytes / self.config.parallel_chunk_bytes)))
+            tasks = [(_process_indexed, (mailbox_path, part, classify, batch_size)) for part in parts]
+            logger.info(f"Processing {len(selection)} indexed messages of {mailbox_path} in {len(parts)} parts with {workers} workers")
+        else:
+            end = os.path.getsize(mailbox_path) if end is None else end
+            n_ranges = max(workers * 4, math.ceil((end - start) / self.config.parallel_chunk_bytes))
+            ranges = split_mbox_ranges(mailbox_path, n_ranges, start, end)
+            tasks = [(_process_range, (mailbox_path, start, end, classify, batch_size)) for start, end in ranges]
+            logger.info(f"Processing {mailbox_path} in {len(ranges)} byte ranges with {workers} workers")
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        def in_order(executor):
+            # Keep a bounded window of ranges in flight and yield results in submission order
+            pending = deque()
+            for task, args in tasks:
+                pending.append(executor.submit(task, *args))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+
+        # Workers number cluster leaders from the start of their range; shift them to rows of the whole run
+        first_row = self.clusters.next_row if self.clusters is not None else 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(classify, self.config)) as executor:
+            for future in in_order(executor):
+                rows = self._collect_range(future, first_row)
+                first_row += len(rows)
+                yield rows
+
+    def _collect_range(self, future, first_row: int = 0) -> List[Dict]:
+        rows, worker_metrics, cascade_totals = future.result()
+        # Fold the worker's stage timings into this process so breakdowns cover parallel runs too
+        metrics.merge(worker_metrics)
+        if cascade_totals is not None and self.cascade is not None:
+            self.cascade.merge(cascade_totals)
+        if first_row and rows and "Cluster" in rows[0]:
+            for mail in rows:
+                mail["Cluster"] += first_row
+        return rows
+
+    def _apply_predictions(self, batch: List[Dict]) -> None:
+        """Classify a batch of parsed emails in place, adding the cluster id when clustering is on"""
+
+        for mail, result in zip(batch, self._predict_cleaned([mail.get('Body', '') for mail in batch])):
+            mail["Prediction"] = result['prediction']
+            if 'cluster' in result:
+                mail["Cluster"] = result['cluster']
+
+    def run_prediction(self, mail_data: List[Dict], batch_size: Optional[int] = None) -> List[Dict]:
+        self._ensure_models()
         
+        batch_size = batch_size or self.config.prediction_batch_size
         start_time = time.time()
-        logger.info("Running predictions")
+        logger.info(f"Running predictions (batch size: {batch_size})")
         
-        for mail in mail_data:
-            body_text = mail.get('Body', '')
-            features = self.feature_transformer.transform([body_text])
-            prediction = self.model.predict(features)
-            prediction_label = "Spam" if str(prediction[0]) == "0" else "Ham"
-            mail["Prediction"] = prediction_label
+        for start in range(0, len(mail_data), batch_size):
+            self._apply_predictions(mail_data[start:start + batch_size])
         
         end_time = time.time()
         logger.info(f"Prediction completed in {end_time - start_time:.2f} seconds")
         
         return mail_data
     
-    def predict_mbox_file(self, mailbox_path: str, output_path: Optional[str] = None) -> pd.DataFrame:
-        mail_data = self.process_mailbox(mailbox_path)
-        mail_data = self.run_prediction(mail_data)
-        df = pd.DataFrame(mail_data)
-        if output_path:
-            df.to_csv(output_path, index=False)
-            logger.info(f"Predictions saved to {output_path}")
+    @contextmanager
+    def _instrumented_run(self, run_name: str, first_row: int = 0):
+        """Profile a run when profile_mode is set and write its stage breakdown when metrics are enabled"""
+
+        since = metrics.snapshot() if metrics.enabled else None
+        # The cascade counters span the pipeline's lifetime, so the run's report is the difference
+        cascade = self.cascade
+        cascade_since = cascade.totals() if cascade is not None else None
+        with profile_run(run_name, self.config), self.near_duplicate_run(first_row):
+            yield
+        self._log_cascade_report(cascade_since if self.cascade is cascade else None)
+        if metrics.enabled:
+            output_dir = os.path.join(self.config.OUTPUT_BASE_DIR, datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+            metrics.write_observations(output_dir, since)
+
+    def predict_mbox_file(self, mailbox_path: str, output_path: Optional[str] = None,
+                          batch_size: Optional[int] = None, workers: Optional[int] = None, selection=None) -> 'pd.DataFrame':
+        import pandas as pd
+
+        with self._instrumented_run("predict_mbox_file"):
+            if self._resolve_workers(workers) > 1 or selection is not None or self.config.use_mbox_index:
+                mail_data = [mail for batch in self.iter_mailbox_batches(mailbox_path, batch_size=batch_size, workers=workers,
+                                                                          selection=selection) for mail in batch]
+            else:
+                mail_data = self.process_mailbox(mailbox_path)
+                mail_data = self.run_prediction(mail_data, batch_size=batch_size)
+            df = pd.DataFrame(mail_data)
+            if "Cluster" in df:
+                df["ClusterSize"] = df.groupby("Cluster")["Cluster"].transform("size")
+                self._log_cluster_report(Counter(df["Cluster"].tolist()))
+            if output_path:
+                df.to_csv(output_path, index=False)
+                logger.info(f"Predictions saved to {output_path}")
         return df
 
+    def predict_mbox_to_csv(self, mailbox_path: str, output_path: str, batch_size: Optional[int] = None,
+                            workers: Optional[int] = None, selection=None, start: int = 0, end: Optional[int] = None,
+                            append: bool = False, first_row: int = 0) -> int:
+        """Stream an MBOX file through parsing and prediction, appending rows to a CSV as each batch completes
+
+        With near-duplicate clustering, cluster ids are row numbers counted
+        from first_row (the rows already in an appended file), and ClusterSize
+        is filled in once the run has seen every member.
+        """
+        import pandas as pd
+
+        start_time = time.time()
+        total = 0
+        columns = self.output_columns()
+        cluster_sizes = Counter()
+        data_start = os.path.getsize(output_path) if append else 0
+        with self._instrumented_run("predict_mbox_to_csv", first_row), open(output_path, "a" if append else "w", newline="", encoding="utf-8") as f:
+            for batch in self.iter_mailbox_batches(mailbox_path, batch_size=batch_size, workers=workers,
+                                                   selection=selection, start=start, end=end):
+                with metrics.timer("predict.write_csv"):
+                    pd.DataFrame(batch, columns=columns).to_csv(f, header=(total == 0 and not append), index=False)
+                cluster_sizes.update(mail["Cluster"] for mail in batch if "Cluster" in mail)
+                total += len(batch)
+            
+            if total == 0 and not append:
+                pd.DataFrame(columns=columns).to_csv(f, index=False)
+
+        if cluster_sizes:
+            with metrics.timer("predict.write_cluster_sizes"):
+                self._write_cluster_sizes(output_path, data_start, cluster_sizes)
+            self._log_cluster_report(cluster_sizes)
+        logger.info(f"Streamed {total} predictions to {output_path} in {time.time() - start_time:.2f} seconds")
+        return total
+
+    def _write_cluster_sizes(self, output_path: str, data_start: int, cluster_sizes: Counter) -> None:
+        """Rewrite the rows written from byte data_start with the final size of each row's cluster"""
+        import pandas as pd
+
+        columns = self.output_columns()
+        tmp_path = f"{output_path}.tmp"
+        with open(output_path, "rb") as src, open(tmp_path, "w", newline="", encoding="utf-8") as dst:
+            src.seek(data_start)
+            chunks = pd.read_csv(src, header=0 if data_start == 0 else None, names=columns, dtype=str,
+                                 keep_default_na=False, chunksize=self.config.prediction_batch_size * 10)
+            for number, chunk in enumerate(chunks):
+                chunk["ClusterSize"] = chunk["Cluster"].astype("int64").map(cluster_sizes)
+                chunk.to_csv(dst, header=(data_start == 0 and number == 0), index=False)
+        if data_start == 0:
+            os.replace(tmp_path, output_path)
+            return
+        with open(output_path, "r+b") as f, open(tmp_path, "rb") as rewritten:
+            f.truncate(data_start)
+            f.seek(data_start)
+            shutil.copyfileobj(rewritten, f)
+        os.remove(tmp_path)
+
+    def _log_cluster_report(self, cluster_sizes: Counter) -> None:
+        emails = sum(cluster_sizes.values())
+        logger.info(f"Near-duplicate clustering: {emails} emails in {len(cluster_sizes)} clusters, "
+                    f"{emails - len(cluster_sizes)} shared a leader's result, largest cluster {max(cluster_sizes.values())} emails")
+
+    def predict_mbox_incremental(self, mailbox_path: str, output_path: str, batch_size: Optional[int] = None,
+                                 workers: Optional[int] = None) -> Dict:
+        """Classify only the messages appended to an MBOX file since the last run, appending them to output_path.
+
+        The byte offset reached and a fingerprint of the file up to it are kept
+        per mailbox in mbox_state_path. A file that was rewritten rather than
+        appended to (or a missing or different results file) gets a full run.
+        """
+        try:
+            key = os.path.abspath(mailbox_path)
+            states = load_mbox_state(self.config.mbox_state_path)
+            previous = states.get(key)
+            # Only read up to the size seen now; mail appended during the run is picked up next time
+            size = os.path.getsize(mailbox_path)
+            mode = self._incremental_mode(mailbox_path, output_path, previous, size)
+            if mode == "unchanged":
+                logger.info(f"No new messages in {mailbox_path} since byte {size}")
+                return {"mode": mode, "new_messages": 0, "start": size, "end": size, "messages": previous["messages"]}
+
+            start = previous["offset"] if mode == "append" else 0
+            if mode == "append":
+                # Drop any rows a crashed run appended after the last saved state
+                with open(output_path, "r+b") as f:
+                    f.truncate(previous["output_size"])
+            new_messages = self.predict_mbox_to_csv(mailbox_path, output_path, batch_size=batch_size, workers=workers,
+                                                    start=start, end=size, append=mode == "append",
+                                                    first_row=previous["messages"] if mode == "append" else 0)
+
+            messages = (previous["messages"] if mode == "append" else 0) + new_messages
+            states[key] = {
+                "offset": size,
+                "fingerprint": mailbox_fingerprint(mailbox_path, size),
+                "output_path": os.path.abspath(output_path),
+                "output_size": os.path.getsize(output_path),
+                "messages": messages,
+                "updated": datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+            }
+            save_mbox_state(self.config.mbox_state_path, states)
+            logger.info(f"Incremental run ({mode}) of {mailbox_path}: {new_messages} new messages from byte {start}, {messages} in total")
+            return {"mode": mode, "new_messages": new_messages, "start": start, "end": size, "messages": messages}
+
+        except Exception as e:
+            logger.error(f"Incremental prediction failed: {str(e)}")
+            raise e
+
+    def _incremental_mode(self, mailbox_path: str, output_path: str, previous: Optional[Dict], size: int) -> str:
+        """'append', 'unchanged' or 'full', logging why a full run is needed"""
+
+        if previous is None:
+            reason = "no previous run"
+        elif previous["output_path"] != os.path.abspath(output_path) or not os.path.isfile(output_path):
+            reason = "results file missing or changed"
+        elif os.path.getsize(output_path) < previous["output_size"]:
+            reason = "results file was truncated"
+        elif size < previous["offset"]:
+            reason = "mailbox shrank"
+        elif mailbox_fingerprint(mailbox_path, previous["offset"]) != previous["fingerprint"]:
+            reason = "mailbox was rewritten"
+        elif size == previous["offset"]:
+            return "unchanged"
+        elif not is_message_boundary(mailbox_path, previous["offset"]):
+            reason = "appended data does not start a new message"
+        else:
+            return "append"
+        logger.info(f"Full run of {mailbox_path}: {reason}")
+        return "full"
+
+
+# ----------------------------------------------------------------------------
+# Process pool workers: each worker loads its own pipeline once
+# ----------------------------------------------------------------------------
+_worker_pipeline = None
+
+def _init_worker(load_models: bool, config: Optional[Config] = None) -> None:
+    global _worker_pipeline
+    # The pipeline turns the worker's metrics registry on when config.metrics_enabled is set
+    _worker_pipeline = PredictionPipeline(load_models=load_models, config=config)
+
+
+def _reset_worker_counters() -> None:
+    metrics.reset()
+    if _worker_pipeline.cascade is not None:
+        _worker_pipeline.cascade.reset()
+
+
+def _worker_result(rows: List[Dict]):
+    cascade = _worker_pipeline.cascade
+    return rows, metrics.snapshot() if metrics.enabled else None, cascade.totals() if cascade is not None else None
+
+
+def _process_range(mailbox_path: str, start: int, end: int, classify: bool, batch_size: Optional[int]):
+    _reset_worker_counters()
+    messages = metrics.timed_iter("predict.mbox_parse", iter_mbox_messages(mailbox_path, start, end))
+    rows = [_worker_pipeline.parse_message(message) for message in messages]
+    if classify:
+        with _worker_pipeline.near_duplicate_run():
+            rows = [mail for batch in _worker_pipeline.iter_predictions(rows, batch_size=batch_size) for mail in batch]
+    return _worker_result(rows)
+
+
+def _process_indexed(mailbox_path: str, numbers, classify: bool, batch_size: Optional[int]):
+    _reset_worker_counters()
+    messages = metrics.timed_iter("predict.mbox_parse", MboxIndex.load(mailbox_path).iter_messages(numbers))
+    rows = [_worker_pipeline.parse_message(message) for message in messages]
+    if classify:
+        with _worker_pipeline.near_duplicate_run():
+            rows = [mail for batch in _worker_pipeline.iter_predictions(rows, batch_size=batch_size) for mail in batch]
+    return _worker_result(rows)
 
 def run_legacy_pipeline(state: PredictionState) -> None:
+    import pandas as pd
+
     pipeline = PredictionPipeline(load_models=False)
     pipeline.load_mailbox(state.mailbox_path)
     mail_data = pipeline.process_mailbox()
     state.mail_data = mail_data
     state.mail_data = pipeline.run_prediction(state.mail_data)
     df = pd.DataFrame(state.mail_data)
-    df.to_csv("data/predictions.csv", index=False)
\ No newline at end of file
+    df.to_csv("data/predictions.csv", index=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Classify an MBOX file into a predictions CSV")
+    parser.add_argument("mailbox_path")
+    parser.add_argument("output_path")
+    parser.add_argument("--incremental", action="store_true", help="Only classify messages appended since the last run")
+    parser.add_argument("-w", "--workers", type=int, help="Worker processes (-1 = one per CPU)")
+    parser.add_argument("--batch-size", type=int)
+    args = parser.parse_args()
+    pipeline = PredictionPipeline(load_models=True)
+    if args.incremental:
+        print(pipeline.predict_mbox_incremental(args.mailbox_path, args.output_path, args.batch_size, args.workers))
+    else:
+        print(pipeline.predict_mbox_to_csv(args.mailbox_path, args.output_path, args.batch_size, args.workers))
@@ -1,38 +1,55 @@
+from typing import Optional
+
+from src.config.config import Config
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransformation
 from src.components.model_training import ModelTraining
 from src.utils.state import TrainingState
 from src.utils.logger import get_logger
+from src.utils.metrics import metrics, profile_run
 
 logger = get_logger(__name__)
 
 class TrainingPipeline:
     """Complete training pipeline for spam classification"""
     
-    def __init__(self):
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        if self.config.metrics_enabled:
+            metrics.enabled = True
         self.state = TrainingState()
         
     def run_pipeline(self, cv_folds: int = 5):
+        with profile_run("training_pipeline", self.config):
+            return self._run_stages(cv_folds)
+
+    def _run_stages(self, cv_folds: int):
         try:
             logger.info("Initiating training pipeline")
+            since = metrics.snapshot() if metrics.enabled else None
             ingestion = DataIngestion()
-            self.state = ingestion.load_data(self.state)
+            with metrics.timer("train.ingestion"):
+                self.state = ingestion.load_data(self.state)
             logger.info(f"Data loaded successfully: {self.state.training_data.shape}")
             logger.info(f"Columns: {self.state.training_data.columns.tolist()}")
             logger.info(f"Sample size: {len(self.state.training_data)} emails")
 
             transformation = DataTransformation()
-            self.state = transformation.transform_data(self.state)
+            with metrics.timer("train.transformation"):
+                self.state = transformation.transform_data(self.state)
             logger.info(f"Data transformation completed")
             logger.info(f"Training set: {len(self.state.X_train)} samples")
             logger.info(f"Test set: {len(self.state.X_test)} samples")
             logger.info(f"TF-IDF features: {self.state.X_train_tfidf.shape[1]}")
             
             trainer = ModelTraining()
-            self.state = trainer.train_models(
-                self.state, 
-                cv_folds=cv_folds
-            )
+            with metrics.timer("train.models"):
+                self.state = trainer.train_models(
+                    self.state, 
+                    cv_folds=cv_folds
+                )
+            if metrics.enabled:
+                metrics.write_observations(self.state.output_dir, since)
             
             logger.info("\n" + "="*70)
             logger.info("Training pipeline completed successfully")
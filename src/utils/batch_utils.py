@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+from email import message_from_binary_file
+
+from src.utils.mbox_utils import split_mbox_ranges
+
+MBOX_EXTENSIONS = (".mbox", ".mbx")
+EML_EXTENSION = ".eml"
+
+# ----------------------------------------------------------------------------
+# Function to find the mbox files and .eml directories under the given paths
+# ----------------------------------------------------------------------------
+def discover_inputs(paths):
+    """Return (mbox_paths, {directory: [eml paths]}) in a stable, sorted order.
+
+    Files named explicitly are taken as mbox unless they end in .eml;
+    directories are walked for *.mbox / *.mbx files and *.eml messages.
+    """
+    mbox_paths, eml_dirs = [], {}
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            if path.lower().endswith(EML_EXTENSION):
+                eml_dirs.setdefault(os.path.dirname(path), []).append(path)
+            else:
+                mbox_paths.append(path)
+            continue
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"Input not found: {path}")
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                lower = name.lower()
+                if lower.endswith(MBOX_EXTENSIONS):
+                    mbox_paths.append(os.path.join(root, name))
+                elif lower.endswith(EML_EXTENSION):
+                    eml_dirs.setdefault(root, []).append(os.path.join(root, name))
+
+    mbox_paths = list(dict.fromkeys(mbox_paths))
+    eml_dirs = {directory: sorted(set(files)) for directory, files in sorted(eml_dirs.items())}
+    return mbox_paths, eml_dirs
+
+# ----------------------------------------------------------------------------
+# Function to split the inputs into independent, checkpointable work units
+# ----------------------------------------------------------------------------
+def plan_work_units(mbox_paths, eml_dirs, chunk_bytes, eml_files_per_unit):
+    """Large mbox files become several byte-range units; .eml files are grouped per directory.
+
+    Each unit carries a key that names it across runs and a signature of the
+    source files, so a resumed run redoes a unit whose inputs changed.
+    """
+    units = []
+    for path in mbox_paths:
+        stat = os.stat(path)
+        signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+        n_ranges = max(1, -(-stat.st_size // chunk_bytes))
+        for start, end in split_mbox_ranges(path, n_ranges) if stat.st_size else []:
+            units.append({"key": f"mbox:{path}:{start}-{end}", "kind": "mbox", "path": path,
+                          "start": start, "end": end, "signature": signature})
+    for directory, files in eml_dirs.items():
+        for index in range(0, len(files), eml_files_per_unit):
+            group = files[index:index + eml_files_per_unit]
+            digest = hashlib.blake2b(digest_size=16)
+            for path in group:
+                stat = os.stat(path)
+                digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+            units.append({"key": f"eml:{directory}:{index}", "kind": "eml", "path": directory,
+                          "files": group, "signature": digest.hexdigest()})
+    return units
+
+# ----------------------------------------------------------------------------
+# Function to stream parsed messages from .eml files
+# ----------------------------------------------------------------------------
+def iter_eml_messages(paths):
+    for path in paths:
+        with open(path, "rb") as f:
+            yield path, message_from_binary_file(f)
+
+# ----------------------------------------------------------------------------
+# Function to write rows as numbered CSV/Parquet shards, each published atomically
+# ----------------------------------------------------------------------------
+def write_shards(rows, prefix, columns, shard_rows, output_format="csv"):
+    import pandas as pd
+
+    paths = []
+    for number, start in enumerate(range(0, max(len(rows), 1), shard_rows)):
+        path = f"{prefix}-{number:04d}.{output_format}"
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        df = pd.DataFrame(rows[start:start + shard_rows], columns=columns)
+        if output_format == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+class BatchCheckpoint:
+    """Append-only JSON-lines log of completed work units.
+
+    A line is written (and fsynced) only after the unit's shards have been
+    published, so after a crash every recorded unit is complete on disk and
+    anything else is simply redone.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = {}
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self.completed[record["key"]] = record
+
+    def is_done(self, unit):
+        record = self.completed.get(unit["key"])
+        return (record is not None and record["signature"] == unit["signature"]
+                and all(os.path.isfile(path) for path in record["shards"]))
+
+    def discard_stale(self, units):
+        """Forget the records of every planned source path that no current unit matches, returning their shards.
+
+        A source that changed since it was recorded is re-planned with new
+        signatures and, once it grew or shrank, new byte ranges and keys, so
+        every earlier record for that path is stale, not only the same keys.
+        """
+        current = {unit["key"]: unit["signature"] for unit in units}
+        paths = {unit["path"] for unit in units}
+        stale = [key for key, record in self.completed.items()
+                 if _record_path(record) in paths and current.get(key) != record["signature"]]
+        return [path for key in stale for path in self.completed.pop(key)["shards"]]
+
+    def record(self, unit, rows, shards):
+        record = {"key": unit["key"], "path": unit["path"], "signature": unit["signature"], "rows": rows, "shards": shards}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.completed[unit["key"]] = record
+
+
+def _record_path(record):
+    # Records written before "path" was stored carry it in the key: "<kind>:<path>:<range or index>"
+    return record.get("path") or record["key"].split(":", 1)[1].rsplit(":", 1)[0]
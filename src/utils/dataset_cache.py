@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logger import get_logger
+from src.utils.email_utils import CLEAN_TEXT_VERSION, clean_text
+
+logger = get_logger(__name__)
+
+LABELS = {"spam": 0, "ham": 1}
+CACHE_FORMAT_VERSION = 1
+
+# ----------------------------------------------------------------------------
+# Function to hash a source file's contents in fixed-size blocks
+# ----------------------------------------------------------------------------
+def file_fingerprint(path, block_size=1024 * 1024):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ----------------------------------------------------------------------------
+# Function to stream (Category, Message) chunks from a CSV or Parquet file
+# ----------------------------------------------------------------------------
+def iter_labeled_chunks(path, chunk_rows):
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet datasets requires pyarrow (pip install pyarrow)") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=["Category", "Message"]):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=["Category", "Message"], dtype=str, chunksize=chunk_rows)
+
+
+# ----------------------------------------------------------------------------
+# Function to label-encode and clean one chunk
+# ----------------------------------------------------------------------------
+def encode_chunk(chunk):
+    labels = chunk["Category"].map(LABELS)
+    if labels.isna().any():
+        unknown = sorted(set(chunk["Category"][labels.isna()].astype(str)))
+        raise ValueError(f"Unknown labels in dataset: {unknown}")
+    texts = [clean_text(text) for text in chunk["Message"].fillna("")]
+    return labels.to_numpy(dtype=np.int8), texts
+
+
+class DatasetCache:
+    """Label-encoded, cleaned training text stored column-wise under a key derived from the source file hash.
+
+    Each entry is a directory holding labels.npy (int8), offsets.npy (int64
+    byte offsets) and text.bin (every message concatenated as UTF-8), so a
+    repeat run reads two arrays and decodes one column instead of parsing
+    and cleaning the source again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def entry_dir(self, fingerprint):
+        return os.path.join(self.cache_dir, fingerprint)
+
+    def has(self, fingerprint):
+        """True for a complete entry written with the current layout and clean_text; anything else is a miss and is rewritten"""
+        try:
+            with open(os.path.join(self.entry_dir(fingerprint), "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get("format_version") == CACHE_FORMAT_VERSION and meta.get("clean_text_version") == CLEAN_TEXT_VERSION
+
+    def write(self, fingerprint, chunks, source_path=None):
+        """Write an entry from an iterable of (labels, texts) chunks; returns the row count"""
+        entry_dir = self.entry_dir(fingerprint)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            label_chunks, offsets, position = [], [np.zeros(1, dtype=np.int64)], 0
+            with open(os.path.join(tmp_dir, "text.bin"), "wb") as f:
+                for labels, texts in chunks:
+                    encoded = [text.encode("utf-8", "surrogatepass") for text in texts]
+                    label_chunks.append(labels)
+                    lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+                    offsets.append(position + np.cumsum(lengths))
+                    position += int(lengths.sum())
+                    f.write(b"".join(encoded))
+
+            labels = np.concatenate(label_chunks) if label_chunks else np.empty(0, dtype=np.int8)
+            np.save(os.path.join(tmp_dir, "labels.npy"), labels)
+            np.save(os.path.join(tmp_dir, "offsets.npy"), np.concatenate(offsets))
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"format_version": CACHE_FORMAT_VERSION, "clean_text_version": CLEAN_TEXT_VERSION,
+                           "source": source_path, "rows": len(labels)}, f)
+            # Publish atomically so a crashed run never leaves a half-written entry behind
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+            return len(labels)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def read(self, fingerprint, chunk_rows=100000):
+        """Return (labels, texts) for a cached entry, decoding the text column chunk by chunk"""
+        entry_dir = self.entry_dir(fingerprint)
+        labels = np.load(os.path.join(entry_dir, "labels.npy"))
+        offsets = np.load(os.path.join(entry_dir, "offsets.npy"))
+        texts = []
+        with open(os.path.join(entry_dir, "text.bin"), "rb") as f:
+            for start in range(0, len(labels), chunk_rows):
+                bounds = offsets[start:start + chunk_rows + 1]
+                block = f.read(int(bounds[-1] - bounds[0]))
+                bounds = (bounds - bounds[0]).tolist()
+                texts.extend(block[a:b].decode("utf-8", "surrogatepass") for a, b in zip(bounds[:-1], bounds[1:]))
+        return labels, texts
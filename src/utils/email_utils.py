@@ -1,12 +1,110 @@
 import re
 from html import unescape
+from html.parser import HTMLParser
 from email.utils import getaddresses
-from bs4 import BeautifulSoup
+
+# Backslash runs and any whitespace collapse to a single space in one pass
+_WHITESPACE_RE = re.compile(r'[\\\s]+')
+
+# ----------------------------------------------------------------------------
+# Streaming tag stripper used instead of a full BeautifulSoup parse
+# ----------------------------------------------------------------------------
+class _FallbackToSoup(Exception):
+    pass
+
+
+class _TextExtractor(HTMLParser):
+    """Collect text the way BeautifulSoup(text, "html.parser").get_text(" ") does.
+
+    Constructs whose text handling differs subtly in BeautifulSoup (entity and
+    character references, CDATA, template/ruby content, closing tags of void
+    elements) raise _FallbackToSoup so the caller can use the full parser.
+    """
+    SKIPPED_TAGS = {"script", "style"}
+    FALLBACK_TAGS = {"template", "rt", "rp"}
+    VOID_TAGS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+        "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+        "image", "isindex", "nextid", "spacer"
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.chunks = []
+        self.skipped_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.FALLBACK_TAGS:
+            raise _FallbackToSoup(tag)
+        if tag in self.SKIPPED_TAGS:
+            self.skipped_tag = tag
+        self.chunks.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.FALLBACK_TAGS:
+            raise _FallbackToSoup(tag)
+        self.chunks.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS or tag in self.FALLBACK_TAGS:
+            raise _FallbackToSoup(tag)
+        if tag == self.skipped_tag:
+            self.skipped_tag = None
+        self.chunks.append(" ")
+
+    def handle_data(self, data):
+        if self.skipped_tag is None:
+            self.chunks.append(data)
+
+    def handle_entityref(self, name):
+        raise _FallbackToSoup(name)
+
+    def handle_charref(self, name):
+        raise _FallbackToSoup(name)
+
+    def unknown_decl(self, data):
+        raise _FallbackToSoup(data)
+
+    def handle_comment(self, data):
+        self.chunks.append(" ")
+
+    def handle_decl(self, decl):
+        self.chunks.append(" ")
+
+    def handle_pi(self, data):
+        self.chunks.append(" ")
+
+# ----------------------------------------------------------------------------
+# Function to convert one decoded MIME part to plain text
+# ----------------------------------------------------------------------------
+def _soup_text(text):
+    # bs4 is only needed for the fallback path, so it is imported on first use
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(text, "html.parser").get_text(" ")
+
+
+def part_to_text(text, engine="fast"):
+    if engine == "bs4":
+        return _soup_text(unescape(text))
+
+    # No markup and no entities: unescape and the HTML parse are both no-ops
+    if "<" not in text and "&" not in text:
+        return text
+
+    text = unescape(text)
+    extractor = _TextExtractor()
+    try:
+        extractor.feed(text)
+        extractor.close()
+    except _FallbackToSoup:
+        return _soup_text(text)
+    return "".join(extractor.chunks)
 
 # ----------------------------------------------------------------------------
 # Function to extract email body content
 # ----------------------------------------------------------------------------
-def extract_body(msg):
+def extract_body(msg, engine="fast"):
     texts = []
 
     if msg.is_multipart():
@@ -14,22 +112,13 @@ def extract_body(msg):
             if part.get_content_type() in ("text/plain", "text/html"):
                 payload = part.get_payload(decode=True)
                 if payload:
-                    text = payload.decode(errors="ignore")
-                    text = unescape(text)
-                    text = BeautifulSoup(text, "html.parser").get_text(" ")
-                    texts.append(text)
+                    texts.append(part_to_text(payload.decode(errors="ignore"), engine))
     else:
         payload = msg.get_payload(decode=True)
         if payload:
-            text = unescape(payload.decode(errors="ignore"))
-            text = BeautifulSoup(text, "html.parser").get_text(" ")
-            texts.append(text)
+            texts.append(part_to_text(payload.decode(errors="ignore"), engine))
 
-    clean = " ".join(texts)
-    clean = re.sub(r'\\+', ' ', clean)
-    clean = re.sub(r'[\r\n\t]+', ' ', clean)
-    clean = re.sub(r'\s+', ' ', clean)
-    return clean.strip()
+    return _WHITESPACE_RE.sub(" ", " ".join(texts)).strip()
 
 # ----------------------------------------------------------------------------
 # Function to extract all recipients from email headers
@@ -43,12 +132,45 @@ def all_recipients(msg):
 # ----------------------------------------------------------------------------
 # Function to clean text for Excel compatibility
 # ----------------------------------------------------------------------------
+EXCEL_CELL_LIMIT = 32767
+# Bump whenever clean_text's output changes, so caches of cleaned text are rebuilt
+CLEAN_TEXT_VERSION = 1
+# Extra characters cleaned past the cell limit before truncating, so dropped characters rarely force a full pass
+_TRUNCATE_MARGIN = 1024
+_CONTROL_CHARS = '\x00-\x08\x0B-\x0C\x0E-\x1F\u200B\u200C\u200D\u200E\u200F\uFEFF'
+_CONTROL_RE = re.compile(f'[{_CONTROL_CHARS}]')
+_DIRTY_RE = re.compile(f'[{_CONTROL_CHARS}\ud800-\udfff]')
+_SURROGATE_RE = re.compile('[\ud800-\udfff]')
+_ASCII_CONTROL_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)])
+
+
 def clean_text(text):
     if not isinstance(text, str):
         return text
-    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\u200B\u200C\u200D\u200E\u200F\uFEFF]', '', text)
-    text = text.encode("utf-16", "surrogatepass").decode("utf-16", "ignore")
-    text = text[:32767]
+    # Cleaning only removes characters or merges surrogate halves, so when a prefix already
+    # yields a full cell its first EXCEL_CELL_LIMIT characters match cleaning the whole string
+    if len(text) > EXCEL_CELL_LIMIT + _TRUNCATE_MARGIN:
+        cleaned = _strip_invalid_chars(text[:EXCEL_CELL_LIMIT + _TRUNCATE_MARGIN])
+        if len(cleaned) < EXCEL_CELL_LIMIT:
+            cleaned = _strip_invalid_chars(text)
+        text = cleaned
+    else:
+        text = _strip_invalid_chars(text)
+    text = text[:EXCEL_CELL_LIMIT]
     if text.startswith(("=", "+", "-", "@")):
         text = "'" + text
-    return text
\ No newline at end of file
+    return text
+
+
+def _strip_invalid_chars(text):
+    """Drop control and zero-width characters, re-pair split surrogates and drop lone ones"""
+    if text.isascii():
+        # str.translate has a fast path for ASCII input only
+        return text.translate(_ASCII_CONTROL_TABLE)
+    if _DIRTY_RE.search(text) is None:
+        return text
+    text = _CONTROL_RE.sub('', text)
+    if _SURROGATE_RE.search(text) is not None:
+        # The UTF-16 round trip joins adjacent high/low halves into one character and drops the rest
+        text = text.encode("utf-16", "surrogatepass").decode("utf-16", "ignore")
+    return text
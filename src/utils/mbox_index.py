@@ -0,0 +1,225 @@
+import os
+import json
+import mmap
+import shutil
+import mailbox
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+# ----------------------------------------------------------------------------
+# Function to turn a Date header into epoch seconds (NaN when missing or unparsable)
+# ----------------------------------------------------------------------------
+def parse_date(value):
+    if not value:
+        return np.nan
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return np.nan
+
+# ----------------------------------------------------------------------------
+# Function to scan an mbox file for message boundaries and filter headers
+# ----------------------------------------------------------------------------
+INDEXED_HEADERS = {b"x-gmail-labels": "X-Gmail-Labels", b"date": "Date", b"subject": "Subject"}
+
+def scan_mbox(mailbox_path):
+    """Yield (start, body_start, end, headers) per message, splitting exactly like iter_mbox_messages.
+
+    start is the offset of the "From " line, body_start the first byte after
+    it and end the end of the message bytes (without the blank separator line
+    mailbox.mbox drops), so mm[body_start:end] is the message as parsed there.
+    headers holds the first occurrence of each INDEXED_HEADERS field, with the
+    value message.get() returns under the default compat32 policy.
+    """
+    with open(mailbox_path, "rb") as f:
+        offset, start = 0, None
+        for line in f:
+            line_start, offset = offset, offset + len(line)
+            if line.startswith(b"From "):
+                if start is not None:
+                    yield start, body_start, (last_line_start if last_was_empty else line_start), _header_values(fields)
+                start, body_start = line_start, offset
+                fields, field, in_headers, last_line_start, last_was_empty = {}, None, True, None, False
+                continue
+            if start is None:
+                continue
+            if in_headers:
+                if line in (b"\n", b"\r\n"):
+                    in_headers = False
+                elif line[:1] in (b" ", b"\t"):
+                    if field is not None:
+                        field.append(line)
+                else:
+                    name, colon, value = line.partition(b":")
+                    name = INDEXED_HEADERS.get(name.strip().lower()) if colon else None
+                    field = [value.lstrip(b" \t")] if name and name not in fields else None
+                    if field is not None:
+                        fields[name] = field
+            last_line_start, last_was_empty = line_start, line == b"\n"
+        if start is not None:
+            yield start, body_start, (last_line_start if last_was_empty else offset), _header_values(fields)
+
+
+def _header_values(fields):
+    return {name: b"".join(lines).rstrip(b"\r\n").decode("ascii", "surrogateescape") for name, lines in fields.items()}
+
+
+class MboxIndex:
+    """Sidecar index of an mbox file: message byte ranges plus the headers we filter on.
+
+    Stored next to the mailbox as <mbox>.idx/ with starts/body_starts/ends
+    (int64 offsets), dates (epoch seconds), label codes into a table of
+    distinct X-Gmail-Labels values, and subjects as one UTF-8 blob. Arrays are
+    memory-mapped and messages are read by slicing an mmap of the mailbox, so
+    a subset can be processed without scanning the rest of the file.
+    """
+
+    def __init__(self, mailbox_path, index_dir, meta, arrays, label_values):
+        self.mailbox_path = mailbox_path
+        self.index_dir = index_dir
+        self.meta = meta
+        self.starts = arrays["starts"]
+        self.body_starts = arrays["body_starts"]
+        self.ends = arrays["ends"]
+        self.dates = arrays["dates"]
+        self.label_codes = arrays["label_codes"]
+        self.subject_offsets = arrays["subject_offsets"]
+        self.label_values = label_values
+
+    def __len__(self):
+        return len(self.starts)
+
+    @staticmethod
+    def index_path(mailbox_path):
+        return f"{mailbox_path}{INDEX_SUFFIX}"
+
+    @staticmethod
+    def _source_signature(mailbox_path):
+        stat = os.stat(mailbox_path)
+        return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+    @classmethod
+    def is_current(cls, mailbox_path):
+        meta_path = os.path.join(cls.index_path(mailbox_path), "meta.json")
+        if not os.path.isfile(meta_path):
+            return False
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        return (meta.get("format_version") == INDEX_FORMAT_VERSION
+                and all(meta.get(key) == value for key, value in cls._source_signature(mailbox_path).items()))
+
+    @classmethod
+    def open(cls, mailbox_path, rebuild=False):
+        """Load the sidecar index, building (or rebuilding a stale) one first"""
+        if rebuild or not cls.is_current(mailbox_path):
+            cls.build(mailbox_path)
+        return cls.load(mailbox_path)
+
+    @classmethod
+    def build(cls, mailbox_path):
+        signature = cls._source_signature(mailbox_path)
+        starts, body_starts, ends, dates, label_codes, subject_offsets = [], [], [], [], [], [0]
+        label_table = {}
+        index_dir = cls.index_path(mailbox_path)
+        tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        try:
+            with open(os.path.join(tmp_dir, "subjects.bin"), "wb") as subjects:
+                for start, body_start, end, headers in scan_mbox(mailbox_path):
+                    starts.append(start)
+                    body_starts.append(body_start)
+                    ends.append(end)
+                    dates.append(parse_date(headers.get("Date")))
+                    label_codes.append(label_table.setdefault(headers.get("X-Gmail-Labels") or "", len(label_table)))
+                    subject = (headers.get("Subject") or "").encode("utf-8", "surrogateescape")
+                    subjects.write(subject)
+                    subject_offsets.append(subject_offsets[-1] + len(subject))
+
+            for name, values, dtype in (("starts", starts, np.int64), ("body_starts", body_starts, np.int64),
+                                        ("ends", ends, np.int64), ("dates", dates, np.float64),
+                                        ("label_codes", label_codes, np.int32), ("subject_offsets", subject_offsets, np.int64)):
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(values, dtype=dtype))
+            with open(os.path.join(tmp_dir, "labels.json"), "w", encoding="utf-8") as f:
+                json.dump(list(label_table), f)
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"format_version": INDEX_FORMAT_VERSION, "messages": len(starts), **signature}, f)
+            shutil.rmtree(index_dir, ignore_errors=True)
+            os.replace(tmp_dir, index_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logger.info(f"Indexed {len(starts)} messages of {mailbox_path} into {index_dir}")
+        return index_dir
+
+    @classmethod
+    def load(cls, mailbox_path, mmap_mode="r"):
+        index_dir = cls.index_path(mailbox_path)
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["format_version"] != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported mbox index format version: {meta['format_version']}")
+        # Empty arrays cannot be memory-mapped
+        mode = mmap_mode if meta["messages"] else None
+        arrays = {
+            name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode=mode)
+            for name in ("starts", "body_starts", "ends", "dates", "label_codes", "subject_offsets")
+        }
+        with open(os.path.join(index_dir, "labels.json"), encoding="utf-8") as f:
+            label_values = json.load(f)
+        return cls(mailbox_path, index_dir, meta, arrays, label_values)
+
+    def subject(self, number):
+        start, end = int(self.subject_offsets[number]), int(self.subject_offsets[number + 1])
+        with open(os.path.join(self.index_dir, "subjects.bin"), "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8", "surrogateescape")
+
+    def select(self, labels=None, since=None, until=None, min_offset=None):
+        """Message numbers matching every given filter, in mailbox order.
+
+        labels: Gmail labels (case-insensitive); a message matches if it carries any of them.
+        since / until: epoch seconds or datetimes bounding the Date header (undated messages are excluded).
+        min_offset: only messages starting at or after this byte offset.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if labels is not None:
+            wanted = {label.strip().lower() for label in labels}
+            matching = [code for code, value in enumerate(self.label_values)
+                        if wanted & {label.strip().lower() for label in value.split(",")}]
+            mask &= np.isin(self.label_codes, matching)
+        for bound, compare in ((since, np.greater_equal), (until, np.less)):
+            if bound is not None:
+                bound = bound.timestamp() if hasattr(bound, "timestamp") else float(bound)
+                mask &= compare(self.dates, bound)
+        if min_offset is not None:
+            mask &= self.starts >= min_offset
+        return np.flatnonzero(mask)
+
+    def split(self, numbers, n_parts):
+        """Split message numbers into up to n_parts contiguous runs of roughly equal bytes"""
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if not len(numbers):
+            return []
+        cumulative = np.cumsum(self.ends[numbers] - self.starts[numbers])
+        cuts = np.searchsorted(cumulative, cumulative[-1] * np.arange(1, n_parts) / n_parts)
+        return [part for part in np.split(numbers, np.unique(cuts)) if len(part)]
+
+    def iter_messages(self, numbers=None):
+        """Yield mailbox.mboxMessage objects for the given message numbers by slicing an mmap of the mailbox"""
+        numbers = range(len(self)) if numbers is None else numbers
+        if not len(numbers):
+            return
+        with open(self.mailbox_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for number in numbers:
+                start, body_start, end = int(self.starts[number]), int(self.body_starts[number]), int(self.ends[number])
+                message = mailbox.mboxMessage(mm[body_start:end])
+                message.set_from(mm[start + 5:body_start].replace(b"\n", b"").decode("ascii"))
+                yield message
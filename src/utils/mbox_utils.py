@@ -0,0 +1,122 @@
+import os
+import json
+import hashlib
+import mailbox
+
+# ----------------------------------------------------------------------------
+# Function to stream messages from an mbox file without building a TOC
+# ----------------------------------------------------------------------------
+def iter_mbox_messages(mailbox_path, start=0, end=None):
+    """Yield mailbox.mboxMessage objects one at a time, reading the file sequentially.
+
+    Message boundaries follow the same rules as mailbox.mbox, so the parsed
+    messages are identical, but only the current message is held in memory.
+    When start/end are given they must fall on "From " separators (see
+    split_mbox_ranges), and only the messages inside that byte range are read.
+    """
+    with open(mailbox_path, "rb") as f:
+        f.seek(start)
+        offset = start
+        from_line, lines, last_was_empty = None, [], False
+
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(line)
+
+            if line.startswith(b"From "):
+                if from_line is not None:
+                    yield _build_message(from_line, lines, last_was_empty)
+                from_line, lines, last_was_empty = line, [], False
+                continue
+
+            if from_line is not None:
+                lines.append(line)
+            last_was_empty = line == b"\n"
+
+        if from_line is not None:
+            yield _build_message(from_line, lines, last_was_empty)
+
+
+def _build_message(from_line, lines, last_was_empty):
+    # mailbox.mbox drops the blank separator line that precedes the next "From "
+    if last_was_empty and lines:
+        lines = lines[:-1]
+    message = mailbox.mboxMessage(b"".join(lines))
+    message.set_from(from_line[5:].replace(b"\n", b"").decode("ascii"))
+    return message
+
+# ----------------------------------------------------------------------------
+# Function to split an mbox file into byte ranges at "From " separators
+# ----------------------------------------------------------------------------
+def split_mbox_ranges(mailbox_path, n_ranges, start=0, end=None):
+    """Return up to n_ranges (start, end) byte ranges that each begin on a "From " line.
+
+    start must itself be a message boundary; by default the whole file is split.
+    """
+    size = os.path.getsize(mailbox_path) if end is None else end
+    boundaries = [start]
+
+    with open(mailbox_path, "rb") as f:
+        for i in range(1, n_ranges):
+            target = max(start + (size - start) * i // n_ranges, boundaries[-1])
+            f.seek(target)
+            if target > 0:
+                f.readline()  # finish the partially read line
+            while True:
+                position = f.tell()
+                line = f.readline()
+                if not line:
+                    position = size
+                    break
+                if line.startswith(b"From "):
+                    break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+# ----------------------------------------------------------------------------
+# Function to fingerprint the first offset bytes of an mbox file
+# ----------------------------------------------------------------------------
+def mailbox_fingerprint(mailbox_path, offset, block_size=64 * 1024):
+    """Hash of the first block and the block ending at offset.
+
+    An append leaves both unchanged, while a rewritten or re-exported file
+    almost always changes one of them, without rereading the whole history.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(offset).encode())
+    with open(mailbox_path, "rb") as f:
+        digest.update(f.read(min(block_size, offset)))
+        tail_start = max(0, offset - block_size)
+        f.seek(tail_start)
+        digest.update(f.read(offset - tail_start))
+    return digest.hexdigest()
+
+
+def is_message_boundary(mailbox_path, offset):
+    """True when a message starts at offset (the start of a "From " line)"""
+    if offset == 0:
+        return True
+    with open(mailbox_path, "rb") as f:
+        f.seek(offset - 1)
+        return f.read(6) == b"\nFrom "
+
+# ----------------------------------------------------------------------------
+# Functions to load and atomically save per-mailbox incremental state
+# ----------------------------------------------------------------------------
+def load_mbox_state(state_path):
+    if not os.path.isfile(state_path):
+        return {}
+    with open(state_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_mbox_state(state_path, states):
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    tmp_path = f"{state_path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(states, f, indent=2)
+    os.replace(tmp_path, state_path)
@@ -0,0 +1,273 @@
+import os
+import time
+import signal
+import cProfile
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from src.config.config import Config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TIME_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+PROMETHEUS_PREFIX = "spam_classifier"
+
+_DISABLED = nullcontext()
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.start, TIME_BUCKETS)
+        return False
+
+
+class MetricsRegistry:
+    """Process-wide timers, counters and histograms for pipeline stages.
+
+    When disabled, timer() hands back a shared no-op context and count() /
+    observe() return after one attribute check, so instrumented code pays
+    almost nothing.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._counters = Counter()
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        return _Timer(self, name) if self.enabled else _DISABLED
+
+    def timed_iter(self, name, iterable):
+        """Yield from iterable, timing each step (e.g. parsing the next mbox message) under name"""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(name, time.perf_counter() - start, TIME_BUCKETS)
+            yield item
+
+    def count(self, name, value=1):
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += value
+
+    def observe(self, name, value, buckets=SIZE_BUCKETS):
+        if self.enabled:
+            with self._lock:
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = _Histogram(buckets)
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Picklable copy of every counter and histogram, for diffs and for merging worker processes"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {name: (h.buckets, list(h.counts), h.count, h.total) for name, h in self._histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        if not snapshot:
+            return
+        with self._lock:
+            self._counters.update(snapshot["counters"])
+            for name, (buckets, counts, count, total) in snapshot["histograms"].items():
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = _Histogram(buckets)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.count += count
+                histogram.total += total
+
+    def breakdown(self, since=None):
+        """One row per histogram and counter, optionally only what was recorded after the snapshot since"""
+        current = self.snapshot()
+        since = since or {"counters": {}, "histograms": {}}
+        rows = []
+        for name, (buckets, counts, count, total) in sorted(current["histograms"].items()):
+            if name in since["histograms"]:
+                _, old_counts, old_count, old_total = since["histograms"][name]
+                counts = [a - b for a, b in zip(counts, old_counts)]
+                count, total = count - old_count, total - old_total
+            if not count:
+                continue
+            histogram = _Histogram(buckets)
+            histogram.counts, histogram.count, histogram.total = counts, count, total
+            rows.append({
+                "Name": name,
+                "Type": "timer" if buckets == TIME_BUCKETS else "histogram",
+                "Count": count,
+                "Total": total,
+                "Mean": total / count,
+                "P50_Upper_Bound": histogram.quantile(0.5),
+                "P95_Upper_Bound": histogram.quantile(0.95),
+            })
+        for name, value in sorted(current["counters"].items()):
+            value -= since["counters"].get(name, 0)
+            if value:
+                rows.append({"Name": name, "Type": "counter", "Count": value, "Total": value})
+        return rows
+
+    def write_observations(self, output_dir, since=None, file_name="stage_breakdown.csv"):
+        import pandas as pd
+
+        observations_dir = os.path.join(output_dir, "observations")
+        os.makedirs(observations_dir, exist_ok=True)
+        path = os.path.join(observations_dir, file_name)
+        pd.DataFrame(self.breakdown(since)).to_csv(path, index=False)
+        logger.info(f"Saved stage breakdown: {path}")
+        return path
+
+    def to_prometheus(self):
+        """Render counters and histograms in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {PROMETHEUS_PREFIX}_events_total counter",
+            *(f'{PROMETHEUS_PREFIX}_events_total{{name="{name}"}} {value}'
+              for name, value in sorted(snapshot["counters"].items())),
+        ]
+        for metric, is_timer in (("stage_seconds", True), ("observation", False)):
+            lines.append(f"# TYPE {PROMETHEUS_PREFIX}_{metric} histogram")
+            for name, (buckets, counts, count, total) in sorted(snapshot["histograms"].items()):
+                if (buckets == TIME_BUCKETS) != is_timer:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{PROMETHEUS_PREFIX}_{metric}_bucket{{name="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{PROMETHEUS_PREFIX}_{metric}_sum{{name="{name}"}} {total}')
+                lines.append(f'{PROMETHEUS_PREFIX}_{metric}_count{{name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Module-wide registry; PredictionPipeline, BatchPredictionPipeline and TrainingPipeline switch it on when their config sets metrics_enabled
+metrics = MetricsRegistry(enabled=Config().metrics_enabled)
+
+
+class SamplingProfiler:
+    """Sample the main thread's Python stack on a CPU-time timer and count the collapsed stacks.
+
+    SIGPROF fires between bytecodes of the running thread, so samples are not
+    biased towards code that releases the GIL the way a sampling thread is.
+    The output is the folded format ("outer;inner;leaf count") read by
+    flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._previous_handler = None
+
+    def start(self):
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_run(run_name, config=None):
+    """Profile the enclosed block with cProfile or the sampling profiler, per config.profile_mode"""
+    config = config or Config()
+    mode = config.profile_mode
+    if not mode:
+        yield
+        return
+
+    if mode == "sampling" and (not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread()):
+        # Signal handlers can only be installed from the main thread (e.g. not inside the API's thread pool)
+        logger.warning(f"Sampling profiler needs the main thread on a POSIX system, not profiling {run_name}")
+        yield
+        return
+
+    os.makedirs(config.profile_dir, exist_ok=True)
+    path = os.path.join(config.profile_dir, f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{run_name}")
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{path}.prof")
+            logger.info(f"Saved cProfile stats: {path}.prof")
+    elif mode == "sampling":
+        profiler = SamplingProfiler(interval=config.profile_interval_ms / 1000)
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.write_folded(f"{path}.folded")
+            logger.info(f"Saved folded stacks ({sum(profiler.stacks.values())} samples): {path}.folded")
+    else:
+        raise ValueError(f"Unknown profile mode: {mode}")
@@ -0,0 +1,193 @@
+from itertools import chain
+
+import numpy as np
+
+EMPTY_BIN = np.uint32(0xFFFFFFFF)
+_FNV_OFFSET = np.uint32(0x811C9DC5)
+_FNV_PRIME = np.uint32(0x01000193)
+_BAND_PRIME = np.uint64(0x100000001B3)
+# Leaders kept per LSH bucket; templated mail can pile many distinct-but-alike leaders into one
+# bucket, and capping it bounds the comparisons per text (later leaders stay reachable via other bands)
+BUCKET_CAPACITY = 16
+
+# ----------------------------------------------------------------------------
+# Function to compute one-permutation MinHash signatures for a batch of texts
+# ----------------------------------------------------------------------------
+def minhash_signatures(texts, num_perm=64, shingle_size=5, seed=0):
+    """(len(texts), num_perm) uint32 MinHash signatures over character shingles of the UTF-8 bytes.
+
+    ASCII letters are lowercased and every byte of a word containing a digit
+    becomes "#": campaign variants mostly differ in ids, tracking URLs and
+    numbers, and masked runs of any length give the same shingles.
+
+    Each shingle is hashed once and its hash picks one of num_perm bins that
+    keeps its minimum (one permutation hashing), so the cost does not grow
+    with num_perm. Bins no shingle fell into hold EMPTY_BIN. The whole batch
+    is hashed as one byte buffer; windows that span two texts are dropped.
+    """
+    n = len(texts)
+    signatures = np.full((n, num_perm), EMPTY_BIN, dtype=np.uint32)
+    if not n:
+        return signatures
+    # Texts shorter than a shingle are padded to exactly one
+    encoded = [(text or "").encode("utf-8", "ignore").ljust(shingle_size, b"\0") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=n)
+    starts = np.cumsum(lengths) - lengths
+    data = _normalize(np.frombuffer(b"".join(encoded), dtype=np.uint8), starts)
+    n_windows = len(data) - shingle_size + 1
+
+    hashes = np.full(n_windows, _FNV_OFFSET ^ np.uint32(seed), dtype=np.uint32)
+    for offset in range(shingle_size):
+        hashes = (hashes ^ data[offset:offset + n_windows]) * _FNV_PRIME
+    hashes = _fmix32(hashes)
+
+    docs = np.repeat(np.arange(n), lengths)[:n_windows]
+    valid = np.arange(n_windows) - starts[docs] <= lengths[docs] - shingle_size
+    docs, hashes = docs[valid], hashes[valid]
+    bins = (hashes.astype(np.uint64) * np.uint64(num_perm)) >> np.uint64(32)
+    np.minimum.at(signatures.reshape(-1), docs * num_perm + bins.astype(np.int64), hashes)
+    return signatures
+
+
+def _normalize(data, starts):
+    data = np.where((data >= 65) & (data <= 90), data | 32, data)
+    spaces = data <= 32
+    # Words end at whitespace and at the start of every text, so masking never crosses into a neighbour
+    boundaries = spaces.astype(np.int64)
+    boundaries[starts] += 1
+    words = np.cumsum(boundaries)
+    has_digit = np.zeros(words[-1] + 1, dtype=bool)
+    has_digit[words[(data >= 48) & (data <= 57)]] = True
+    return np.where(has_digit[words] & ~spaces, np.uint8(35), data).astype(np.uint8)
+
+
+def _fmix32(hashes):
+    # MurmurHash3 finalizer: spreads the FNV state over all 32 bits
+    hashes = hashes ^ (hashes >> np.uint32(16))
+    hashes = hashes * np.uint32(0x85EBCA6B)
+    hashes = hashes ^ (hashes >> np.uint32(13))
+    hashes = hashes * np.uint32(0xC2B2AE35)
+    return hashes ^ (hashes >> np.uint32(16))
+
+# ----------------------------------------------------------------------------
+# Function to estimate Jaccard similarity from one-permutation signatures
+# ----------------------------------------------------------------------------
+def signature_similarity(signature, others):
+    """Estimated Jaccard similarity of signature and others, row by row (bins empty in both are skipped)"""
+    filled = (others != EMPTY_BIN) | (signature != EMPTY_BIN)
+    matches = ((others == signature) & filled).sum(axis=-1)
+    return matches / np.maximum(filled.sum(axis=-1), 1)
+
+# ----------------------------------------------------------------------------
+# Function to choose LSH bands and rows for a similarity threshold
+# ----------------------------------------------------------------------------
+def lsh_bands(threshold, num_perm):
+    """(bands, rows) with bands * rows <= num_perm whose collision curve best separates pairs at threshold.
+
+    A pair with similarity s shares at least one band with probability
+    1 - (1 - s^rows)^bands; the split minimizes the collision mass below the
+    threshold (wasted comparisons) plus the miss mass above it (missed duplicates).
+    """
+    similarities = np.linspace(0, 1, 201)
+    best, best_error = None, np.inf
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        collide = 1 - (1 - similarities ** rows) ** bands
+        error = np.where(similarities < threshold, collide, 1 - collide).mean()
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class NearDuplicateIndex:
+    """Greedy leader clustering of texts through a banded LSH index of MinHash signatures.
+
+    The first text of a cluster is its leader and the cluster id is the row
+    number of that text (rows count from first_row across add() calls). A
+    later text joins the most similar leader whose estimated similarity
+    reaches threshold, otherwise it starts a cluster. Members are compared
+    with the leader rather than with each other, so every member is within
+    threshold of the text whose result the cluster shares. Once max_clusters
+    leaders are indexed, new clusters are still assigned but not indexed.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, shingle_size=5, max_clusters=None, first_row=0):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_clusters = max_clusters
+        self.next_row = first_row
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = np.empty((64, num_perm), dtype=np.uint32)
+        self.leader_ids = []
+        self.slots = {}
+        self.results = {}
+
+    def __len__(self):
+        return len(self.leader_ids)
+
+    def add(self, texts):
+        """Assign each text to a cluster; returns (cluster ids, mask of texts that started a new cluster)"""
+        signatures = minhash_signatures(texts, self.num_perm, self.shingle_size)
+        band_keys, empty_bands = self._band_keys(signatures)
+        keys = [[(band, key) for band, (key, empty) in enumerate(zip(row_keys, row_empty)) if not empty]
+                for row_keys, row_empty in zip(band_keys.tolist(), empty_bands.tolist())]
+        cluster_ids = np.full(len(texts), -1, dtype=np.int64)
+        new = np.zeros(len(texts), dtype=bool)
+
+        # Texts close to a leader indexed by an earlier batch are verified together in one vectorized pass
+        candidates = [self._candidates(text_keys) for text_keys in keys]
+        counts = np.fromiter(map(len, candidates), dtype=np.int64, count=len(texts))
+        if counts.any():
+            texts_idx = np.repeat(np.arange(len(texts)), counts)
+            slots = np.fromiter(chain.from_iterable(candidates), dtype=np.int64, count=int(counts.sum()))
+            similarities = signature_similarity(signatures[texts_idx], self.signatures[slots])
+            order = np.lexsort((-similarities, texts_idx))
+            first = order[np.r_[True, texts_idx[order][1:] != texts_idx[order][:-1]]]
+            matched = first[similarities[first] >= self.threshold]
+            cluster_ids[texts_idx[matched]] = np.asarray(self.leader_ids)[slots[matched]]
+
+        # The rest go in order, since a text may join a cluster started earlier in this batch
+        for i in np.flatnonzero(cluster_ids < 0):
+            candidates = list(self._candidates(keys[i]))
+            if candidates:
+                similarities = signature_similarity(signatures[i], self.signatures[candidates])
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    cluster_ids[i] = self.leader_ids[candidates[best]]
+                    continue
+            cluster_ids[i] = self.next_row + i
+            new[i] = True
+            if self.max_clusters is None or len(self) < self.max_clusters:
+                self._index_leader(cluster_ids[i], signatures[i], keys[i])
+        self.next_row += len(texts)
+        return cluster_ids, new
+
+    def _candidates(self, keys):
+        return {slot for band, key in keys for slot in self.buckets[band].get(key, ())}
+
+    def remember(self, cluster_id, result):
+        """Keep a leader's result for the members that join its cluster later (indexed clusters only)"""
+        if cluster_id in self.slots:
+            self.results[cluster_id] = result
+
+    def _band_keys(self, signatures):
+        bands = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        keys = np.zeros(bands.shape[:2], dtype=np.uint64)
+        for row in range(self.rows):
+            keys = keys * _BAND_PRIME + bands[:, :, row]
+        # A band with no filled bin says nothing about similarity, so it is neither indexed nor queried
+        return keys, (bands == EMPTY_BIN).all(axis=2)
+
+    def _index_leader(self, cluster_id, signature, keys):
+        slot = len(self.leader_ids)
+        if slot == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[slot] = signature
+        self.leader_ids.append(int(cluster_id))
+        self.slots[int(cluster_id)] = slot
+        for band, key in keys:
+            bucket = self.buckets[band].setdefault(key, [])
+            if len(bucket) < BUCKET_CAPACITY:
+                bucket.append(slot)
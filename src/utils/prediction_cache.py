@@ -0,0 +1,133 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# ----------------------------------------------------------------------------
+# Function to fingerprint the model artifacts a prediction came from
+# ----------------------------------------------------------------------------
+def artifact_identity(*paths, settings=None):
+    """Hash of each artifact's path, size and modification time, plus the serving settings; changes whenever one does."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings or {}, sort_keys=True, default=str).encode())
+    for path in paths:
+        digest.update(str(path).encode())
+        if path and os.path.isdir(path):
+            entries = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        else:
+            entries = [path]
+        for entry in entries:
+            if entry and os.path.isfile(entry):
+                stat = os.stat(entry)
+                digest.update(f"{entry}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def content_key(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """Bounded LRU of prediction results keyed by cleaned-body hash, with an optional SQLite tier.
+
+    Entries belong to one model identity; switching identity empties the
+    in-memory tier and hides disk entries written for other models. Disk
+    entries of other identities are kept, since processes serving different
+    models may share one cache file.
+    """
+
+    def __init__(self, max_entries, disk_path=None):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self.identity = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (identity TEXT, key TEXT, result TEXT, PRIMARY KEY (identity, key))"
+            )
+            self._db.commit()
+
+    def set_identity(self, identity):
+        with self._lock:
+            if identity == self.identity:
+                return
+            if self.identity is not None:
+                logger.info("Model artifacts changed, invalidating prediction cache")
+            self.identity = identity
+            self._entries.clear()
+
+    def get_many(self, keys):
+        """Return {key: result} for every cached key, promoting disk hits into memory"""
+        found, missing = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                result = self._entries.get(key)
+                if result is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = result
+
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, result FROM predictions WHERE identity = ? AND key IN ({','.join('?' * len(chunk))})",
+                        [self.identity, *chunk]
+                    ).fetchall()
+                    for key, result in rows:
+                        found[key] = json.loads(result)
+                        self.disk_hits += 1
+                        self._store(key, found[key])
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            for key, result in items.items():
+                self._store(key, result)
+            if self._db is not None and items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO predictions (identity, key, result) VALUES (?, ?, ?)",
+                    [(self.identity, key, json.dumps(result)) for key, result in items.items()]
+                )
+                self._db.commit()
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
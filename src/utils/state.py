@@ -1,14 +1,16 @@
-from typing import Optional, List, Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class TrainingState:
     training_data_path: Optional[str] = None
-    training_data: Optional[pd.DataFrame] = None
-    transformed_data: Optional[pd.DataFrame] = None
-    X_train: Optional[pd.Series] = None
-    X_test: Optional[pd.Series] = None
-    y_train: Optional[pd.Series] = None
-    y_test: Optional[pd.Series] = None
+    training_data: Optional['pd.DataFrame'] = None
+    transformed_data: Optional['pd.DataFrame'] = None
+    X_train: Optional['pd.Series'] = None
+    X_test: Optional['pd.Series'] = None
+    y_train: Optional['pd.Series'] = None
+    y_test: Optional['pd.Series'] = None
     X_train_tfidf: Optional[Any] = None
     X_test_tfidf: Optional[Any] = None
     tfidf_vectorizer: Optional[Any] = None
@@ -18,6 +20,10 @@ class TrainingState:
     best_model: Optional[Any] = None
     best_params: Optional[Dict[str, Any]] = None
     cv_results: Optional[Dict[str, Any]] = None
+    featurizer_comparison: Optional[List[Dict[str, Any]]] = None
+    cascade: Optional[Dict[str, Any]] = None
+    knn_tradeoff: Optional[List[Dict[str, Any]]] = None
+    output_dir: Optional[str] = None
 
 class PredictionState:
     mailbox_path: Optional[str] = None
@@ -0,0 +1,12 @@
+from itertools import islice
+
+# ----------------------------------------------------------------------------
+# Function to group an iterable into lists of at most batch_size items
+# ----------------------------------------------------------------------------
+def iter_batches(iterable, batch_size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
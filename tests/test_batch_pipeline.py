@@ -0,0 +1,30 @@
+import glob
+import os
+import shutil
+
+import pandas as pd
+
+from benchmarks.synthetic import write_mbox
+from src.pipeline.batch_pipeline import BatchPredictionPipeline
+
+
+def shard_rows(output_dir):
+    return sum(len(pd.read_csv(path)) for path in glob.glob(os.path.join(output_dir, "shards", "*.csv")))
+
+
+def test_resume_after_append_replaces_stale_shards(tmp_path):
+    mbox_path = write_mbox(str(tmp_path / "inbox.mbox"), 50)
+    output_dir = str(tmp_path / "out")
+    pipeline = BatchPredictionPipeline()
+    # Several byte-range units, so appending shifts the ranges and keys
+    pipeline.config.parallel_chunk_bytes = os.path.getsize(mbox_path) // 3
+    assert pipeline.run([mbox_path], output_dir, workers=1)["rows"] == 50
+
+    appended = write_mbox(str(tmp_path / "more.mbox"), 10, seed=7)
+    with open(mbox_path, "ab") as out, open(appended, "rb") as f:
+        shutil.copyfileobj(f, out)
+    summary = pipeline.run([mbox_path], output_dir, workers=1)
+
+    assert summary["rows"] == 60
+    assert shard_rows(output_dir) == 60
+    assert sorted(glob.glob(os.path.join(output_dir, "shards", "*.csv"))) == sorted(summary["shards"])
@@ -0,0 +1,12 @@
+import random
+
+import pytest
+
+from benchmarks.bench_clean_text import fuzz_corpus, reference_clean_text
+from src.utils.email_utils import clean_text
+
+
+@pytest.mark.parametrize("seed", [0, 1, 42])
+def test_clean_text_matches_reference_on_fuzz_corpus(seed):
+    mismatches = [case for case in fuzz_corpus(2000, random.Random(seed)) if clean_text(case) != reference_clean_text(case)]
+    assert not mismatches
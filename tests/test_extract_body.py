@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks.bench_extract_body import load_corpus, reference_extract_body
+from src.utils.email_utils import extract_body
+
+CORPUS = load_corpus(n_synthetic=200)
+
+
+@pytest.mark.parametrize("name,msg", CORPUS, ids=[name for name, _ in CORPUS])
+def test_extract_body_matches_beautifulsoup_reference(name, msg):
+    assert extract_body(msg) == reference_extract_body(msg)
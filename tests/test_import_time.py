@@ -0,0 +1,12 @@
+from benchmarks.bench_import_time import HEAVY_MODULES, import_times
+
+MODULE = "src.pipeline.prediction_pipeline"
+BUDGET_MS = 400.0
+
+
+def test_prediction_pipeline_import_stays_light():
+    # Best of three cold imports; a single one is dominated by disk and scheduler noise
+    best = min((import_times(MODULE) for _ in range(3)), key=lambda times: times[MODULE][1])
+
+    assert best[MODULE][1] / 1000 < BUDGET_MS
+    assert not {name.split(".")[0] for name in best} & set(HEAVY_MODULES)
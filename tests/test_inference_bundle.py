@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+
+from benchmarks.synthetic import HAM_PHRASES, SPAM_PHRASES
+from src.components.featurizers import build_featurizer
+from src.components.inference_bundle import InferenceBundle
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    labels = [int(rng.random() >= 0.4) for _ in range(n)]
+    texts = [" ".join(rng.choice(HAM_PHRASES if label else SPAM_PHRASES) for _ in range(3)) for label in labels]
+    return texts, np.array(labels)
+
+
+@pytest.fixture(scope="module")
+def bundle(tmp_path_factory):
+    texts, labels = make_texts(200)
+    vectorizer = build_featurizer("tfidf").fit(texts)
+    model = LogisticRegression().fit(vectorizer.transform(texts), labels)
+    bundle_dir = InferenceBundle.export(vectorizer, model, str(tmp_path_factory.mktemp("bundle")))
+    return vectorizer, model, InferenceBundle.load(bundle_dir)
+
+
+def long_token_batch():
+    texts, _ = make_texts(999, seed=1)
+    # One 20,000-character token used to widen every token in the batch to 20,000 characters
+    texts.append("claim " + "x" * 20000 + " prize")
+    return texts
+
+
+def test_long_token_is_transformed_without_padding_the_batch(bundle):
+    vectorizer, _, loaded = bundle
+    texts = long_token_batch()
+    X = loaded.feature_transformer.transform(texts)
+    assert (X != vectorizer.transform(texts)).nnz == 0
+
+
+def test_long_token_is_scored_by_the_fused_scorer(bundle):
+    vectorizer, model, loaded = bundle
+    texts = long_token_batch()
+    np.testing.assert_allclose(loaded.scorer.decision_function(texts), model.decision_function(vectorizer.transform(texts)))
+
+
+def test_logistic_bundle_scores_probabilities(bundle):
+    vectorizer, model, loaded = bundle
+    texts, _ = make_texts(50, seed=2)
+    expected = model.predict_proba(vectorizer.transform(texts))
+    np.testing.assert_allclose(loaded.scorer.predict_proba(texts), expected)
+    np.testing.assert_allclose(loaded.model.predict_proba(loaded.feature_transformer.transform(texts)), expected)
+
+
+def test_non_logistic_bundle_hides_predict_proba(tmp_path):
+    texts, labels = make_texts(200)
+    vectorizer = build_featurizer("tfidf").fit(texts)
+    model = LinearSVC().fit(vectorizer.transform(texts), labels)
+    loaded = InferenceBundle.load(InferenceBundle.export(vectorizer, model, str(tmp_path)))
+    assert not hasattr(loaded.scorer, "predict_proba")
+    assert not hasattr(loaded.model, "predict_proba")
+
+
+def test_hashing_bundle_matches_the_fitted_featurizer(tmp_path):
+    texts, labels = make_texts(200)
+    vectorizer = build_featurizer("hashing").fit(texts)
+    model = LogisticRegression().fit(vectorizer.transform(texts), labels)
+    loaded = InferenceBundle.load(InferenceBundle.export(vectorizer, model, str(tmp_path)))
+
+    texts = long_token_batch()
+    difference = loaded.feature_transformer.transform(texts) - vectorizer.transform(texts)
+    assert np.abs(difference.data).max(initial=0) < 1e-12
+    np.testing.assert_allclose(loaded.scorer.decision_function(texts), model.decision_function(vectorizer.transform(texts)))
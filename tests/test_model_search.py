@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from src.components.model_search import ModelSearch
+
+PARAM_GRID = {"C": [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100], "solver": ["lbfgs", "liblinear"]}
+
+
+def make_data(n=600, n_features=20, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n, n_features))
+    y = (X[:, 0] + 0.5 * rng.normal(size=n) > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("max_fits", [9, 30, 45, 60])
+def test_halving_total_fits_stay_within_budget(max_fits):
+    X, y = make_data()
+    search = ModelSearch(strategy="halving", max_fits=max_fits, max_seconds=0, cv_folds=3)
+    result = search.search("LogisticRegression", LogisticRegression(), PARAM_GRID, X, y, n_jobs=1)
+
+    assert result["n_fits"] <= max_fits
+    assert len(result["cv_results"]["params"]) * 3 == result["n_fits"]
+
+
+def test_halving_rejects_wall_clock_budget():
+    with pytest.raises(ValueError, match="halving"):
+        ModelSearch(strategy="halving", max_seconds=10)
+
+
+@pytest.mark.parametrize("max_fits", [3, 12, 20, 40])
+def test_regularization_path_stays_within_budget(max_fits):
+    X, y = make_data()
+    search = ModelSearch(strategy="grid", max_fits=max_fits, max_seconds=0, cv_folds=3,
+                         regularization_paths={"LogisticRegression": "C"})
+    result = search.search("LogisticRegression", LogisticRegression(max_iter=1000), PARAM_GRID, X, y, n_jobs=1)
+
+    assert result["n_fits"] <= max_fits
+    assert "mean_n_iter" in result["cv_results"]
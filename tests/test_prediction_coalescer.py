@@ -0,0 +1,32 @@
+import pytest
+
+from src.config.config import Config
+from src.pipeline.prediction_coalescer import PredictionCoalescer
+
+
+class FailingPipeline:
+    """Scores every body except "bad", which fails whichever batch it lands in"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def predict_emails(self, bodies):
+        if "bad" in bodies:
+            raise ValueError("cannot score bad")
+        return [{"prediction": body} for body in bodies]
+
+
+def test_failed_batch_only_fails_the_failing_email():
+    config = Config()
+    config.coalesce_max_batch_size = 3
+    config.coalesce_max_wait_ms = 1000
+    coalescer = PredictionCoalescer(FailingPipeline(config))
+    assert coalescer.max_batch_size == 3
+
+    futures = [coalescer.submit(body) for body in ("good", "bad", "fine")]
+    coalescer.close()
+
+    assert futures[0].result() == {"prediction": "good"}
+    assert futures[2].result() == {"prediction": "fine"}
+    with pytest.raises(ValueError, match="bad"):
+        futures[1].result()
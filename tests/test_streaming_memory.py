@@ -0,0 +1,15 @@
+from benchmarks.bench_streaming_memory import peak_rss_mib
+from benchmarks.synthetic import write_mbox
+
+# Allowed growth of the streaming peak RSS between a 1,000 and a 10,000 email mailbox
+MAX_GROWTH_MIB = 25.0
+
+
+def test_streaming_prediction_memory_does_not_grow_with_mailbox_size(tmp_path):
+    output_path = str(tmp_path / "predictions.csv")
+    peaks = []
+    for n_messages in (1000, 10000):
+        mbox_path = write_mbox(str(tmp_path / f"synthetic_{n_messages}.mbox"), n_messages, body_repeat=20)
+        peaks.append(peak_rss_mib(mbox_path, output_path, "streaming", batch_size=1000))
+
+    assert peaks[1] - peaks[0] < MAX_GROWTH_MIB